@@ -0,0 +1,54 @@
+"""
+get_big_picture dari cache lokal: load cache dari disk, call ke-memo (dengan / tanpa data feed),
+dan update pas hari baru close. Tanpa network (cache yfinance diisi D1 sintetis).
+Jalankan: python -m bench.bench_big_picture
+"""
+import statistics
+import tempfile
+import time
+
+import pandas as pd
+
+from bench.common import synthetic_ohlc, fmt_us
+from src import historical_context as hc
+
+def timed(fn, repeat=2000):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples)
+
+def main():
+    hc.CACHE_DIR = tempfile.mkdtemp()
+    today = pd.Timestamp.now(tz="UTC").normalize()
+    daily = synthetic_ohlc(730, freq="1D", start=str((today - pd.Timedelta(days=730)).date()), seed=2)
+    t0 = time.perf_counter()
+    hc._cache(f"yf_{hc.YF_SYMBOL}").append_days(daily)
+    print(f"seed 730 hari D1: {fmt_us(time.perf_counter() - t0)}")
+
+    end = pd.Timestamp.now(tz="UTC").floor("5min")
+    m5 = synthetic_ohlc(3000, start=str(end - pd.Timedelta(minutes=5 * 2999)))
+    data = {"m5": m5}
+
+    hc._CACHES.clear()
+    t0 = time.perf_counter()
+    ctx = hc.get_big_picture(data=data, refresh=False)
+    print(f"cold (load CSV + agregasi feed): {fmt_us(time.perf_counter() - t0)}  source={ctx['source']}")
+    print(f"memo tanpa data : {fmt_us(timed(lambda: hc.get_big_picture(refresh=False)))}")
+    print(f"memo + data feed: {fmt_us(timed(lambda: hc.get_big_picture(data=data, refresh=False)))}")
+
+    # Hari baru close: append 1 hari + hitung ulang W1/MN1 periode terakhir
+    cache = hc._cache(f"yf_{hc.YF_SYMBOL}")
+    samples = []
+    for i in range(20):
+        day = cache.last_day + pd.Timedelta(days=1)
+        bar = pd.DataFrame({"Open": [2000.0], "High": [2001.0 + i], "Low": [1999.0], "Close": [2000.5]}, index=[day])
+        t0 = time.perf_counter()
+        cache.append_days(bar)
+        samples.append(time.perf_counter() - t0)
+    print(f"append 1 hari   : {fmt_us(statistics.median(samples))}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Throughput & latency REQ/REP lawan simulator bridge (replay N× + gangguan opsional).
+Jalankan: python -m bench.bench_bridge [--clients 4 --seconds 5 --speed 60 --delay-ms 50 --delay-prob 0.05]
+"""
+import argparse
+import threading
+import time
+
+from bench.common import synthetic_ohlc
+from bench.bench_feed_latency import pct
+from bridge_sim import BridgeSimulator, ReplayMarket, FaultInjector
+from src.zmq_client import ZMQClient
+
+PORT = 5596
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--speed", type=float, default=60.0)
+    parser.add_argument("--action", default="GET_ALL_DATA", choices=["GET_ALL_DATA", "GET_DELTA"])
+    parser.add_argument("--encoding", default="binary", choices=["binary", "json"])
+    parser.add_argument("--delay-ms", type=int, default=0)
+    parser.add_argument("--delay-prob", type=float, default=0.0)
+    parser.add_argument("--spike-prob", type=float, default=0.0)
+    args = parser.parse_args()
+
+    faults = None
+    if args.delay_ms or args.spike_prob:
+        faults = FaultInjector(delay_ms=args.delay_ms, delay_prob=args.delay_prob, spike_usd=3.0,
+                               spike_prob=args.spike_prob, seed=1)
+    market = ReplayMarket(synthetic_ohlc(20000, seed=4), history=1000, speed=args.speed)
+    sim = BridgeSimulator(market, port=PORT, host="127.0.0.1", faults=faults)
+    threading.Thread(target=sim.serve, daemon=True).start()
+    address = f"tcp://127.0.0.1:{PORT}"
+
+    lat, errors, spikes = [], [0], [0]
+    lock = threading.Lock()
+    def worker():
+        client = ZMQClient(address=address, encoding=args.encoding)
+        end = time.time() + args.seconds
+        since = None
+        while time.time() < end:
+            payload = {"since": since} if args.action == "GET_DELTA" and since else None
+            t0 = time.perf_counter()
+            resp = client.request(args.action if payload else "GET_ALL_DATA", payload)
+            dt = time.perf_counter() - t0
+            with lock:
+                if not resp or resp.get("status") != "OK":
+                    errors[0] += 1
+                    continue
+                lat.append(dt)
+                tick = resp["tick"]
+                if tick["ask"] - tick["bid"] > 1.0: spikes[0] += 1
+            if args.action == "GET_DELTA":
+                since = {tf: int(resp[tf]["time"][-1]) if isinstance(resp[tf], dict) else resp[tf][-1]["time"]
+                         for tf in ("m5", "m15")}
+
+    threads = [threading.Thread(target=worker) for _ in range(args.clients)]
+    t0 = time.time()
+    for t in threads: t.start()
+    for t in threads: t.join()
+    elapsed = time.time() - t0
+
+    print(f"{args.clients} client x {args.seconds:.0f}s, {args.action}/{args.encoding}, replay {args.speed:g}x "
+          f"(cursor bar {market.cursor})")
+    print(f"  throughput {len(lat) / elapsed:8.1f} req/s   errors {errors[0]}")
+    if lat:
+        print(f"  latency p50={pct(lat, 0.5) * 1000:.2f} ms  p99={pct(lat, 0.99) * 1000:.2f} ms  max={max(lat) * 1000:.2f} ms")
+    if faults: print(f"  injected {faults.injected}, spikes seen by clients {spikes[0]}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Bandingin GET_ALL_DATA vs GET_DELTA lawan bridge_sim lokal: byte di wire + waktu parse.
+Jalankan: python -m bench.bench_delta
+"""
+import os
+import statistics
+import threading
+import time
+import tracemalloc
+
+import zmq
+
+PORT = 5591
+os.environ["WINDOWS_HOST"] = "127.0.0.1"
+
+from bridge_sim import BridgeSimulator, SyntheticMarket
+from src import data_loader
+
+def main():
+    sim = BridgeSimulator(SyntheticMarket(history=1000, seed=1), port=PORT, host="127.0.0.1")
+    threading.Thread(target=sim.serve, daemon=True).start()
+    time.sleep(0.2)
+
+    sock = zmq.Context.instance().socket(zmq.REQ)
+    sock.connect(f"tcp://127.0.0.1:{PORT}")
+    def raw_bytes(req):
+        sock.send_json(req)
+        return len(sock.recv())
+
+    full = raw_bytes({"action": "GET_ALL_DATA"})
+    sock.send_json({"action": "GET_ALL_DATA"})
+    snap = sock.recv_json()
+    since = {tf: snap[tf][-1]["time"] for tf in ("m5", "m15")}
+    delta = raw_bytes({"action": "GET_DELTA", "since": since})
+    print(f"wire bytes: full={full:,}  delta={delta:,}  ratio={full / delta:,.0f}x")
+    sock.close()
+
+    # get_market_data end-to-end (parse + DataFrame), port di-override lewat socket manual
+    data_loader.ZMQ_SOCKET = zmq.Context.instance().socket(zmq.REQ)
+    data_loader.ZMQ_SOCKET.connect(f"tcp://127.0.0.1:{PORT}")
+    for label, delta_on in (("full ", False), ("delta", True)):
+        data_loader.SYNC_STATE["delta"] = delta_on
+        data_loader.reset_sync()
+        data_loader.get_market_data()
+        samples = []
+        for _ in range(100):
+            t0 = time.perf_counter()
+            data = data_loader.get_market_data()
+            samples.append(time.perf_counter() - t0)
+        assert data and len(data["m5"]) == 1000
+        tracemalloc.start()
+        for _ in range(20): data_loader.get_market_data()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"get_market_data [{label}] p50={statistics.median(samples) * 1e3:.2f}ms  peak alloc={peak / 1024:,.0f}KiB")
+
+if __name__ == "__main__": main()
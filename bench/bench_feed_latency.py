@@ -0,0 +1,74 @@
+"""
+Latency reaksi: REQ polling tiap 2 detik vs SUB (push) lawan bridge_sim dengan publisher.
+Jalankan: python -m bench.bench_feed_latency [--seconds 10]
+"""
+import argparse
+import statistics
+import threading
+import time
+
+import zmq
+
+from bridge_sim import BridgeSimulator, SyntheticMarket
+from src.market_feed import MarketFeed
+
+REQ_PORT, PUB_PORT = 5593, 5594
+
+def pct(samples, q):
+    s = sorted(samples)
+    return s[min(len(s) - 1, int(q * len(s)))]
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--tick-ms", type=int, default=50)
+    parser.add_argument("--poll-sec", type=float, default=2.0)
+    args = parser.parse_args()
+
+    sim = BridgeSimulator(SyntheticMarket(history=300, seed=3), port=REQ_PORT, host="127.0.0.1",
+                          pub_port=PUB_PORT, tick_ms=args.tick_ms)
+    threading.Thread(target=sim.serve, daemon=True).start()
+    feed = MarketFeed("127.0.0.1", port=PUB_PORT)
+    stop = sim.start_publisher()
+    time.sleep(0.5) # slow joiner SUB
+
+    # Mode poll: REQ tiap poll-sec, catat kapan tiap poll selesai
+    poll_times = []
+    def poller():
+        sock = zmq.Context.instance().socket(zmq.REQ)
+        sock.connect(f"tcp://127.0.0.1:{REQ_PORT}")
+        end = time.time() + args.seconds
+        while time.time() < end:
+            sock.send_json({"action": "GET_ALL_DATA"})
+            sock.recv()
+            poll_times.append(time.time())
+            time.sleep(args.poll_sec)
+        sock.close()
+    t = threading.Thread(target=poller)
+    t.start()
+
+    # Mode sub: latency = diterima - dikirim
+    sent, sub_lat = [], []
+    end = time.time() + args.seconds
+    while time.time() < end:
+        for topic, ev in feed.poll(100):
+            now = time.time()
+            if topic == "tick":
+                sent.append(ev["sent_at"])
+                sub_lat.append(now - ev["sent_at"])
+    t.join()
+    stop.set()
+
+    # Poll: tick ke-detect di poll pertama setelah tick itu terbit
+    poll_lat = []
+    for ts in sent:
+        nxt = next((p for p in poll_times if p >= ts), None)
+        if nxt is not None: poll_lat.append(nxt - ts)
+
+    for label, lat in (("poll (REQ/2s)", poll_lat), ("sub  (PUB)   ", sub_lat)):
+        if not lat: continue
+        print(f"{label}  n={len(lat):5d}  mean={statistics.mean(lat) * 1e3:9.2f}ms  "
+              f"p50={pct(lat, 0.5) * 1e3:9.2f}ms  p99={pct(lat, 0.99) * 1e3:9.2f}ms")
+    print(f"REQ round trips (poll mode): {len(poll_times)}  |  events pushed (sub mode): {feed.received}")
+
+if __name__ == "__main__": main()
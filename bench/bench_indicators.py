@@ -0,0 +1,55 @@
+"""
+Parity + speed check IndicatorEngine vs pandas_ta (full recompute).
+Jalankan: python -m bench.bench_indicators
+"""
+import statistics
+import numpy as np
+import pandas_ta as ta
+
+from bench.common import synthetic_ohlc, measure, fmt_us
+from src.indicator_engine import TimeframeIndicators
+
+TOL = 1e-9
+
+def check_parity(df):
+    """Replay bar per bar, bandingin nilai streaming vs ta.* di tiap prefix."""
+    eng = TimeframeIndicators()
+    worst = {"ema_50": 0.0, "ema_200": 0.0, "atr": 0.0}
+    ref = {
+        "ema_50": ta.ema(df["Close"], length=50).to_numpy(),
+        "ema_200": ta.ema(df["Close"], length=200).to_numpy(),
+        "atr": ta.atr(df["High"], df["Low"], df["Close"], length=14).to_numpy(),
+    }
+    for i in range(1, len(df) + 1):
+        snap = eng.update(df.iloc[:i])
+        for k, arr in ref.items():
+            a, b = snap[k], arr[i - 1]
+            if np.isnan(a) or np.isnan(b):
+                assert np.isnan(a) and np.isnan(b), f"{k} NaN mismatch at bar {i - 1}"
+                continue
+            worst[k] = max(worst[k], abs(a - b))
+    return worst
+
+def main():
+    df = synthetic_ohlc(600, freq="15min")
+    worst = check_parity(df)
+    for k, v in worst.items():
+        flag = "OK" if v <= TOL else "MISMATCH"
+        print(f"parity {k:8s} max|diff| = {v:.3e}  {flag}")
+
+    print("\nper-candle cost (1 bar baru + update candle berjalan):")
+    for n in (500, 2000, 10000):
+        df = synthetic_ohlc(n + 300, freq="15min")
+        win = df.iloc[:n]
+        full = lambda: (ta.ema(win["Close"], length=50).iloc[-1],
+                        ta.ema(win["Close"], length=200).iloc[-1],
+                        ta.atr(win["High"], win["Low"], win["Close"], length=14).iloc[-1])
+        # Simulasi bridge: window geser 1 bar tiap candle
+        eng = TimeframeIndicators()
+        eng.update(df.iloc[:n])
+        frames = iter([df.iloc[i - n:i] for i in range(n + 1, n + 300)])
+        t_full = statistics.median(measure(full))
+        t_stream = statistics.median(measure(lambda: eng.update(next(frames)), repeat=250))
+        print(f"  n={n:6d}  pandas_ta={fmt_us(t_full):>12s}  streaming={fmt_us(t_stream):>10s}  rebuilds={eng.rebuilds}")
+
+if __name__ == "__main__": main()
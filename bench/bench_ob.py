@@ -0,0 +1,51 @@
+"""
+Parity + speed check find_quality_ob (vectorized) vs loop .iloc versi lama.
+Jalankan: python -m bench.bench_ob
+"""
+import statistics
+import pandas as pd
+import pandas_ta as ta
+
+from bench.common import synthetic_ohlc, measure, fmt_us
+from src.indicators import find_quality_ob
+
+def find_quality_ob_loop(df, lookback=100):
+    """Implementasi lama (referensi parity)."""
+    if len(df) < lookback: return None, None
+    subset = df.tail(lookback).copy()
+    subset['ATR'] = ta.atr(subset['High'], subset['Low'], subset['Close'], length=14)
+    ob_bull = ob_bear = None
+    for i in range(len(subset)-4, 0, -1):
+        atr_next = subset['ATR'].iloc[i+1]
+        if pd.isna(atr_next) or atr_next <= 0: continue
+        if subset['Close'].iloc[i] < subset['Open'].iloc[i]:
+            body_next = abs(subset['Close'].iloc[i+1] - subset['Open'].iloc[i+1])
+            if subset['Close'].iloc[i+1] > subset['Open'].iloc[i+1] and body_next > (atr_next * 0.8):
+                ob_bull = (subset['Low'].iloc[i], subset['High'].iloc[i])
+                break
+    for i in range(len(subset)-4, 0, -1):
+        atr_next = subset['ATR'].iloc[i+1]
+        if pd.isna(atr_next) or atr_next <= 0: continue
+        if subset['Close'].iloc[i] > subset['Open'].iloc[i]:
+            body_next = abs(subset['Close'].iloc[i+1] - subset['Open'].iloc[i+1])
+            if subset['Close'].iloc[i+1] < subset['Open'].iloc[i+1] and body_next > (atr_next * 0.8):
+                ob_bear = (subset['Low'].iloc[i], subset['High'].iloc[i])
+                break
+    return ob_bull, ob_bear
+
+def main():
+    df = synthetic_ohlc(3000)
+    mismatch = 0
+    for end in range(90, len(df), 7):
+        frame = df.iloc[:end]
+        if find_quality_ob(frame) != find_quality_ob_loop(frame): mismatch += 1
+    print(f"parity lookback=100: {'OK' if mismatch == 0 else f'{mismatch} MISMATCH'}")
+
+    print("\nlatency per call:")
+    for lookback in (100, 1000, 5000):
+        frame = df if len(df) >= lookback else synthetic_ohlc(lookback)
+        t_loop = statistics.median(measure(lambda: find_quality_ob_loop(frame, lookback), repeat=5))
+        t_vec = statistics.median(measure(lambda: find_quality_ob(frame, lookback), repeat=50))
+        print(f"  lookback={lookback:5d}  loop={fmt_us(t_loop):>12s}  vectorized={fmt_us(t_vec):>10s}")
+
+if __name__ == "__main__": main()
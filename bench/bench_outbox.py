@@ -0,0 +1,88 @@
+"""
+Outbox Telegram lawan stand-in HTTP lokal (gak nyentuh api.telegram.org).
+Stand-in bales 429 (retry_after) tiap N request dan 500 sesekali, buat ngetes retry/backoff.
+Jalankan: python -m bench.bench_outbox [--messages 50]
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from bench.common import fmt_us
+from src.telegram_outbox import TelegramOutbox
+
+PORT = 5595
+
+class StandIn(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1" # keep-alive
+    received = []
+    connections = set()
+    calls = 0
+    lock = threading.Lock()
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with StandIn.lock:
+            StandIn.calls += 1
+            n = StandIn.calls
+            StandIn.connections.add(self.client_address)
+        if n % 7 == 0:
+            self._reply(429, {"ok": False, "error_code": 429, "parameters": {"retry_after": 0.2}})
+        elif n % 11 == 0:
+            self._reply(500, {"ok": False})
+        else:
+            StandIn.received.append(body)
+            self._reply(200, {"ok": True, "result": {}})
+
+    def _reply(self, code, payload):
+        raw = json.dumps(payload).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def log_message(self, *args):
+        pass
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=50)
+    parser.add_argument("--dupes", type=int, default=20, help="alert identik yang dikirim beruntun (burst)")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", PORT), StandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    outbox = TelegramOutbox(token="TEST", chat_id="1", api_base=f"http://127.0.0.1:{PORT}",
+                            min_interval=0.0, coalesce_sec=1.0)
+    lat = []
+    for i in range(args.messages):
+        t0 = time.perf_counter()
+        outbox.send(f"<b>msg {i}</b>")
+        lat.append(time.perf_counter() - t0)
+    for _ in range(args.dupes):
+        t0 = time.perf_counter()
+        outbox.send("⚠️ <b>DATA FREEZE</b>")
+        lat.append(time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    ok = outbox.flush(timeout=30)
+    drain = time.perf_counter() - t0
+    server.shutdown()
+
+    lat.sort()
+    texts = [m["text"] for m in StandIn.received]
+    freeze = [t for t in texts if "DATA FREEZE" in t]
+    unique = {t for t in texts if t.startswith("<b>msg")}
+    print(f"send() caller latency  p50={fmt_us(lat[len(lat) // 2])}  max={fmt_us(lat[-1])}")
+    print(f"drain {drain * 1000:.0f} ms, flushed={ok}, HTTP calls={StandIn.calls}, "
+          f"connections={len(StandIn.connections)}")
+    print(f"delivered {len(unique)}/{args.messages} unique, burst of {args.dupes} -> {freeze}")
+    print(f"stats: {outbox.stats}")
+    if len(unique) != args.messages or len(freeze) != 1: raise SystemExit("❌ delivery mismatch")
+    print("✅ OK")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Scan multi simbol lawan simulator bridge (GET_MULTI): waktu per poll + evaluasi per simbol
+seiring jumlah simbol naik. Tiap poll dipaksa lewat candle gate biar semua simbol dievaluasi.
+Jalankan: python -m bench.bench_scanner [--symbols 1,10,30 --polls 20 --workers 4]
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import threading
+from unittest import mock
+
+from bench.common import fmt_us
+from bridge_sim import BridgeSimulator, SyntheticMarket
+from src.metrics import METRICS
+from src.position_book import PositionBook
+from src.symbols import SymbolRegistry, SymbolSpec
+
+PORT = 5598
+ALL_SESSION = {"SESSION_START_UTC": 0, "SESSION_END_UTC": 24} # Biar rule jalan full path jam berapapun
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--symbols", default="1,10,30")
+    parser.add_argument("--polls", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+    counts = [int(n) for n in args.symbols.split(",")]
+
+    names = [f"SYM{i:02d}" for i in range(max(counts))]
+    markets = {n: SyntheticMarket(history=1000, seed=i) for i, n in enumerate(names)}
+    sim = BridgeSimulator(port=PORT, host="127.0.0.1", markets=markets)
+    threading.Thread(target=sim.serve, daemon=True).start()
+    os.environ["BRIDGE_ADDRESS"] = f"tcp://127.0.0.1:{PORT}"
+
+    from src import scanner as scanner_mod
+    judge = mock.patch.object(scanner_mod, "ask_ai_judge", return_value={"decision": "REJECT", "reason": "bench"})
+    tmp = tempfile.mkdtemp()
+    book = PositionBook(os.path.join(tmp, "positions.journal"), os.path.join(tmp, "positions.snapshot.json"))
+    with judge, mock.patch.object(scanner_mod.TradeLogger, "log_contract"):
+        for n in counts:
+            registry = SymbolRegistry([SymbolSpec(s, ALL_SESSION, primary=False) for s in names[:n]])
+            scan = scanner_mod.SymbolScanner(registry, lambda msg: None, book, workers=args.workers, deadline_sec=30)
+            scan.poll() # Warmup: full snapshot + engine init
+            METRICS.hists.clear()
+            polls = []
+            for _ in range(args.polls):
+                for st in scan.states.values(): st.last_candle_ts = None
+                with METRICS.stage("poll"): scan.poll()
+                polls.append(METRICS.hists["poll"].last)
+            rules = [METRICS.hists[f"rules:{s}"].snapshot()["p50"] for s in registry.names()]
+            fetch = METRICS.hists["fetch"].snapshot()["p50"]
+            print(f"{n:3d} symbols: poll p50={fmt_us(statistics.median(polls)):>12s} "
+                  f"({fmt_us(statistics.median(polls) / n)}/symbol)  fetch p50={fmt_us(fetch):>11s}  "
+                  f"rules p50 per symbol median={fmt_us(statistics.median(rules))} max={fmt_us(max(rules))}  "
+                  f"late={scan.stats['late']} judged={scan.stats['judged']}")
+            scan.pool.shutdown()
+            scan.judge_pool.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+signals.db sintetis bertahun-tahun (contract tiap candle M5 + verdict + outcome), lalu waktu query CLI.
+Jalankan: python -m bench.bench_signal_db [--years 3 --symbols 2]
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+from bench.common import fmt_us
+from src.signal_db import (INSERT_OPEN, INSERT_VERDICT, SIGNAL_COLS, UPSERT_SIGNAL, connect, query_signals,
+                           query_stats)
+
+REASONS = ["Scanning...", "Outside Session", "Weak M15 Structure (Chop)", "High Spread: $0.60",
+           "SMC: Bullish OB Retest + M15 Trend", "SMC: Bearish OB Retest + M15 Trend"]
+
+def populate(path, years, symbols, seed=5):
+    rng = np.random.default_rng(seed)
+    conn = connect(path)
+    start = int(time.time()) - years * 365 * 86400
+    n = years * 365 * 288
+    ts = start + np.arange(n) * 300
+    for s in range(symbols):
+        symbol = f"SYM{s}"
+        reason_idx = rng.choice(len(REASONS), n, p=[0.5, 0.3, 0.1, 0.05, 0.025, 0.025])
+        obs = rng.random(n) < 0.3
+        rows, verdicts, outcomes = [], [], []
+        for i in range(n):
+            reason = REASONS[reason_idx[i]]
+            signal = "BUY" if "Bullish" in reason else ("SELL" if "Bearish" in reason else "WAIT")
+            t = int(ts[i])
+            rows.append((t, symbol, signal, reason, (t // 3600) % 24, 2000.0, 0.2, 0.5, None, None, None, "BULLISH",
+                         "Active", "Low", int(obs[i]), "", "bench"))
+            if signal != "WAIT":
+                decision = "APPROVE" if rng.random() < 0.4 else "REJECT"
+                verdicts.append((t, symbol, signal, decision, "bench", 0, 0, t))
+                if decision == "APPROVE":
+                    outcomes.append((f"{symbol}-{i}", symbol, signal, t, 2000.0, 1995.0, 2006.0, "bench", t))
+        with conn:
+            conn.executemany(UPSERT_SIGNAL, rows)
+            conn.executemany(INSERT_VERDICT, verdicts)
+            conn.executemany(INSERT_OPEN, outcomes)
+            conn.execute("UPDATE outcomes SET status = CASE abs(random()) % 3 WHEN 0 THEN 'SL_HIT' "
+                         "WHEN 1 THEN 'TP_HIT' ELSE 'EXPIRED' END, closed_wall_ts = ts + 3600 WHERE symbol = ?",
+                         (symbol,))
+    conn.execute("ANALYZE")
+    conn.close()
+    return n * symbols
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--symbols", type=int, default=2)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "signals.db")
+    t0 = time.perf_counter()
+    rows = populate(path, args.years, args.symbols)
+    print(f"{rows:,} signals ({len(SIGNAL_COLS)} kolom), populate {time.perf_counter() - t0:.1f}s, "
+          f"{os.path.getsize(path) / 1e6:.0f} MB")
+
+    conn = connect(path, readonly=True)
+    month_ago = int(time.time()) - 30 * 86400
+    cases = {
+        "win rate BUY+OBS london 30d": lambda: query_stats(conn, signal="BUY", obs=True, session="london",
+                                                           since=month_ago, symbol="SYM0"),
+        "stats by reason 90d": lambda: query_stats(conn, by="reason", since=int(time.time()) - 90 * 86400),
+        "win rate SMC% all time": lambda: query_stats(conn, reason="SMC:%", by="signal"),
+        "list SELL latest 50": lambda: query_signals(conn, signal="SELL", limit=50),
+    }
+    for name, fn in cases.items():
+        samples = []
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            out = fn()
+            samples.append(time.perf_counter() - t0)
+        print(f"  {name:<30s} p50={fmt_us(statistics.median(samples)):>12s}  rows={len(out)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Parity + scaling check get_market_structure (pivot vectorized) vs loop .iloc versi lama.
+Jalankan: python -m bench.bench_structure
+"""
+import statistics
+import time
+
+import pandas as pd
+
+from bench.common import synthetic_ohlc, measure, fmt_us
+from src.indicators import get_market_structure
+from src.pivot_tracker import PivotTracker
+
+def get_market_structure_loop(df, point=0.01, atr_val=1.0, window=5, max_bars=200):
+    """Salinan get_market_structure versi lama (loop .iloc), cuma `max_bars` yang ditambah buat scaling."""
+    if max_bars and len(df) > max_bars: df = df.tail(max_bars)
+    if len(df) < (window * 2 + 10): return [], "Insufficient Data", None, []
+
+    raw_pivots = []
+    eps = point * 1.0
+    for i in range(window, len(df) - window):
+        curr_high = df['High'].iloc[i]
+        curr_low = df['Low'].iloc[i]
+        win_high = df['High'].iloc[i-window:i+window+1].max()
+        win_low  = df['Low'].iloc[i-window:i+window+1].min()
+        if curr_high >= (win_high - eps):
+            raw_pivots.append({"pos": i, "type": "High", "price": float(curr_high), "time": str(df.index[i])})
+        if curr_low <= (win_low + eps):
+            raw_pivots.append({"pos": i, "type": "Low", "price": float(curr_low), "time": str(df.index[i])})
+    type_order = {"Low": 0, "High": 1}
+    raw_pivots.sort(key=lambda x: (x["pos"], type_order[x["type"]]))
+
+    if pd.isna(atr_val) or atr_val <= 0: atr_val = 1.0
+    min_dev = max(1.0, atr_val * 0.3)
+
+    clean_pivots = []
+    for p in raw_pivots:
+        p['is_outside'] = False
+        if not clean_pivots:
+            p['leg_signed'] = 0.0
+            clean_pivots.append(p)
+            continue
+        last_p = clean_pivots[-1]
+
+        # 1. OUTSIDE BAR COMPRESSION
+        if p['pos'] == last_p['pos']:
+            if len(clean_pivots) >= 2:
+                prev_prev = clean_pivots[-2]
+                updated = False
+                if prev_prev['type'] == 'High' and p['type'] == 'Low':
+                    clean_pivots[-1] = p
+                    updated = True
+                elif prev_prev['type'] == 'Low' and p['type'] == 'High':
+                    clean_pivots[-1] = p
+                    updated = True
+                if updated:
+                    diff = p['price'] - prev_prev['price']
+                    p['leg_signed'] = round(diff, 2)
+                    p['leg_size'] = round(abs(diff), 2)
+                    p['is_outside'] = True
+                    clean_pivots[-1] = p
+            continue
+
+        # 2. ALTERNATING LOGIC
+        if p['type'] == last_p['type']:
+            updated = False
+            if p['type'] == 'High' and p['price'] > last_p['price']: updated = True
+            elif p['type'] == 'Low' and p['price'] < last_p['price']: updated = True
+            if updated:
+                if len(clean_pivots) >= 2:
+                    prev_pivot = clean_pivots[-2]
+                    diff = p['price'] - prev_pivot['price']
+                    p['leg_signed'] = round(diff, 2)
+                    p['leg_size'] = round(abs(diff), 2)
+                clean_pivots[-1] = p
+        else:
+            dist = abs(p['price'] - last_p['price'])
+            if dist >= min_dev:
+                diff = p['price'] - last_p['price']
+                p['leg_signed'] = round(diff, 2)
+                p['leg_size'] = round(abs(diff), 2)
+                clean_pivots.append(p)
+
+    highs = [p for p in clean_pivots if p['type'] == 'High']
+    lows = [p for p in clean_pivots if p['type'] == 'Low']
+    for i in range(len(highs)):
+        label = "H"
+        if i > 0:
+            if highs[i]['price'] > highs[i-1]['price']: label = "HH"
+            elif highs[i]['price'] < highs[i-1]['price']: label = "LH"
+            else: label = "EqH"
+        highs[i]['label'] = label
+    for i in range(len(lows)):
+        label = "L"
+        if i > 0:
+            if lows[i]['price'] > lows[i-1]['price']: label = "HL"
+            elif lows[i]['price'] < lows[i-1]['price']: label = "LL"
+            else: label = "EqL"
+        lows[i]['label'] = label
+
+    all_pivots = sorted(highs + lows, key=lambda x: x['pos'])
+    if len(all_pivots) < 3:
+        return all_pivots, "Weak Structure", None, []
+
+    recent_pivots = all_pivots[-5:]
+    sequence_str = "->".join(f"{p['type'][0]}({p['label']})" for p in recent_pivots)
+    legs_raw = [p.get('leg_signed', 0) for p in recent_pivots if 'leg_signed' in p]
+    last_3_legs = [x for x in legs_raw if abs(x) > 0.01][-3:]
+    last_pivot_data = recent_pivots[-1] if recent_pivots else None
+    return recent_pivots, sequence_str, last_pivot_data, last_3_legs
+
+def main():
+    df = synthetic_ohlc(1500, freq="15min")
+    mismatch = 0
+    for end in range(20, len(df), 11):
+        frame = df.iloc[:end]
+        if get_market_structure(frame, atr_val=2.5) != get_market_structure_loop(frame, atr_val=2.5): mismatch += 1
+    print(f"parity (max_bars=200): {'OK' if mismatch == 0 else f'{mismatch} MISMATCH'}")
+
+    # PivotTracker: replay bar per bar, tiap prefix harus identik sama batch full-history
+    tracker = PivotTracker(point=0.01, atr_val=2.5)
+    mismatch = 0
+    t_push = []
+    highs, lows = df['High'].to_numpy(), df['Low'].to_numpy()
+    for i in range(len(df)):
+        ts = df.index[i]
+        t0 = time.perf_counter()
+        tracker.push(ts, highs[i], lows[i])
+        t_push.append(time.perf_counter() - t0)
+        if tracker.structure() != get_market_structure(df.iloc[:i + 1], atr_val=2.5, max_bars=None): mismatch += 1
+    print(f"tracker replay vs batch ({len(df)} prefixes): {'OK' if mismatch == 0 else f'{mismatch} MISMATCH'}"
+          f"  push p50={fmt_us(statistics.median(t_push))}")
+
+    print("\nscaling (max_bars=None, window=5):")
+    for n in (200, 1000, 10000):
+        frame = synthetic_ohlc(n, freq="15min")
+        t_vec = statistics.median(measure(lambda: get_market_structure(frame, atr_val=2.5, max_bars=None), repeat=10))
+        t_loop = statistics.median(measure(lambda: get_market_structure_loop(frame, atr_val=2.5, max_bars=None), repeat=3, warmup=1))
+        print(f"  n={n:6d}  loop={fmt_us(t_loop):>14s}  vectorized={fmt_us(t_vec):>12s}  speedup={t_loop / t_vec:5.1f}x")
+
+if __name__ == "__main__": main()
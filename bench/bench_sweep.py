@@ -0,0 +1,41 @@
+"""
+Scaling sweep parameter vs jumlah worker (target: linear sampai jumlah core).
+Jalankan: python -m bench.bench_sweep [--bars 105120]
+"""
+import argparse
+import os
+import time
+
+from bench.common import synthetic_ohlc
+from bench.bench_backtest import resample_m15
+from src.backtest import prepare_arrays
+from src.sweep import run_sweep, expand_grid
+from run_sweep import DEFAULT_GRID
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bars", type=int, default=105120)
+    args = parser.parse_args()
+
+    m5 = synthetic_ohlc(args.bars, seed=5)
+    arr = prepare_arrays(m5, resample_m15(m5))
+    n = len(expand_grid(DEFAULT_GRID))
+    cores = os.cpu_count() or 1
+    print(f"{n} kombinasi x {args.bars} bar, {cores} core")
+
+    base = None
+    ref = None
+    workers = 1
+    while workers <= cores:
+        t0 = time.perf_counter()
+        res = run_sweep(arr, DEFAULT_GRID, workers=workers)
+        dt = time.perf_counter() - t0
+        base = base or dt
+        ref = res if ref is None else ref
+        same = res.drop(columns="rank").equals(ref.drop(columns="rank"))
+        print(f"  workers={workers:2d}  {dt:6.2f}s  {n / dt:7.1f} kombinasi/s  speedup x{base / dt:.2f}  "
+              f"{'OK' if same else 'MISMATCH'}")
+        workers *= 2
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Deteksi TP/SL/expiry dengan banyak posisi terbuka: TriggerIndex (bisect) vs evaluate_state per posisi.
+Tiap tick dicek juga paritasnya (status per posisi harus sama persis).
+Jalankan: python -m bench.bench_triggers [--levels 10000 --ticks 2000]
+"""
+import argparse
+import statistics
+import time
+
+import numpy as np
+
+from bench.common import fmt_us
+from src.state_manager import SIGNAL_TTL_SEC, build_state, evaluate_state
+from src.trigger_index import TriggerIndex
+
+def make_positions(n, price, rng, now):
+    """Posisi BUY/SELL yang masih open (harga di antara SL-TP); 0.1% lewat TTL, 0.2% sl/tp 0."""
+    positions = {}
+    for i in range(n):
+        sig = "BUY" if i % 2 else "SELL"
+        entry = price + rng.normal(0, 1)
+        dist_sl, dist_tp = rng.uniform(0.5, 30), rng.uniform(0.5, 40)
+        sl, tp = (price - dist_sl, price + dist_tp) if sig == "BUY" else (price + dist_sl, price - dist_tp)
+        if i % 500 == 0: sl = tp = 0.0
+        pos = build_state(True, sig, sl, tp, entry, "bench", now)
+        age = SIGNAL_TTL_SEC + 60 if i % 1000 == 1 else int(rng.uniform(0, SIGNAL_TTL_SEC - 600))
+        pos["opened_at_wall_ts"] = now - age
+        positions[f"P{i}"] = pos
+    return positions
+
+def linear(positions, high, low, bid, ask):
+    hits = {}
+    for pid, pos in positions.items():
+        status = evaluate_state(pos, high, low, bid, ask)
+        if status in ("TP_HIT", "SL_HIT", "EXPIRED"): hits[pid] = status
+    return hits
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--levels", type=int, default=10000, help="Jumlah posisi terbuka (2 level per posisi)")
+    parser.add_argument("--ticks", type=int, default=2000)
+    parser.add_argument("--linear-ticks", type=int, default=50, help="Tick buat baseline linear (lambat)")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(3)
+    now = int(time.time())
+    price = 2000.0
+    positions = make_positions(args.levels, price, rng, now)
+
+    t0 = time.perf_counter()
+    index = TriggerIndex()
+    for pid, pos in positions.items(): index.add(pid, pos)
+    build = time.perf_counter() - t0
+    levels = 2 * (len(index.buy_tp) + len(index.sell_tp))
+
+    # Tick kecil di sekitar harga: sebagian kecil level kelewat (kasus normal tiap poll)
+    ticks = []
+    for _ in range(args.ticks):
+        mid = price + rng.normal(0, 0.5)
+        bid, ask = mid - 0.1, mid + 0.1
+        ticks.append((mid + abs(rng.normal(0, 0.3)), mid - abs(rng.normal(0, 0.3)), bid, ask))
+
+    idx_times, fired = [], []
+    for high, low, bid, ask in ticks:
+        t0 = time.perf_counter()
+        hits = index.query(high, low, bid, ask, now=now)
+        idx_times.append(time.perf_counter() - t0)
+        fired.append(len(hits))
+
+    lin_times = []
+    mismatches = 0
+    for high, low, bid, ask in ticks[:args.linear_ticks]:
+        t0 = time.perf_counter()
+        expected = linear(positions, high, low, bid, ask)
+        lin_times.append(time.perf_counter() - t0)
+        if expected != index.query(high, low, bid, ask, now=int(time.time())): mismatches += 1
+
+    t0 = time.perf_counter()
+    for pid in list(positions)[:1000]: index.remove(pid)
+    remove = (time.perf_counter() - t0) / 1000
+
+    print(f"{args.levels} posisi ({levels} level TP/SL), build {fmt_us(build)}")
+    print(f"  index : p50={fmt_us(statistics.median(idx_times)):>10s} p99={fmt_us(np.percentile(idx_times, 99)):>10s}  "
+          f"hit/tick median={statistics.median(fired):.0f}")
+    print(f"  linear: p50={fmt_us(statistics.median(lin_times)):>10s}  "
+          f"speedup x{statistics.median(lin_times) / statistics.median(idx_times):,.0f}")
+    print(f"  remove: {fmt_us(remove)}/posisi   parity mismatches: {mismatches}/{len(lin_times)}")
+    if mismatches: raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+Biaya encode/decode payload bridge: JSON vs biner (kolom NumPy) vs biner+zlib.
+Jalankan: python -m bench.bench_wire
+"""
+import json
+import statistics
+
+from bench.common import synthetic_ohlc, measure
+from src.candle_store import CandleStore
+from src.data_loader import process_df
+from src.wire import encode_response, decode_response, bars_to_columns
+
+def make_response(n):
+    df = synthetic_ohlc(n)
+    bars = [{"time": int(ts.timestamp()), "Open": o, "High": h, "Low": l, "Close": c, "Volume": 1}
+            for ts, o, h, l, c in zip(df.index, df["Open"], df["High"], df["Low"], df["Close"])]
+    return {"status": "OK", "mode": "full", "tick": {"bid": 2000.0, "ask": 2000.2}, "meta": {"tick_time_msc": 0},
+            "m5": bars, "m15": bars[: n // 3]}
+
+def main():
+    print(f"{'bars':>7s} {'codec':>12s} {'bytes':>12s} {'encode':>10s} {'decode':>10s} {'->frame':>10s}")
+    for n in (500, 5_000, 50_000):
+        resp = make_response(n)
+        cols = {tf: bars_to_columns(resp[tf]) for tf in ("m5", "m15")}
+        resp_cols = {**resp, **cols} # bridge yang udah nyimpen kolom
+        store = CandleStore(capacity=n)
+        cases = {
+            "json": (lambda: json.dumps(resp).encode(), lambda b: json.loads(b),
+                     lambda d: process_df(d["m5"])),
+            "binary": (lambda: encode_response(resp_cols), decode_response,
+                       lambda d: (store.load(d["m5"]), store.frame())),
+            "binary+zlib": (lambda: encode_response(resp_cols, compress="zlib"), decode_response,
+                            lambda d: (store.load(d["m5"]), store.frame())),
+        }
+        for name, (enc, dec, to_frame) in cases.items():
+            payload = enc()
+            size = len(payload) if isinstance(payload, bytes) else sum(len(f) for f in payload)
+            t_enc = statistics.median(measure(enc, repeat=5))
+            t_dec = statistics.median(measure(lambda: dec(payload), repeat=5))
+            decoded = dec(payload)
+            t_frame = statistics.median(measure(lambda: to_frame(decoded), repeat=5))
+            print(f"{n:7d} {name:>12s} {size:12,d} {t_enc * 1e3:8.2f}ms {t_dec * 1e3:8.2f}ms {t_frame * 1e3:8.2f}ms")
+
+if __name__ == "__main__": main()
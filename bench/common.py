@@ -0,0 +1,26 @@
+import time
+import numpy as np
+import pandas as pd
+
+def synthetic_ohlc(n, freq="5min", seed=7, start="2024-01-02 00:00", price=2000.0):
+    """Random-walk OHLC (harga ala XAUUSD) dengan index UTC, format sama kayak process_df."""
+    rng = np.random.default_rng(seed)
+    close = price + np.cumsum(rng.normal(0, 0.8, n))
+    open_ = np.concatenate(([price], close[:-1]))
+    high = np.maximum(open_, close) + np.abs(rng.normal(0, 0.5, n))
+    low = np.minimum(open_, close) - np.abs(rng.normal(0, 0.5, n))
+    idx = pd.date_range(start, periods=n, freq=freq, tz="UTC", name="time")
+    return pd.DataFrame({"Open": open_, "High": high, "Low": low, "Close": close}, index=idx)
+
+def measure(fn, repeat=20, warmup=2):
+    """Return list latency per call (detik)."""
+    for _ in range(warmup): fn()
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return samples
+
+def fmt_us(sec):
+    return f"{sec * 1e6:,.1f}us"
@@ -0,0 +1,266 @@
+"""
+Suite micro-benchmark hot path per candle: latency per call (p50/p90/p99) + alokasi (tracemalloc).
+Fixture: synthetic (random walk) + opsional data rekaman (--tape dir / --csv history), beberapa ukuran.
+Jalankan:
+  python -m bench.run_suite                                  # print hasil
+  python -m bench.run_suite --save bench/baseline.json       # simpan baseline
+  python -m bench.run_suite --baseline bench/baseline.json   # bandingin, exit 1 kalau ada regresi > --threshold
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+from bench.common import synthetic_ohlc, measure, fmt_us
+from src.data_loader import process_df
+from src.indicators import (find_quality_ob, get_market_structure, calculate_rules,
+                            SESSION_START_UTC, SESSION_END_UTC)
+from src.logger import TradeLogger
+from src import state_manager
+from src.position_book import PositionBook
+from src.backtest import resample_m15
+
+DEFAULT_SIZES = (500, 2000, 10000)
+DEFAULT_THRESHOLD = 0.25 # p50 naik > 25% dari baseline = regresi
+NOISE_FLOOR_SEC = 5e-6   # Selisih absolut di bawah ini dianggap noise (case yang cuma beberapa us)
+ALLOC_CALLS = 3          # Call yang di-trace tracemalloc (lambat, jadi dipisah dari sampling latency)
+SPREAD_USD = 0.25
+
+# --- FIXTURE ---
+def _in_session(df):
+    """Potong frame biar bar terakhir di jam sesi (kalau gak, calculate_rules cuma exit 'Outside Session')."""
+    hours = df.index.hour
+    ok = np.flatnonzero((hours >= SESSION_START_UTC) & (hours < SESSION_END_UTC))
+    return df.iloc[:ok[-1] + 1] if len(ok) else df
+
+def synthetic_fixture(n, seed=7):
+    # Bar terakhir M5/M15 jatuh di tengah sesi (12:00 UTC)
+    end = pd.Timestamp("2024-03-06 12:00", tz="UTC")
+    m5 = synthetic_ohlc(n, freq="5min", seed=seed, start=end - pd.Timedelta(minutes=5 * (n - 1)))
+    m15 = synthetic_ohlc(n, freq="15min", seed=seed + 1, start=end - pd.Timedelta(minutes=15 * (n - 1)),
+                         price=float(m5["Close"].iloc[0]))
+    return m5, m15
+
+def recorded_fixture(m5, m15, n):
+    m5 = _in_session(m5)
+    m15 = m15[m15.index <= m5.index[-1]] if m15 is not None else resample_m15(m5)
+    return m5.iloc[-n:], m15.iloc[-n:]
+
+def load_recorded(args):
+    """Return list (nama, m5, m15 atau None) dari --tape / --csv."""
+    out = []
+    if args.tape:
+        from src.tape import TapeReader
+        reader = TapeReader(args.tape)
+        m5 = reader.frame("m5")
+        m15 = reader.frame("m15")
+        if len(m5): out.append(("tape", m5, m15 if len(m15) else None))
+        else: print(f"⚠️ Tape {args.tape} kosong, di-skip")
+    if args.csv:
+        from src.backtest import load_ohlc_csv
+        out.append(("csv", load_ohlc_csv(args.csv), None))
+    return out
+
+def to_bridge_bars(df):
+    """DataFrame -> list of dict format bridge (input process_df)."""
+    t = df.index.values.astype("datetime64[s]").astype(np.int64)
+    cols = {c: df[c].to_numpy(dtype=float) for c in ("Open", "High", "Low", "Close")}
+    return [{"time": int(t[i]), **{c: float(v[i]) for c, v in cols.items()}} for i in range(len(df))]
+
+def make_data(m5, m15):
+    close = float(m5["Close"].iloc[-1])
+    return {"m5": m5, "m15": m15,
+            "tick": {"bid": close, "ask": close + SPREAD_USD, "point": 0.01, "stop_level": 0, "freeze_level": 0},
+            "meta": {"tick_time_msc": int(time.time() * 1000)}}
+
+def fresh(data):
+    """Tick dianggap baru diterima (lag ~0) biar calculate_rules lewat full path, bukan exit 'Critical Lag'."""
+    data["meta"]["tick_time_msc"] = int(time.time() * 1000)
+    return data
+
+# --- CASES ---
+# Tiap case: fn(m5, m15) -> callable tanpa argumen. sized=False -> gak tergantung ukuran fixture, cukup sekali per sumber.
+def case_process_df(m5, m15):
+    bars = to_bridge_bars(m5)
+    return lambda: process_df(bars)
+
+def case_find_quality_ob(m5, m15):
+    return lambda: find_quality_ob(m5)
+
+def case_market_structure(m5, m15):
+    atr = float((m15["High"] - m15["Low"]).tail(14).mean())
+    return lambda: get_market_structure(m15, point=0.01, atr_val=atr)
+
+def case_calculate_rules(m5, m15):
+    data = make_data(m5, m15)
+    return lambda: calculate_rules(fresh(data))
+
+def case_log_contract(m5, m15, tmp):
+    # Enqueue + flush sinkron: ongkos nulis row ke disk ikut keukur, bukan cuma append ke batch
+    logger = TradeLogger()
+    logger.log_dir = tmp
+    contract = calculate_rules(fresh(make_data(m5, m15)))
+    if contract.get("reason") in ("Initializing...", "Data Empty"): contract["reason"] = "Scanning..."
+    def fn():
+        logger.log_contract(contract)
+        logger.flush()
+    return fn, logger.close
+
+def case_save_state(m5, m15, tmp):
+    entry = float(m5["Close"].iloc[-1])
+    return lambda: state_manager.save_state_atomic(True, "BUY", sl=entry - 4, tp=entry + 4.8, entry=entry,
+                                                   reason="bench", candle_ts=int(time.time()))
+
+def case_book_open_close(m5, m15, tmp):
+    book = PositionBook(os.path.join(tmp, "positions.journal"), os.path.join(tmp, "positions.snapshot.json"))
+    entry = float(m5["Close"].iloc[-1])
+    def fn():
+        pos = book.open("BENCH", "BUY", sl=entry - 4, tp=entry + 4.8, entry=entry, reason="bench",
+                        candle_ts=int(time.time()))
+        book.close(pos, "TP_HIT")
+    return fn, book.close_file
+
+CASES = [
+    ("process_df", case_process_df, True),
+    ("find_quality_ob", case_find_quality_ob, True),
+    ("get_market_structure", case_market_structure, True),
+    ("calculate_rules", case_calculate_rules, True),
+    ("log_contract", case_log_contract, False),
+    ("save_state_atomic", case_save_state, False),
+    ("book_open_close", case_book_open_close, False),
+]
+
+# --- MEASURE ---
+def percentile(sorted_samples, q):
+    return float(np.percentile(sorted_samples, q))
+
+def alloc_profile(fn, calls=ALLOC_CALLS):
+    """Peak alokasi per call + byte yang masih hidup setelah call (dua-duanya byte di atas baseline)."""
+    tracemalloc.start()
+    peak = retained = 0
+    try:
+        for _ in range(calls):
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            fn()
+            current, top = tracemalloc.get_traced_memory()
+            peak = max(peak, top - before)
+            retained = max(retained, current - before)
+    finally:
+        tracemalloc.stop()
+    return peak, retained
+
+def run_case(fn, repeat, warmup):
+    samples = sorted(measure(fn, repeat=repeat, warmup=warmup))
+    peak, retained = alloc_profile(fn)
+    return {"calls": len(samples), "p50": percentile(samples, 50), "p90": percentile(samples, 90),
+            "p99": percentile(samples, 99), "mean": statistics.fmean(samples),
+            "alloc_peak": int(peak), "alloc_retained": int(retained)}
+
+def run_suite(fixtures, repeat, warmup, only=None):
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp, \
+            mock.patch.object(state_manager, "FILE_PATH", os.path.join(tmp, "signal_state.json")):
+        seen_sources = set()
+        for name, m5, m15 in fixtures:
+            source = name.split("/")[0]
+            for case, factory, sized in CASES:
+                if only and case not in only: continue
+                close = None
+                if not sized:
+                    if source in seen_sources: continue
+                    fn = factory(m5, m15, tmp)
+                    if isinstance(fn, tuple): fn, close = fn # (fn, close) -> ditutup selagi tmp masih ada
+                    key = f"{case}/{source}"
+                else:
+                    fn = factory(m5, m15)
+                    key = f"{case}/{name}"
+                results[key] = run_case(fn, repeat, warmup)
+                if close: close()
+                print_row(key, results[key])
+            seen_sources.add(source)
+    return results
+
+# --- REPORT ---
+def print_row(key, r, base=None, flag=""):
+    line = (f"{key:42s} p50={fmt_us(r['p50']):>12s} p90={fmt_us(r['p90']):>12s} p99={fmt_us(r['p99']):>12s}"
+            f"  alloc={r['alloc_peak'] / 1024:9.1f}KiB")
+    if base: line += f"  base p50={fmt_us(base['p50']):>12s} ({(r['p50'] / base['p50'] - 1) * 100:+.0f}%) {flag}"
+    print(line)
+
+def environment():
+    return {"python": platform.python_version(), "numpy": np.__version__, "pandas": pd.__version__,
+            "machine": platform.machine(), "cpu_count": os.cpu_count()}
+
+def compare(results, baseline, threshold):
+    """Return list key yang p50-nya regresi > threshold (dan di atas noise floor)."""
+    regressions = []
+    print(f"\nvs baseline ({baseline.get('created', '?')}), threshold +{threshold * 100:.0f}% p50:")
+    for key, r in results.items():
+        base = baseline.get("results", {}).get(key)
+        if not base:
+            print(f"{key:42s} (baru, gak ada di baseline)")
+            continue
+        slow = r["p50"] > base["p50"] * (1 + threshold) and r["p50"] - base["p50"] > NOISE_FLOOR_SEC
+        if slow: regressions.append(key)
+        print_row(key, r, base, "REGRESSION" if slow else "ok")
+    if baseline.get("env") and baseline["env"] != environment():
+        print(f"⚠️ Environment beda dari baseline: {baseline['env']} vs {environment()}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmark hot path signal")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)), help="ukuran fixture (jumlah bar), koma")
+    parser.add_argument("--tape", help="dir tape rekaman (TAPE_DIR) buat fixture recorded")
+    parser.add_argument("--csv", help="CSV history M5 buat fixture recorded")
+    parser.add_argument("--no-synthetic", action="store_true")
+    parser.add_argument("--cases", help="subset case, koma (default semua)")
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--save", help="tulis hasil jadi baseline JSON")
+    parser.add_argument("--baseline", help="baseline JSON buat deteksi regresi")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="toleransi p50 (0.25 = +25%%)")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    only = set(args.cases.split(",")) if args.cases else None
+    if only and only - {c[0] for c in CASES}:
+        parser.error(f"case gak dikenal: {sorted(only - {c[0] for c in CASES})}")
+
+    fixtures = []
+    if not args.no_synthetic:
+        fixtures += [(f"synthetic/{n}", *synthetic_fixture(n)) for n in sizes]
+    for source, m5, m15 in load_recorded(args):
+        for n in sizes:
+            if n > len(m5): continue
+            fixtures.append((f"{source}/{n}", *recorded_fixture(m5, m15, n)))
+    if not fixtures: parser.error("gak ada fixture (cek --tape / --csv / --no-synthetic)")
+
+    print(f"{len(fixtures)} fixture, repeat={args.repeat}, env={environment()}\n")
+    results = run_suite(fixtures, args.repeat, args.warmup, only)
+
+    if args.save:
+        payload = {"created": time.strftime("%Y-%m-%d %H:%M:%S"), "env": environment(),
+                   "repeat": args.repeat, "results": results}
+        with open(args.save, "w") as f: json.dump(payload, f, indent=2)
+        print(f"\n💾 Baseline disimpan: {args.save}")
+
+    if args.baseline:
+        with open(args.baseline) as f: baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regresi: {', '.join(regressions)}")
+            sys.exit(1)
+        print("\n✅ Gak ada regresi")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,357 @@
+"""
+Stand-in MT5 bridge (ZMQ REP) buat test offline.
+Ngomong protocol yang sama kayak bridge Windows:
+  - GET_ALL_DATA -> full history m5/m15 + tick + meta
+  - GET_DELTA    -> cuma bar dengan time >= since[tf] (bar terakhir dikirim ulang karena bisa ke-update)
+  - GET_MULTI    -> {"symbols": {sym: {"since": {...}} | {}}} -> snapshot full/delta per simbol dalam 1 reply
+  - PUB (opsional) -> topic "tick" tiap tick baru, topic "bar" tiap candle close
+  - "encoding": "binary" di request -> response multipart kolom NumPy (lihat src/wire.py)
+
+Sumber market: random walk (default) atau replay CSV M5 rekaman (--replay) dengan speed N×.
+Gangguan bisa disuntik: reply telat, jam broker ketinggalan, spread spike, feed macet (stall).
+
+Jalankan: python bridge_sim.py --port 5555 [--pub-port 5556 --tick-ms 250]
+          python bridge_sim.py --symbols XAUUSD,XAGUSD,EURUSD   # market synthetic per simbol (GET_MULTI)
+          python bridge_sim.py --replay history_m5.csv --speed 1 --stall-prob 0.01 --stall-sec 600
+Terus arahkan bot: BRIDGE_ADDRESS=tcp://127.0.0.1:5555 python run_bot.py
+(Speed > 1 bikin jam broker lari lebih cepat dari jam dinding -> cek lag bot bakal nolak;
+ dipakai buat run throughput/latency lewat ZMQClient, bukan buat run_bot.)
+"""
+import argparse
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from collections import deque
+
+import zmq
+
+from src.wire import encode_response
+
+TF_SECONDS = {"m5": 300, "m15": 900}
+
+class SyntheticMarket:
+    """Random walk harga (ala XAUUSD) yang dirakit jadi candle m5/m15."""
+    def __init__(self, history=1000, price=2000.0, spread=0.20, seed=None, now=None):
+        self.rng = random.Random(seed)
+        self.price = price
+        self.spread = spread
+        self.point = 0.01
+        self.bars = {tf: deque(maxlen=history) for tf in TF_SECONDS}
+        self.last_tick_ts = now if now is not None else time.time()
+        self._backfill(history, self.last_tick_ts)
+
+    def _backfill(self, history, now):
+        # History palsu: mundur dari sekarang, 1 step per menit
+        start = now - history * TF_SECONDS["m15"]
+        steps = int((now - start) // 60)
+        for k in range(steps): self._apply_price(start + k * 60, self.rng.gauss(0, 0.6))
+
+    def _apply_price(self, ts, step):
+        self.price = round(self.price + step, 2)
+        for tf, sec in TF_SECONDS.items():
+            bar_time = int(ts // sec * sec)
+            bars = self.bars[tf]
+            if bars and bars[-1]["time"] == bar_time:
+                b = bars[-1]
+                b["High"] = max(b["High"], self.price)
+                b["Low"] = min(b["Low"], self.price)
+                b["Close"] = self.price
+                b["Volume"] += 1
+            else:
+                bars.append({"time": bar_time, "Open": self.price, "High": self.price,
+                             "Low": self.price, "Close": self.price, "Volume": 1})
+
+    def advance(self, now=None):
+        """Bikin tick baru di waktu `now` (default: jam sekarang)."""
+        now = time.time() if now is None else now
+        self.last_tick_ts = now
+        self._apply_price(now, self.rng.gauss(0, 0.15))
+
+    def tick(self):
+        bid = self.price
+        return {"bid": bid, "ask": round(bid + self.spread, 2), "point": self.point, "digits": 2,
+                "stop_level": 0, "freeze_level": 0}
+
+class ReplayMarket:
+    """
+    Replay bar M5 rekaman (DataFrame kayak process_df, mis. dari backtest.load_ohlc_csv) di speed N×.
+    Bar yang lagi jalan dirakit bertahap (O -> L/H -> C) sesuai progress waktu, M15 diagregasi dari M5.
+    rebase=True: waktu rekaman digeser (kelipatan 15 menit) biar replay mulai "sekarang".
+    """
+    def __init__(self, m5, history=1000, speed=1.0, spread=0.20, rebase=True, now=None):
+        self.speed = float(speed)
+        self.spread = spread
+        self.point = 0.01
+        self.times = m5.index.values.astype("datetime64[s]").astype("int64")
+        self.ohlc = m5[["Open", "High", "Low", "Close"]].to_numpy(dtype=float)
+        self.spreads = m5["spread"].to_numpy(dtype=float) * self.point if "spread" in m5.columns else None
+        self.bars = {tf: deque(maxlen=history) for tf in TF_SECONDS}
+        self.cursor = 0
+        self.price = float(self.ohlc[0, 0])
+        self.current_spread = spread
+
+        # Preload history (bar full), replay mulai dari bar setelahnya
+        preload = max(1, min(history, len(self.times) - 1))
+        wall = time.time() if now is None else now
+        start = int(self.times[preload]) if preload < len(self.times) else int(self.times[-1]) + 300
+        self.offset = int(round((wall - start) / 900.0)) * 900 if rebase else 0
+        for i in range(preload): self._upsert(i, 1.0)
+        self.cursor = preload
+        self.wall_start = wall
+        self.src_start = wall - self.offset if rebase else start
+        self.last_tick_ts = self.src_start + self.offset
+
+    @property
+    def finished(self):
+        return self.cursor >= len(self.times)
+
+    def _path_price(self, i, frac):
+        """Harga di bar i pada progress `frac` (0..1) + high/low yang udah kelewat."""
+        o, h, l, c = self.ohlc[i]
+        path = (o, l, h, c) if c >= o else (o, h, l, c) # Bar hijau: turun dulu, bar merah: naik dulu
+        pos = min(frac, 1.0) * 3
+        k = min(int(pos), 2)
+        price = path[k] + (path[k + 1] - path[k]) * (pos - k)
+        seen = path[:k + 1] + (price,)
+        return price, max(seen), min(seen)
+
+    def _upsert(self, i, frac):
+        price, high, low = self._path_price(i, frac)
+        t = int(self.times[i]) + self.offset
+        bar = {"time": t, "Open": float(self.ohlc[i, 0]), "High": float(high), "Low": float(low),
+               "Close": float(price), "Volume": max(1, int(frac * 100))}
+        m5 = self.bars["m5"]
+        if m5 and m5[-1]["time"] == t: m5[-1] = bar
+        else: m5.append(bar)
+        # M15 = agregasi bar M5 di slot yang sama
+        t15 = t // 900 * 900
+        parts = [b for b in list(m5)[-3:] if b["time"] // 900 * 900 == t15]
+        agg = {"time": t15, "Open": parts[0]["Open"], "High": max(b["High"] for b in parts),
+               "Low": min(b["Low"] for b in parts), "Close": parts[-1]["Close"], "Volume": sum(b["Volume"] for b in parts)}
+        m15 = self.bars["m15"]
+        if m15 and m15[-1]["time"] == t15: m15[-1] = agg
+        else: m15.append(agg)
+        self.price = round(float(price), 2)
+        if self.spreads is not None: self.current_spread = float(self.spreads[i])
+
+    def advance(self, now=None):
+        now = time.time() if now is None else now
+        src = self.src_start + (now - self.wall_start) * self.speed
+        n = len(self.times)
+        while self.cursor < n and self.times[self.cursor] + 300 <= src:
+            self._upsert(self.cursor, 1.0)
+            self.cursor += 1
+        if self.cursor < n and self.times[self.cursor] <= src:
+            self._upsert(self.cursor, (src - self.times[self.cursor]) / 300.0)
+        self.last_tick_ts = src + self.offset
+
+    def tick(self):
+        bid = self.price
+        return {"bid": bid, "ask": round(bid + self.current_spread, 2), "point": self.point, "digits": 2,
+                "stop_level": 0, "freeze_level": 0}
+
+class FaultInjector:
+    """Gangguan buatan (deterministik kalau pakai seed): reply telat, jam broker ketinggalan, spread spike, stall."""
+    def __init__(self, delay_ms=0, delay_prob=0.0, tick_lag_sec=0.0, spike_usd=0.0, spike_prob=0.0,
+                 stall_sec=0.0, stall_prob=0.0, seed=None):
+        self.rng = random.Random(seed)
+        self.delay_ms = delay_ms
+        self.delay_prob = delay_prob
+        self.tick_lag_sec = tick_lag_sec
+        self.spike_usd = spike_usd
+        self.spike_prob = spike_prob
+        self.stall_sec = stall_sec
+        self.stall_prob = stall_prob
+        self.stall_until = 0.0
+        self.injected = {"delay": 0, "spike": 0, "stall": 0}
+
+    def stalled(self, now):
+        """Feed macet: market gak gerak, jam broker beku (bot harusnya teriak DATA FREEZE)."""
+        if now < self.stall_until: return True
+        if self.stall_sec > 0 and self.rng.random() < self.stall_prob:
+            self.stall_until = now + self.stall_sec
+            self.injected["stall"] += 1
+            return True
+        return False
+
+    def reply_delay(self):
+        if self.delay_ms > 0 and self.rng.random() < self.delay_prob:
+            self.injected["delay"] += 1
+            return self.delay_ms / 1000.0
+        return 0.0
+
+    def apply_tick(self, tick):
+        if self.spike_usd > 0 and self.rng.random() < self.spike_prob:
+            self.injected["spike"] += 1
+            return {**tick, "ask": round(tick["bid"] + self.spike_usd, 2)}
+        return tick
+
+    def apply_meta(self, meta):
+        if self.tick_lag_sec <= 0: return meta
+        ts = meta["tick_time_msc"] / 1000.0 - self.tick_lag_sec
+        return {**meta, "tick_time": int(ts), "tick_time_msc": int(ts * 1000)}
+
+class BridgeSimulator:
+    def __init__(self, market=None, port=5555, host="*", pub_port=None, tick_ms=250, faults=None, markets=None):
+        self.market = market or SyntheticMarket()
+        # Simbol tambahan buat GET_MULTI (market utama = simbol chart bridge, dipakai GET_ALL_DATA/GET_DELTA)
+        self.markets = markets or {}
+        self.faults = faults
+        self.address = f"tcp://{host}:{port}"
+        self.pub_address = f"tcp://{host}:{pub_port}" if pub_port else None
+        self.tick_ms = tick_ms
+        self.epoch = uuid.uuid4().hex[:12] # Ganti tiap restart -> client wajib full resync
+        self.context = zmq.Context.instance()
+        self.socket = None
+        self.requests = 0
+        self.published = 0
+        self.lock = threading.Lock()
+        # Mode PUB: market jalan sendiri per tick, REQ cuma baca snapshot
+        self.advance_on_request = pub_port is None
+
+    def _meta(self, market=None):
+        ts = (market or self.market).last_tick_ts
+        meta = {"tick_time": int(ts), "tick_time_msc": int(ts * 1000), "epoch": self.epoch}
+        return self.faults.apply_meta(meta) if self.faults else meta
+
+    def _tick(self, market=None):
+        tick = (market or self.market).tick()
+        return self.faults.apply_tick(tick) if self.faults else tick
+
+    def _stalled(self):
+        return bool(self.faults) and self.faults.stalled(time.time())
+
+    def handle(self, req):
+        """Proses 1 request (dict) -> response (dict)."""
+        with self.lock: return self._handle(req)
+
+    def _handle(self, req):
+        action = req.get("action")
+        if action == "GET_MULTI":
+            out = {}
+            for sym, sub in (req.get("symbols") or {}).items():
+                market = self.markets.get(sym)
+                if market is None:
+                    out[sym] = {"status": "ERROR", "error": f"Unknown symbol: {sym}"}
+                    continue
+                if self.advance_on_request and not self._stalled(): market.advance()
+                out[sym] = self._snapshot(market, (sub or {}).get("since"))
+            return {"status": "OK", "symbols": out}
+
+        if self.advance_on_request and not self._stalled(): self.market.advance()
+        if action == "GET_DELTA": return self._snapshot(self.market, req.get("since") or {})
+        if action == "GET_ALL_DATA": return self._snapshot(self.market, None)
+        return {"status": "ERROR", "error": f"Unknown action: {action}"}
+
+    def _snapshot(self, market, since):
+        """Full (since None) atau delta (bar time >= since[tf]) 1 market."""
+        base = {"status": "OK", "tick": self._tick(market), "meta": self._meta(market)}
+        if since is not None:
+            out = {"mode": "delta"}
+            for tf, bars in market.bars.items():
+                ts = since.get(tf)
+                # Bar `since` udah kebuang dari history -> gak bisa delta, kirim full
+                if ts is None or not bars or ts < bars[0]["time"]: break
+                out[tf] = [dict(b) for b in bars if b["time"] >= ts]
+            else:
+                return {**base, **out}
+        full = {tf: [dict(b) for b in bars] for tf, bars in market.bars.items()}
+        return {**base, "mode": "full", **full}
+
+    def publish_loop(self, stop_event=None):
+        """Thread publisher: bikin tick tiap `tick_ms`, broadcast tick + bar close."""
+        pub = self.context.socket(zmq.PUB)
+        pub.setsockopt(zmq.LINGER, 0)
+        pub.bind(self.pub_address)
+        print(f"📣 Publishing ticks on {self.pub_address} every {self.tick_ms}ms")
+        try:
+            while stop_event is None or not stop_event.is_set():
+                time.sleep(self.tick_ms / 1000.0)
+                with self.lock:
+                    if self._stalled(): continue
+                    prev = {tf: bars[-1]["time"] for tf, bars in self.market.bars.items()}
+                    self.market.advance()
+                    tick = {**self._tick(), **self._meta()}
+                    closed = [(tf, prev[tf]) for tf, bars in self.market.bars.items() if bars[-1]["time"] != prev[tf]]
+                now = time.time()
+                pub.send_multipart([b"tick", json.dumps({**tick, "sent_at": now}).encode()])
+                for tf, bar_time in closed:
+                    pub.send_multipart([b"bar", json.dumps({"tf": tf, "time": bar_time, "sent_at": now}).encode()])
+                self.published += 1
+        finally:
+            pub.close()
+
+    def start_publisher(self):
+        stop_event = threading.Event()
+        threading.Thread(target=self.publish_loop, args=(stop_event,), daemon=True).start()
+        return stop_event
+
+    def serve(self, max_requests=None):
+        self.socket = self.context.socket(zmq.REP)
+        self.socket.setsockopt(zmq.LINGER, 0)
+        self.socket.bind(self.address)
+        print(f"🧪 Bridge simulator listening on {self.address} (epoch {self.epoch})")
+        try:
+            while max_requests is None or self.requests < max_requests:
+                req = self.socket.recv_json()
+                self.requests += 1
+                resp = self.handle(req)
+                if self.faults:
+                    delay = self.faults.reply_delay()
+                    if delay: time.sleep(delay)
+                if req.get("encoding") == "binary" and resp.get("status") == "OK":
+                    self.socket.send_multipart(encode_response(resp, compress=req.get("compress")))
+                else:
+                    self.socket.send_json(resp)
+        finally:
+            self.socket.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Local MT5 bridge stand-in")
+    parser.add_argument("--port", type=int, default=int(os.getenv("BRIDGE_PORT", 5555)))
+    parser.add_argument("--history", type=int, default=1000, help="Jumlah bar per timeframe")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--pub-port", type=int, default=None, help="Aktifin PUB tick/bar (mis. 5556)")
+    parser.add_argument("--tick-ms", type=int, default=250)
+    parser.add_argument("--symbols", help="Simbol buat GET_MULTI, koma (market synthetic sendiri per simbol)")
+    parser.add_argument("--replay", help="CSV M5 rekaman (time, open, high, low, close[, spread]) buat di-replay")
+    parser.add_argument("--tape", help="Direktori tape (TAPE_DIR) buat di-replay, alternatif --replay")
+    parser.add_argument("--speed", type=float, default=1.0, help="Kecepatan replay (x jam dinding)")
+    parser.add_argument("--no-rebase", action="store_true", help="Pakai timestamp asli rekaman")
+    parser.add_argument("--delay-ms", type=int, default=0, help="Reply REP telat segini ...")
+    parser.add_argument("--delay-prob", type=float, default=1.0, help="... dengan probabilitas ini")
+    parser.add_argument("--tick-lag", type=float, default=0.0, help="Jam broker (meta) ketinggalan N detik")
+    parser.add_argument("--spike-usd", type=float, default=0.0, help="Spread spike (USD) ...")
+    parser.add_argument("--spike-prob", type=float, default=0.0, help="... per request/tick")
+    parser.add_argument("--stall-sec", type=float, default=0.0, help="Feed macet selama N detik ...")
+    parser.add_argument("--stall-prob", type=float, default=0.0, help="... peluang mulai per request/tick")
+    args = parser.parse_args()
+
+    if args.replay or args.tape:
+        if args.tape:
+            from src.tape import TapeReader
+            m5 = TapeReader(args.tape).frame("m5")
+        else:
+            from src.backtest import load_ohlc_csv
+            m5 = load_ohlc_csv(args.replay)
+        market = ReplayMarket(m5, history=args.history, speed=args.speed, rebase=not args.no_rebase)
+    else:
+        market = SyntheticMarket(history=args.history, seed=args.seed)
+    faults = None
+    if args.delay_ms or args.tick_lag or args.spike_usd or args.stall_sec:
+        faults = FaultInjector(args.delay_ms, args.delay_prob, args.tick_lag, args.spike_usd, args.spike_prob,
+                               args.stall_sec, args.stall_prob, seed=args.seed)
+    markets = {}
+    if args.symbols:
+        for i, sym in enumerate(s.strip() for s in args.symbols.split(",") if s.strip()):
+            seed = None if args.seed is None else args.seed + i + 1
+            markets[sym] = SyntheticMarket(history=args.history, seed=seed)
+    sim = BridgeSimulator(market, port=args.port, pub_port=args.pub_port, tick_ms=args.tick_ms, faults=faults,
+                          markets=markets)
+    if args.pub_port: sim.start_publisher()
+    sim.serve()
+
+if __name__ == "__main__": main()
@@ -0,0 +1,104 @@
+"""
+Query database signal (signals.db, lihat src/signal_db.py).
+
+  python query_signals.py stats --signal BUY --obs --session london --month 2026-09   # win rate BUY pivot OBS sesi London
+  python query_signals.py stats --since 90d --by reason                              # per reason 90 hari terakhir
+  python query_signals.py list --symbol XAUUSD --signal SELL --limit 20
+  python query_signals.py backfill logs/trade_log_*.csv                              # import CSV lama
+"""
+import argparse
+import glob
+import os
+import re
+import sys
+import time
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from src.signal_db import (DB_PATH, GROUPS, SESSIONS, SignalDB, connect, query_signals, query_stats)
+from src.symbols import PRIMARY_SYMBOL
+
+def parse_time(value):
+    """'30d' / '12h' (relatif dari sekarang) atau tanggal (UTC) -> epoch."""
+    if value is None: return None
+    m = re.fullmatch(r"(\d+)([dh])", value)
+    if m: return int(time.time()) - int(m.group(1)) * (86400 if m.group(2) == "d" else 3600)
+    return int(pd.Timestamp(value, tz="UTC").timestamp())
+
+def filters_from(args):
+    since, until = parse_time(args.since), parse_time(args.until)
+    if args.month:
+        start = pd.Timestamp(f"{args.month}-01", tz="UTC")
+        since, until = int(start.timestamp()), int((start + pd.offsets.MonthBegin(1)).timestamp())
+    obs = True if args.obs else (False if args.no_obs else None)
+    return {"symbol": args.symbol, "signal": args.signal, "since": since, "until": until,
+            "session": args.session, "reason": args.reason, "obs": obs}
+
+def symbol_from_csv(path, default):
+    """trade_log_YYYY-MM-DD.csv = simbol primary; trade_log_{SLUG}_YYYY-MM-DD.csv = SLUG."""
+    m = re.fullmatch(r"trade_log(?:_(.+))?_\d{4}-\d{2}-\d{2}\.csv", os.path.basename(path))
+    return m.group(1) if m and m.group(1) else default
+
+def fmt_rate(rate):
+    return f"{rate * 100:5.1f}%" if rate is not None else "    -"
+
+def main():
+    parser = argparse.ArgumentParser(description="Query signal / verdict / outcome dari signals.db")
+    parser.add_argument("--db", default=DB_PATH)
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    for name in ("stats", "list"):
+        p = sub.add_parser(name)
+        p.add_argument("--symbol")
+        p.add_argument("--signal", type=str.upper, choices=["BUY", "SELL", "WAIT"])
+        p.add_argument("--since", help="30d / 12h / 2026-01-01")
+        p.add_argument("--until")
+        p.add_argument("--month", help="YYYY-MM (override since/until)")
+        p.add_argument("--session", choices=sorted(SESSIONS))
+        p.add_argument("--reason", help="exact, atau pakai %% buat LIKE (mis. 'SMC:%%')")
+        p.add_argument("--obs", action="store_true", help="pivot M15 terakhir = OBS")
+        p.add_argument("--no-obs", action="store_true")
+        if name == "stats": p.add_argument("--by", choices=sorted(GROUPS))
+        else: p.add_argument("--limit", type=int, default=50)
+    p = sub.add_parser("backfill")
+    p.add_argument("csv", nargs="+", help="file / glob trade_log_*.csv")
+    p.add_argument("--symbol", default=PRIMARY_SYMBOL, help="simbol buat file tanpa suffix simbol")
+    args = parser.parse_args()
+
+    if args.cmd == "backfill":
+        db = SignalDB(args.db)
+        total = 0
+        for pattern in args.csv:
+            for path in sorted(glob.glob(pattern)) or [pattern]:
+                n = db.backfill_csv(path, symbol_from_csv(path, args.symbol))
+                total += n
+                print(f"📥 {os.path.basename(path)}: {n} rows")
+        db.close()
+        print(f"✅ Backfill: {total} rows -> {args.db}")
+        return
+
+    if not os.path.exists(args.db):
+        print(f"❌ DB not found: {args.db} (run the bot with SIGNAL_DB set, or `backfill` old CSV logs first)")
+        return 1
+    conn = connect(args.db, readonly=True)
+    filters = filters_from(args)
+    t0 = time.perf_counter()
+    if args.cmd == "stats":
+        rows = query_stats(conn, by=args.by, **filters)
+        elapsed = time.perf_counter() - t0
+        print(f"{'group':<40s} {'signals':>8s} {'opened':>7s} {'TP':>5s} {'SL':>5s} {'EXP':>5s} {'open':>5s} {'win':>6s}")
+        for r in rows:
+            print(f"{str(r['grp'])[:40]:<40s} {r['signals']:>8d} {r['opened']:>7d} {r['tp']:>5d} {r['sl']:>5d} "
+                  f"{r['expired']:>5d} {r['still_open']:>5d} {fmt_rate(r['win_rate']):>6s}")
+    else:
+        rows = query_signals(conn, limit=args.limit, **filters)
+        elapsed = time.perf_counter() - t0
+        for r in rows:
+            ts = datetime.fromtimestamp(r["ts"], timezone.utc).strftime("%Y-%m-%d %H:%M")
+            obs = {1: "OBS", 0: "-"}.get(r["last_pivot_is_obs"], "?")
+            print(f"{ts} {r['symbol']:<8s} {r['signal']:<4s} {obs:<3s} {str(r['decision'] or '-'):<7s} "
+                  f"{str(r['status'] or '-'):<8s} {r['price'] or 0:>10.2f}  {r['reason']}")
+    print(f"⏱️ {len(rows)} rows in {elapsed * 1000:.1f} ms")
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,48 @@
+import argparse
+import time
+
+import pandas as pd
+
+from src.backtest import run_backtest, load_ohlc_csv, default_params, DEFAULT_SPREAD_USD
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest rule calculate_rules di history M5/M15")
+    parser.add_argument("--m5", help="CSV M5 (time, open, high, low, close[, spread])")
+    parser.add_argument("--m15", help="CSV M15 (default: resample dari M5)")
+    parser.add_argument("--tape", help="direktori tape (TAPE_DIR) sebagai sumber history")
+    parser.add_argument("--start", help="awal range tape (mis. 2024-05-01)")
+    parser.add_argument("--end", help="akhir range tape")
+    parser.add_argument("--synthetic", type=int, default=0, help="pakai N bar M5 random walk (tanpa CSV)")
+    parser.add_argument("--spread", type=float, default=DEFAULT_SPREAD_USD, help="spread USD kalau CSV gak ada kolom spread")
+    parser.add_argument("--ob-mode", choices=["fast", "exact"], default="fast")
+    parser.add_argument("--out", help="simpan daftar trade ke CSV")
+    args = parser.parse_args()
+
+    m15 = load_ohlc_csv(args.m15) if args.m15 else None
+    if args.synthetic:
+        from bench.common import synthetic_ohlc
+        m5 = synthetic_ohlc(args.synthetic)
+    elif args.tape:
+        from src.tape import TapeReader
+        start = pd.Timestamp(args.start, tz="UTC").timestamp() if args.start else None
+        end = pd.Timestamp(args.end, tz="UTC").timestamp() if args.end else None
+        reader = TapeReader(args.tape)
+        m5 = reader.frame("m5", start, end)
+        if m15 is None: m15 = reader.frame("m15", start, end)
+    elif args.m5:
+        m5 = load_ohlc_csv(args.m5)
+    else:
+        parser.error("butuh --m5, --tape, atau --synthetic")
+
+    print(f"📊 Backtest {len(m5)} bar M5 ({m5.index[0]} -> {m5.index[-1]})")
+    print(f"⚙️ Params: {default_params()}")
+    t0 = time.perf_counter()
+    trades, summary = run_backtest(m5, m15, spread_usd=args.spread, ob_mode=args.ob_mode)
+    print(f"⏱️ {time.perf_counter() - t0:.2f}s")
+    for k, v in summary.items(): print(f"  {k:17s}: {v}")
+    if args.out:
+        trades.to_csv(args.out, index=False)
+        print(f"💾 {len(trades)} trade -> {args.out}")
+
+if __name__ == "__main__":
+    main()
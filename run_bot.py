@@ -1,167 +1,222 @@
 from dotenv import load_dotenv
 load_dotenv() 
 
+import asyncio
 import time
 import os
 import sys
-import requests
-import html
 import json
-import math
 from datetime import datetime, timezone
 
 # Import Module Internal
-from src.data_loader import get_market_data
+from src.data_loader import get_market_data, get_multi_market_data, get_wsl_ip, apply_tick
+from src.market_feed import MarketFeed
 from src.indicators import calculate_rules
+from src.indicator_engine import IndicatorEngine
 from src.logger import TradeLogger
-from src.state_manager import check_signal_status, save_state_atomic
+from src.position_book import PositionBook
 from src.ai_engine import ask_ai_judge
+from src.async_engine import AsyncEngine
+from src.telegram_outbox import get_outbox
+from src.verdict_cache import VerdictCache
+from src.preflight import Check, run_checks
+from src.speculative import SpeculativeJudge
+from src.metrics import METRICS, start_exporters
+from src.symbols import load_registry
+from src.scanner import SymbolScanner
+from src.signal_db import SignalDB, DB_PATH
+from src.contract_utils import get_broker_timestamp, bar_timestamp, build_ai_metrics
+from src.signal_flow import announce_closed, judge_candidate, apply_verdict
 
 # --- KONSTANTA SAFETY ---
 MAX_CANDLE_AGE_SEC = 480 # Toleransi Data Macet (8 Menit utk M5)
 
+# --- MODE FEED ---
+# poll = REQ tiap 2 detik (default). sub = reaksi per event PUB (tick/bar close), REQ cuma buat snapshot.
+FEED_MODE = os.getenv("FEED_MODE", "poll").lower()
+FEED_HEARTBEAT_MS = 2000 # Gak ada event selama ini -> refresh snapshot via REQ
+FEED_RESYNC_SEC = 30     # Snapshot REQ minimal tiap segini walau tick terus ngalir
+
+# --- MODE ENGINE ---
+# sync = loop klasik. async = task asyncio terpisah (ingest/rule/AI/notif), I/O lambat gak nahan cek TP/SL.
+ENGINE_MODE = os.getenv("ENGINE_MODE", "sync").lower()
+
+# --- CACHE VERDICT AI ---
+VERDICT_CACHE_TTL = int(os.getenv("VERDICT_CACHE_TTL", "3600")) # 0 = matiin cache
+
+# --- SPECULATIVE JUDGE ---
+# 1 = bar forming udah nyentuh OB searah trend -> AI judge duluan, verdict dipakai pas candle gate kalau metrics cocok
+SPECULATIVE_JUDGE = os.getenv("SPECULATIVE_JUDGE") == "1"
+
+# --- SIMBOL ---
+# SYMBOLS / SYMBOLS_FILE isi > 1 simbol -> mode scan multi simbol (GET_MULTI + thread pool), lihat src/symbols.py
+REGISTRY = load_registry()
+
+# --- POSITION BOOK ---
+# In-memory + journal (positions.journal). Dibikin di main() (recovery + migrasi signal_state.json lama)
+BOOK = None
+
+# --- SIGNAL DB ---
+# SQLite (signals.db, env SIGNAL_DB; "" = matiin): contract + verdict + outcome, query lewat query_signals.py
+SIGNAL_DB = None
+
+# --- METRICS ---
+# Waktu kerja 1 iterasi (tanpa sleep/tunggu feed) di atas ini dihitung "late" (= interval poll)
+LOOP_BUDGET_SEC = 2.0
+
 def send_telegram_html(message):
-    token = os.getenv("TELEGRAM_TOKEN")
-    chat_id = os.getenv("TELEGRAM_CHAT_ID")
-    if not token or not chat_id: return
-    try:
-        requests.post(
-            f"https://api.telegram.org/bot{token}/sendMessage",
-            json={"chat_id": chat_id, "text": message, "parse_mode": "HTML"},
-            timeout=5
-        )
-    except: pass
-
-def get_broker_timestamp(meta):
-    """Helper Konsisten untuk Ambil Jam Broker"""
-    tick_msc = int(meta.get("tick_time_msc") or 0)
-    tick_sec = int(meta.get("tick_time") or 0)
-    # Prioritas MSC karena lebih presisi
-    if tick_msc > 0: return tick_msc / 1000.0
-    if tick_sec > 0: return float(tick_sec)
-    return 0.0
+    """Non-blocking: masuk outbox bareng (keep-alive, rate limit, coalescing), kirim di background."""
+    with METRICS.stage("telegram"): get_outbox().send(message, parse_mode="HTML")
 
-def run_diagnostics():
+def resolve_signal_status(high, low, bid, ask, symbol=None):
     """
-    PRE-FLIGHT CHECK V21.1b: CONSISTENT THRESHOLDS & DUAL PING.
+    Cek TP/SL/Expiry posisi aktif simbol (in-memory, tanpa baca disk). Yang selesai: alert + close di journal.
+    Return 'NONE' kalau boleh buka signal baru, 'STILL_OPEN' kalau slot penuh / book locked.
     """
-    print("\n🕵️ RUNNING PRE-FLIGHT DIAGNOSTICS (V21.1b DIAMOND-PLATED)...")
+    symbol = symbol or REGISTRY.primary.name
+    with METRICS.stage("status"): closed = BOOK.resolve(symbol, high, low, bid, ask)
+    announce_closed(closed, send_telegram_html)
+    return BOOK.gate_status(symbol)
+
+def end_iteration(t0, skipped=None):
+    """Catat 1 iterasi main loop ke METRICS (skipped = alasan keluar lebih awal)."""
+    METRICS.iteration(time.perf_counter() - t0, LOOP_BUDGET_SEC, skipped)
 
-    # 1. Cek Data Feed
-    print("[1/7] Checking Market Data Feed...", end=" ")
+def wait_for_feed(feed, data, last_bar):
+    """
+    Mode sub: tunggu event dari PUB. Tiap tick langsung cek TP/SL (pakai bid/ask baru),
+    balik ke main loop kalau ada candle close, heartbeat timeout, atau udah FEED_RESYNC_SEC.
+    """
+    started = time.time()
+    while time.time() - started < FEED_RESYNC_SEC:
+        events = feed.poll(FEED_HEARTBEAT_MS)
+        if not events: return
+        ticks = [ev for topic, ev in events if topic == "tick"]
+        if ticks:
+            apply_tick(data, ticks[-1])
+            tick = data.get("tick", {})
+            bid = float(tick.get("bid", 0) or 0)
+            ask = float(tick.get("ask", 0) or 0)
+            resolve_signal_status(last_bar['High'], last_bar['Low'], bid, ask)
+        if any(topic == "bar" for topic, _ in events): return
+
+DIAG_DEADLINE_SEC = 30 # Budget total pre-flight (restart watchdog gak boleh nunggu lama)
+DIAG_DUMMY_METRICS = {
+    "trend_m15": "NEUTRAL",
+    "warnings": ["DIAGNOSTIC_TEST"],
+    "m15_structure": {
+        "sequence": "L(HL)->H(HH)->L(HL)",
+        "dist_to_pivot": 1.0,
+        "leg_sizes_signed": [2.0, -1.0, 2.5],
+        "last_pivot": "Low@Dummy",
+        "last_pivot_is_obs": False,
+        "last_pivot_type": "Low",
+    }
+}
+
+def diag_data_feed(ctx):
+    if REGISTRY.multi:
+        # Semua simbol 1 request; check lanjutan (time sync, candle, tick) pakai simbol primary
+        batch = get_multi_market_data(REGISTRY.names())
+        data = batch.get(REGISTRY.primary.name)
+        if not data or data['m5'].empty: return False, f"No Data ({REGISTRY.primary.name})", None
+        missing = [s for s in REGISTRY.names() if s not in batch]
+        detail = f"{len(batch)}/{len(REGISTRY)} symbols" + (f", missing {','.join(missing)}" if missing else "")
+        return True, detail, data
     data = get_market_data()
-    if not data or 'm5' not in data or data['m5'].empty:
-        print("❌ FAILED! (No Data)")
-        return False
-    print(f"✅ OK ({len(data['m5'])} candles)")
-
-    # 2. Cek Server Time Sync
-    print("[2/7] Checking Server Time Sync...", end=" ")
-    meta = data.get('meta', {})
-    broker_ts = get_broker_timestamp(meta)
-    
-    if broker_ts <= 0:
-        print("❌ FAILED! (No Broker Timestamp)")
-        return False
-    
+    if not data or 'm5' not in data or data['m5'].empty: return False, "No Data", None
+    return True, f"{len(data['m5'])} candles", data
+
+def diag_time_sync(ctx):
+    broker_ts = get_broker_timestamp(ctx["data"].get('meta', {}))
+    if broker_ts <= 0: return False, "No Broker Timestamp", None
     lag = time.time() - broker_ts
-    print(f"✅ Lag: {lag:.3f}s")
-
-    if lag < -10:
-        print(f"⛔ FATAL: Severe Clock Drift ({lag:.3f}s). VPS ahead of Broker!")
-        return False
-    if lag > 8:
-        print(f"⛔ FATAL: Critical Lag ({lag:.3f}s). Connection too slow.")
-        return False
-
-    # 3. Cek Candle Freshness (vs Broker Time)
-    print("[3/7] Checking Candle Validty...", end=" ")
-    last_candle_ts = data['m5'].iloc[-1].name
-    
-    if getattr(last_candle_ts, "tzinfo", None) is None: 
-        last_candle_ts = last_candle_ts.tz_localize("UTC")
-    else:
-        last_candle_ts = last_candle_ts.tz_convert("UTC")
-    
-    candle_gap = broker_ts - last_candle_ts.timestamp()
-    
+    if lag < -10: return False, f"FATAL: Severe Clock Drift ({lag:.3f}s). VPS ahead of Broker!", None
+    if lag > 8: return False, f"FATAL: Critical Lag ({lag:.3f}s). Connection too slow.", None
+    return True, f"Lag: {lag:.3f}s", broker_ts
+
+def diag_candle(ctx):
+    candle_gap = ctx["time_sync"] - bar_timestamp(ctx["data"]['m5'].iloc[-1])
     # FIX: Threshold Konsisten (480s)
-    if candle_gap > MAX_CANDLE_AGE_SEC: 
-        print(f"❌ FAILED! Candle vs Broker Gap too big ({candle_gap:.0f}s). Feed Stuck?")
-        return False
-    elif candle_gap < -MAX_CANDLE_AGE_SEC:
-        print(f"❌ FAILED! Candle from future? Gap: {candle_gap:.0f}s.")
-        return False
-    print(f"✅ OK (Gap: {candle_gap:.0f}s)")
-
-    # 4. Tick Integrity
-    print("[4/7] Checking Tick Integrity...", end=" ")
-    tick = data.get("tick", {})
+    if candle_gap > MAX_CANDLE_AGE_SEC: return False, f"Candle vs Broker Gap too big ({candle_gap:.0f}s). Feed Stuck?", None
+    if candle_gap < -MAX_CANDLE_AGE_SEC: return False, f"Candle from future? Gap: {candle_gap:.0f}s.", None
+    return True, f"Gap: {candle_gap:.0f}s", None
+
+def diag_tick(ctx):
+    tick = ctx["data"].get("tick", {})
     bid = float(tick.get("bid", 0) or 0)
     ask = float(tick.get("ask", 0) or 0)
-    if bid <= 0 or ask <= 0:
-        print(f"❌ FAILED! (Invalid Price)")
-        return False
-    spread = abs(ask - bid)
-    print(f"✅ OK (Spread: {spread:.3f})")
-
-    # 5. Price Unit
-    print("[5/7] Checking Price Unit...", end=" ")
+    if bid <= 0 or ask <= 0: return False, "Invalid Price", None
+    return True, f"Spread: {abs(ask - bid):.3f}", None
+
+def diag_price_unit(ctx):
+    data = ctx["data"]
     last_close = float(data['m5']['Close'].iloc[-1])
-    point = float(tick.get("point", 0.01) or 0.01)
-    if point <= 0:
-        print(f"❌ FAILED! (Invalid Point: {point})")
-        return False
-    if last_close < 100 or last_close > 5000:
-        print(f"⚠️ WARNING: Price {last_close} seems weird.")
-    else:
-        print(f"✅ OK")
-
-    # 6. API Key Check
-    print("[6/7] Checking API Key...", end=" ")
-    key = os.getenv("GEMINI_API_KEY")
-    if not key:
-        print("❌ FAILED! (No API Key)")
-        return False
-    print("✅ OK")
-
-    # 7. AI DUAL PING (BUY & SELL Check)
-    print("[7/7] Pinging AI Brain (Dual Check)...", end=" ")
-    dummy_metrics = {
-        "trend_m15": "NEUTRAL", 
-        "price": last_close, 
-        "warnings": ["DIAGNOSTIC_TEST"],
-        "m15_structure": {
-            "sequence": "L(HL)->H(HH)->L(HL)",
-            "dist_to_pivot": 1.0,
-            "leg_sizes_signed": [2.0, -1.0, 2.5],
-            "last_pivot": "Low@Dummy",
-            "last_pivot_is_obs": False,
-            "last_pivot_type": "Low",
-        }
-    }
-    
-    # FIX: Loop ping untuk BUY dan SELL biar logic AI teruji semua
-    for sig_type in ["BUY", "SELL"]:
-        try:
-            response = ask_ai_judge(sig_type, "SYSTEM_DIAGNOSTIC", dummy_metrics)
-            decision = str(response.get("decision", "")).upper()
-            if decision not in ["APPROVE", "REJECT"]:
-                print(f"❌ FAILED on {sig_type}! (Invalid: {decision})")
-                return False
-        except Exception as e:
-            print(f"❌ FAILED on {sig_type}! (Error: {e})")
-            return False
-            
-    print("✅ ALIVE & VALID")
+    point = float(data.get("tick", {}).get("point", 0.01) or 0.01)
+    if point <= 0: return False, f"Invalid Point: {point}", None
+    if not REGISTRY.primary.price_ok(last_close): return True, f"⚠️ WARNING: Price {last_close} seems weird.", None
+    return True, "", None
+
+def diag_position_book(ctx):
+    if BOOK.corrupt: return True, "⚠️ LOCKED (corrupt journal/state, no new signals)", None
+    return True, f"{len(BOOK.active())} open, journal {BOOK.journal_records} records", None
+
+def diag_api_key(ctx):
+    if not os.getenv("GEMINI_API_KEY"): return False, "No API Key", None
+    return True, "", None
+
+def diag_ai_ping(sig_type):
+    """Ping AI per arah (BUY & SELL) biar logic AI teruji semua. Bypass verdict cache."""
+    def check(ctx):
+        response = ask_ai_judge(sig_type, "SYSTEM_DIAGNOSTIC", DIAG_DUMMY_METRICS)
+        decision = str(response.get("decision", "")).upper()
+        if decision not in ["APPROVE", "REJECT"]: return False, f"Invalid: {decision}", None
+        return True, decision, None
+    return check
+
+def run_diagnostics():
+    """
+    PRE-FLIGHT CHECK V21.1b: CONSISTENT THRESHOLDS & DUAL PING.
+    Check independen jalan paralel (dependency graph) dengan deadline total.
+    Return (ok, data): data market hasil check dipakai ulang buat iterasi pertama engine.
+    """
+    print("\n🕵️ RUNNING PRE-FLIGHT DIAGNOSTICS (V21.1b DIAMOND-PLATED)...")
+    checks = [
+        Check("data", "Market Data Feed", diag_data_feed),
+        Check("time_sync", "Server Time Sync", diag_time_sync, deps=["data"]),
+        Check("candle", "Candle Validity", diag_candle, deps=["data", "time_sync"]),
+        Check("tick", "Tick Integrity", diag_tick, deps=["data"]),
+        Check("price_unit", "Price Unit", diag_price_unit, deps=["data"]),
+        Check("book", "Position Book", diag_position_book),
+        Check("api_key", "API Key", diag_api_key),
+        Check("ai_buy", "AI Brain (BUY)", diag_ai_ping("BUY"), deps=["api_key"]),
+        Check("ai_sell", "AI Brain (SELL)", diag_ai_ping("SELL"), deps=["api_key"]),
+    ]
+    t0 = time.perf_counter()
+    ok, results, ctx = run_checks(checks, deadline_sec=DIAG_DEADLINE_SEC)
+
+    icons = {"OK": "✅", "FAILED": "❌", "SKIPPED": "⏭️", "TIMEOUT": "⏱️"}
+    for i, c in enumerate(checks, 1):
+        r = results[c.name]
+        detail = f" ({r['detail']})" if r["detail"] else ""
+        print(f"[{i}/{len(checks)}] {c.label}: {icons[r['status']]} {r['status']}{detail} [{r['elapsed'] * 1000:.0f} ms]")
+    print(f"⏱️ Diagnostics total: {(time.perf_counter() - t0) * 1000:.0f} ms")
+
+    if not ok: return False, None
     print("\n🚀 SYSTEMS GO. STARTING ENGINE...\n")
-    time.sleep(1)
-    return True
+    return True, ctx.get("data")
 
 def main():
     print("="*40 + "\n💀 GOLD KILLER PRO: V21.1b (DIAMOND-PLATED) 💀\n" + "="*40)
     
-    if not run_diagnostics():
+    global BOOK, SIGNAL_DB
+    if DB_PATH: SIGNAL_DB = SignalDB()
+    BOOK = PositionBook(db=SIGNAL_DB)
+    for spec in REGISTRY:
+        if BOOK.import_legacy(spec.name, spec.state_path): print(f"📦 Migrated {spec.name} signal from {spec.state_path}")
+
+    diag_ok, warm_data = run_diagnostics()
+    if not diag_ok:
         msg = "⛔ <b>STARTUP ABORTED</b>\nPre-flight diagnostics failed. Check terminal."
         print(msg)
         send_telegram_html(msg)
@@ -170,28 +225,66 @@ def main():
     send_telegram_html("🚀 <b>SYSTEM STARTED (V21.1b)</b>\nAll Systems Green. Trading Active.")
 
     logger = TradeLogger()
+    # State EMA/ATR streaming (O(1) per candle). INCREMENTAL_STRUCTURE=1 -> pivot M15 juga incremental
+    engine = IndicatorEngine(track_structure=os.getenv("INCREMENTAL_STRUCTURE") == "1")
+    verdict_cache = VerdictCache(ttl_sec=VERDICT_CACHE_TTL) if VERDICT_CACHE_TTL > 0 else None
+    spec = None
+    if SPECULATIVE_JUDGE and not REGISTRY.multi:
+        spec = SpeculativeJudge(engine=IndicatorEngine(track_structure=engine.track_structure), cache=verdict_cache,
+                                params=REGISTRY.primary.rule_overrides())
+
+    METRICS.register("outbox", lambda: get_outbox().stats)
+    METRICS.register("trade_log", lambda: logger.stats)
+    if SIGNAL_DB: METRICS.register("signal_db", lambda: SIGNAL_DB.stats)
+    METRICS.register("book", lambda: {**BOOK.stats, "open": len(BOOK.active()), "locked": int(BOOK.corrupt)})
+    if verdict_cache: METRICS.register("verdict_cache", verdict_cache.stats)
+    if spec: METRICS.register("speculative", lambda: spec.stats)
+    exporters = start_exporters()
+    if exporters: print(f"📈 Metrics: {', '.join(exporters)}")
+
+    if REGISTRY.multi:
+        # Mode scan multi simbol punya loop sendiri (GET_MULTI poll); opsi mode single di bawah gak kepakai
+        ignored = [name for name, on in (("FEED_MODE=sub", FEED_MODE == "sub"), ("ENGINE_MODE=async", ENGINE_MODE == "async"),
+                                         ("SPECULATIVE_JUDGE=1", SPECULATIVE_JUDGE), ("TAPE_DIR", bool(os.getenv("TAPE_DIR"))))
+                   if on]
+        if ignored: print(f"⚠️ Multi-symbol mode ignores: {', '.join(ignored)} (single-symbol only)")
+        scanner = SymbolScanner(REGISTRY, send_telegram_html, BOOK, cache=verdict_cache, max_candle_age_sec=MAX_CANDLE_AGE_SEC,
+                                track_structure=engine.track_structure, db=SIGNAL_DB)
+        METRICS.register("scanner", lambda: scanner.stats)
+        try: scanner.run()
+        except KeyboardInterrupt: sys.exit()
+        return
+
+    if ENGINE_MODE == "async":
+        print("⚡ Engine mode: ASYNC")
+        try: asyncio.run(AsyncEngine(send_telegram_html, engine=engine, logger=logger, cache=verdict_cache, spec=spec,
+                                     initial_data=warm_data, max_candle_age_sec=MAX_CANDLE_AGE_SEC,
+                                     params=REGISTRY.primary.rule_overrides(), book=BOOK,
+                                     symbol=REGISTRY.primary.name, db=SIGNAL_DB).run())
+        except KeyboardInterrupt: sys.exit()
+        return
     
+    rule_overrides = REGISTRY.primary.rule_overrides()
     last_candle_ts = None
     last_logged_ts = None
     last_ai_fingerprint = None
     last_lag_alert_ts = 0 
     last_freeze_alert_ts = 0
+    feed = MarketFeed(get_wsl_ip()) if FEED_MODE == "sub" else None
 
     while True:
         try:
-            data = get_market_data()
+            # Iterasi pertama pakai data hasil diagnostics (udah fresh, gak usah fetch ulang)
+            t_iter = time.perf_counter()
+            data, warm_data = (warm_data or get_market_data()), None
             if not data:
+                end_iteration(t_iter, "no_data")
                 time.sleep(5); continue
 
             # --- PREP DATA (RUNTIME CHECK) ---
             df_5m = data['m5']
             last_bar = df_5m.iloc[-1]
-            ts = last_bar.name
-            
-            if getattr(ts, "tzinfo", None) is None: ts = ts.tz_localize("UTC")
-            else: ts = ts.tz_convert("UTC")
-            
-            current_ts = int(ts.timestamp())
+            current_ts = bar_timestamp(last_bar)
 
             # Consistent Broker Time
             meta = data.get('meta', {})
@@ -203,6 +296,7 @@ def main():
                 if now - last_lag_alert_ts > 300:
                     send_telegram_html("⚠️ <b>NO BROKER TIME</b>\nmeta.tick_time missing. Bot paused logic.")
                     last_lag_alert_ts = now
+                end_iteration(t_iter, "no_broker_time")
                 time.sleep(5)
                 continue
 
@@ -216,6 +310,7 @@ def main():
                     print(msg)
                     send_telegram_html(msg)
                     last_freeze_alert_ts = now
+                end_iteration(t_iter, "data_freeze")
                 time.sleep(10)
                 continue
             elif candle_age < -MAX_CANDLE_AGE_SEC:
@@ -225,38 +320,21 @@ def main():
                     print(msg)
                     send_telegram_html(msg)
                     last_freeze_alert_ts = now
+                end_iteration(t_iter, "future_candle")
                 time.sleep(10)
                 continue
 
             tick = data.get("tick", {})
             bid = float(tick.get("bid", 0) or 0)
             ask = float(tick.get("ask", 0) or 0)
-            
-            point = float(tick.get("point", 0.01) or 0.01)
-            if point <= 0: point = 0.01 
-            
-            raw_digits = tick.get("digits")
-            if raw_digits is not None:
-                digits = int(raw_digits)
-            else:
-                try: digits = max(0, int(round(-math.log10(point))))
-                except: digits = 2
 
             # --- 1. STATUS CHECK ---
-            status = check_signal_status(last_bar['High'], last_bar['Low'], bid, ask)
-            
-            if status in ["TP_HIT", "SL_HIT", "EXPIRED"]:
-                finished = status
-                icon = "💰" if finished == "TP_HIT" else "💀"
-                send_telegram_html(f"{icon} <b>SIGNAL FINISHED:</b> {finished}")
-                save_state_atomic(active=False) 
-                status = "NONE" 
-                print(f"✅ State Cleared: {finished}")
+            status = resolve_signal_status(last_bar['High'], last_bar['Low'], bid, ask)
 
             # --- 2. CANDLE GATE ---
             if current_ts != last_candle_ts:
-                contract = calculate_rules(data)
-                
+                with METRICS.stage("rules"): contract = calculate_rules(data, engine=engine, params=rule_overrides)
+
                 # Critical Lag Guard
                 is_critical = "Critical Lag" in contract["reason"] or "Severe Clock Drift" in contract["reason"]
                 if is_critical:
@@ -270,80 +348,41 @@ def main():
                 print(f"[{datetime.now().strftime('%H:%M:%S')}] P:{last_bar['Close']} | {obs_status} | {contract['reason']}")
 
                 if current_ts != last_logged_ts:
-                    logger.log_contract(contract)
+                    with METRICS.stage("log"): logger.log_contract(contract)
+                    if SIGNAL_DB: SIGNAL_DB.record_contract(REGISTRY.primary.name, contract)
                     last_logged_ts = current_ts
 
                 signal = contract["signal"]
+                if spec and signal not in ["BUY", "SELL"]: spec.expire(current_ts)
                 
                 # --- 3. AI GATE ---
-                if signal in ["BUY", "SELL"] and status == "NONE":
-                    setup = contract.get("setup", {})
-                    if not setup or "entry" not in setup:
-                        print("⚠️ Setup incomplete, skipping...")
-                    else:
-                        try:
-                            e_r = round(float(setup.get('entry', 0) or 0), digits)
-                            sl_r = round(float(setup.get('sl', 0) or 0), digits)
-                            tp_r = round(float(setup.get('tp', 0) or 0), digits)
-                        except:
-                            e_r, sl_r, tp_r = "ERR", "ERR", "ERR"
-
-                        current_fingerprint = f"{current_ts}_{signal}_{e_r}_{sl_r}_{tp_r}"
-                        
-                        if current_fingerprint != last_ai_fingerprint:
-                            last_ai_fingerprint = current_fingerprint 
-                            print(f"🤖 AI Judging {signal}...")
-                            
-                            meta = contract.get("meta", {})
-                            metrics = {
-                                **meta.get("indicators", {}),
-                                "warnings": meta.get("warnings", []),
-                                "tick_lag_sec": meta.get("tick_lag_sec", 0),
-                                "tick_lag_sec_raw": meta.get("tick_lag_sec_raw", 0),
-                                "spread": meta.get("spread", 0),
-                                "risk_audit": meta.get("risk_audit", {}),
-                                "price": meta.get("candle", {}).get("close", 0)
-                            }
-                            
-                            judge = ask_ai_judge(signal, contract["reason"], metrics)
-                            decision = str(judge.get("decision", "REJECT")).strip().upper()
-                            
-                            if decision == "APPROVE":
-                                icon = "🟢" if signal == "BUY" else "🔴"
-                                ai_reason = html.escape(str(judge.get("reason", "No Reason")))
-                                e_entry = html.escape(str(setup['entry']))
-                                e_sl = html.escape(str(setup['sl']))
-                                e_tp = html.escape(str(setup['tp']))
-                                
-                                text = (f"{icon} <b>SIGNAL {signal} APPROVED</b>\n\n"
-                                        f"Entry: <code>{e_entry}</code>\n"
-                                        f"SL: <code>{e_sl}</code>\n"
-                                        f"TP: <code>{e_tp}</code>\n\n"
-                                        f"⚖️ <b>AI Debate:</b> <i>{ai_reason}</i>")
-                                
-                                send_telegram_html(text)
-                                
-                                if save_state_atomic(
-                                    active=True,
-                                    sig_type=signal,
-                                    sl=setup['sl'],
-                                    tp=setup['tp'],
-                                    entry=setup['entry'],
-                                    reason=judge.get("reason", ""),
-                                    candle_ts=current_ts
-                                ):
-                                    status = "STILL_OPEN"
-                                    print(f"✅ {signal} SENT & LOCKED")
-                                else:
-                                    print("🚨 WRITE FAIL!")
-                            else:
-                                print(f"❌ AI REJECTED: {judge.get('reason')}")
+                cand = judge_candidate(contract, current_ts, tick, last_ai_fingerprint) if status == "NONE" else None
+                if cand:
+                    signal, setup, last_ai_fingerprint = cand
+                    print(f"🤖 AI Judging {signal}...")
+                    metrics = build_ai_metrics(contract)
+
+                    with METRICS.stage("ai"):
+                        if spec: judge = spec.resolve(signal, contract["reason"], metrics)
+                        else: judge = ask_ai_judge(signal, contract["reason"], metrics, cache=verdict_cache)
+                    if judge.get("cached"): print(f"🧠 Verdict cache hit {verdict_cache.stats()}")
+                    if judge.get("speculative"): print(f"🔮 Speculative verdict reused {spec.stats}")
+                    if apply_verdict(BOOK, REGISTRY.primary.name, signal, setup, judge, current_ts,
+                                     send_telegram_html, SIGNAL_DB):
+                        status = BOOK.gate_status(REGISTRY.primary.name)
                 
                 last_candle_ts = current_ts
 
-            time.sleep(2)
+            # --- 4. SPECULATIVE (bar masih jalan) ---
+            elif spec and status == "NONE":
+                with METRICS.stage("speculative"): spec.observe(data, current_ts)
+
+            end_iteration(t_iter)
+            if feed is None: time.sleep(2)
+            else: wait_for_feed(feed, data, last_bar)
         except KeyboardInterrupt: sys.exit()
         except Exception as e: 
+            METRICS.inc("errors")
             err_msg = f"❌ <b>BOT CRASHED</b>\nError: {str(e)}"
             print(err_msg)
             send_telegram_html(err_msg)
@@ -0,0 +1,54 @@
+import argparse
+import json
+import time
+
+from src.backtest import prepare_arrays, load_ohlc_csv, resample_m15, DEFAULT_SPREAD_USD
+from src.sweep import run_sweep, expand_grid
+
+DEFAULT_GRID = {
+    "TARGET_SL_MIN_USD": [2.0, 3.0],
+    "TARGET_SL_MAX_USD": [4.0, 5.0, 6.0],
+    "RR_RATIO": [1.0, 1.2, 1.5, 2.0],
+    "MAX_TP_USD": [6.0, 8.0],
+    "SESSION_START_UTC": [7, 8],
+    "SESSION_END_UTC": [17, 20],
+}
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep parameter strategi di history (process pool + shared memory)")
+    parser.add_argument("--m5", help="CSV M5 (time, open, high, low, close[, spread])")
+    parser.add_argument("--m15", help="CSV M15 (default: resample dari M5)")
+    parser.add_argument("--synthetic", type=int, default=0, help="pakai N bar M5 random walk (tanpa CSV)")
+    parser.add_argument("--spread", type=float, default=DEFAULT_SPREAD_USD)
+    parser.add_argument("--grid", help='JSON grid, mis. \'{"RR_RATIO": [1.0, 1.5]}\' atau path file .json')
+    parser.add_argument("--workers", type=int, default=None, help="default: semua core")
+    parser.add_argument("--rank-by", default="net_usd")
+    parser.add_argument("--out", default="sweep_results.csv")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        from bench.common import synthetic_ohlc
+        m5 = synthetic_ohlc(args.synthetic)
+    elif args.m5:
+        m5 = load_ohlc_csv(args.m5)
+    else:
+        parser.error("butuh --m5 atau --synthetic")
+    m15 = load_ohlc_csv(args.m15) if args.m15 else resample_m15(m5)
+
+    grid = DEFAULT_GRID
+    if args.grid:
+        if args.grid.endswith(".json"):
+            with open(args.grid) as f: grid = json.load(f)
+        else: grid = json.loads(args.grid)
+
+    arr = prepare_arrays(m5, m15, args.spread)
+    print(f"🔬 Sweep {len(expand_grid(grid))} kombinasi x {len(m5)} bar M5")
+    t0 = time.perf_counter()
+    results = run_sweep(arr, grid, workers=args.workers, rank_by=args.rank_by)
+    print(f"⏱️ {time.perf_counter() - t0:.2f}s")
+    print(results.head(10).to_string(index=False))
+    results.to_csv(args.out, index=False)
+    print(f"💾 {len(results)} baris -> {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,8 @@ import json
 import os
 import re
 
+from src.verdict_cache import feature_key
+
 MODEL = None
 
 def init_ai():
@@ -12,10 +14,22 @@ def init_ai():
         genai.configure(api_key=api_key)
         MODEL = genai.GenerativeModel('gemini-1.5-flash')
 
-def ask_ai_judge(signal_type, bot_reason, metrics):
+def ask_ai_judge(signal_type, bot_reason, metrics, cache=None):
+    # Setup identik (fitur terkuantisasi) -> verdict dari cache, gak perlu round trip LLM
+    if cache is not None:
+        key = feature_key(signal_type, metrics)
+        cached = cache.get(key)
+        if cached is not None:
+            cached["cached"] = True
+            return cached
+        verdict = ask_ai_judge(signal_type, bot_reason, metrics)
+        cache.put(key, verdict)
+        return verdict
+
     if MODEL is None: init_ai()
     if MODEL is None: return {"decision": "REJECT", "reason": "AI Config Error"}
 
+    symbol = metrics.get('symbol', 'XAUUSD')
     trend = metrics.get('trend_m15', 'NEUTRAL')
     m15_struct = metrics.get('m15_structure') 
     if not m15_struct:
@@ -35,7 +49,7 @@ def ask_ai_judge(signal_type, bot_reason, metrics):
 
     # PROMPT V17: Liquidity Sweep Logic
     prompt = f"""
-    Role: Senior XAUUSD Scalper (SMC & ZigZag Wave Analyst).
+    Role: Senior {symbol} Scalper (SMC & ZigZag Wave Analyst).
     
     Signal: {signal_type}
     Reason: {bot_reason}
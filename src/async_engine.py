@@ -0,0 +1,185 @@
+"""
+Engine asyncio: ingest market, evaluasi rule, AI judge, dan notifikasi jalan sebagai task
+terpisah yang disambung queue bounded. I/O lambat (Gemini, Telegram, fsync journal) jalan di
+thread lewat asyncio.to_thread, jadi gak pernah nahan jalur monitoring harga (cek TP/SL tiap
+poll, in-memory di PositionBook). Trade log di-buffer TradeLogger (ditulis thread-nya sendiri).
+"""
+import asyncio
+import time
+from datetime import datetime
+
+from src.data_loader import get_market_data
+from src.indicators import calculate_rules
+from src.ai_engine import ask_ai_judge
+from src.metrics import METRICS
+from src.position_book import PositionBook
+from src.contract_utils import get_broker_timestamp, bar_timestamp, build_ai_metrics
+from src.signal_flow import announce_closed, judge_candidate, apply_verdict
+
+def put_latest(queue, item):
+    """Queue bounded: kalau penuh, buang item paling lama (data basi gak ada gunanya)."""
+    while True:
+        try:
+            queue.put_nowait(item)
+            return
+        except asyncio.QueueFull:
+            try: queue.get_nowait()
+            except asyncio.QueueEmpty: pass
+
+class AsyncEngine:
+    def __init__(self, notify, engine=None, logger=None, cache=None, spec=None, initial_data=None, poll_sec=2.0,
+                 max_candle_age_sec=480, params=None, book=None, symbol="XAUUSD", db=None):
+        self.notify_fn = notify
+        self.engine = engine
+        self.logger = logger
+        self.cache = cache
+        self.spec = spec # SpeculativeJudge (opsional)
+        self.initial_data = initial_data # Snapshot dari diagnostics, dipakai di ingest pertama
+        self.poll_sec = poll_sec
+        self.max_candle_age_sec = max_candle_age_sec
+        self.params = params # Override konstanta strategi simbol (rule_params)
+
+        self.book = book or PositionBook() # Posisi in-memory = sumber kebenaran, journal = durability
+        self.symbol = symbol
+        self.db = db # SignalDB (opsional): contract + verdict
+
+        self.bar_q = asyncio.Queue(maxsize=1)     # snapshot candle terbaru buat rule eval
+        self.judge_q = asyncio.Queue(maxsize=4)   # setup yang nunggu AI
+        self.notify_q = asyncio.Queue(maxsize=100)
+        self.dropped = {"notify": 0, "judge": 0}
+
+        self.last_candle_ts = None
+        self.last_ai_fingerprint = None
+        self.last_lag_alert_ts = 0
+        self.last_freeze_alert_ts = 0
+        self.loop = None # Di-set pas run(), buat notify dari thread
+
+    # --- helper antrian ---
+    def notify(self, msg):
+        try: self.notify_q.put_nowait(msg)
+        except asyncio.QueueFull: self.dropped["notify"] += 1
+
+    def notify_threadsafe(self, msg):
+        self.loop.call_soon_threadsafe(self.notify, msg)
+
+    # --- 1. INGEST + PRICE MONITOR ---
+    async def ingest(self):
+        while True:
+            t_iter = time.perf_counter()
+            data, self.initial_data = self.initial_data, None
+            if data is None: data = await asyncio.to_thread(get_market_data)
+            if not data:
+                self.end_iteration(t_iter, "no_data")
+                await asyncio.sleep(5); continue
+
+            last_bar = data['m5'].iloc[-1]
+            current_ts = bar_timestamp(last_bar)
+            broker_ts = get_broker_timestamp(data.get('meta', {}))
+            now = time.time()
+
+            if broker_ts <= 0:
+                if now - self.last_lag_alert_ts > 300:
+                    self.notify("⚠️ <b>NO BROKER TIME</b>\nmeta.tick_time missing. Bot paused logic.")
+                    self.last_lag_alert_ts = now
+                self.end_iteration(t_iter, "no_broker_time")
+                await asyncio.sleep(5); continue
+
+            candle_age = broker_ts - current_ts
+            if abs(candle_age) > self.max_candle_age_sec:
+                if now - self.last_freeze_alert_ts > 600:
+                    if candle_age > 0: msg = f"⚠️ <b>DATA FREEZE</b>\nCandle stuck for {candle_age:.0f}s. Check API."
+                    else: msg = f"⚠️ <b>TIMEZONE MISMATCH</b>\nCandle is from future. Gap: {candle_age:.0f}s"
+                    print(msg)
+                    self.notify(msg)
+                    self.last_freeze_alert_ts = now
+                self.end_iteration(t_iter, "data_freeze" if candle_age > 0 else "future_candle")
+                await asyncio.sleep(10); continue
+
+            # TP/SL check langsung di jalur ingest, murni in-memory
+            tick = data.get("tick", {})
+            bid = float(tick.get("bid", 0) or 0)
+            ask = float(tick.get("ask", 0) or 0)
+            closed = []
+            for pos, status in self.book.evaluate(self.symbol, last_bar['High'], last_bar['Low'], bid, ask):
+                if await asyncio.to_thread(self.book.close, pos, status): closed.append((pos, status)) # Journal append di thread
+            announce_closed(closed, self.notify)
+
+            if current_ts != self.last_candle_ts:
+                # Frame dari CandleStore udah snapshot immutable -> aman dioper ke thread lain tanpa copy
+                put_latest(self.bar_q, (dict(data), last_bar, current_ts))
+                self.last_candle_ts = current_ts
+            elif self.spec and self.book.can_open(self.symbol):
+                await asyncio.to_thread(METRICS.timed, "speculative", self.spec.observe, data, current_ts)
+
+            self.end_iteration(t_iter)
+            await asyncio.sleep(self.poll_sec)
+
+    def end_iteration(self, t0, skipped=None):
+        # Budget = poll_sec: kerja ingest lebih lama dari itu berarti cek TP/SL telat
+        METRICS.iteration(time.perf_counter() - t0, self.poll_sec, skipped)
+
+    # --- 2. RULE EVALUATION ---
+    async def evaluate(self):
+        while True:
+            data, last_bar, current_ts = await self.bar_q.get()
+            contract = await asyncio.to_thread(METRICS.timed, "rules", calculate_rules, data, self.engine, self.params)
+
+            if "Critical Lag" in contract["reason"] or "Severe Clock Drift" in contract["reason"]:
+                now = time.time()
+                if now - self.last_lag_alert_ts > 300:
+                    self.notify(f"⚠️ <b>CONNECTION UNSTABLE</b>\nBot paused.\nReason: {contract['reason']}")
+                    self.last_lag_alert_ts = now
+
+            obs_status = "Wait" if contract["signal"] == "WAIT" else f"SIGNAL {contract['signal']}"
+            print(f"[{datetime.now().strftime('%H:%M:%S')}] P:{last_bar['Close']} | {obs_status} | {contract['reason']}")
+            if self.logger:
+                with METRICS.stage("log"): self.logger.log_contract(contract) # Cuma masuk batch, non-blocking
+            if self.db: self.db.record_contract(self.symbol, contract)
+
+            signal = contract["signal"]
+            if self.spec and signal not in ["BUY", "SELL"]: self.spec.expire(current_ts)
+            if not self.book.can_open(self.symbol): continue
+            cand = judge_candidate(contract, current_ts, data.get("tick", {}), self.last_ai_fingerprint)
+            if cand is None: continue
+            signal, setup, self.last_ai_fingerprint = cand
+            try: self.judge_q.put_nowait((signal, contract, setup, current_ts))
+            except asyncio.QueueFull: self.dropped["judge"] += 1
+
+    # --- 3. AI JUDGE ---
+    async def judge(self):
+        while True:
+            signal, contract, setup, current_ts = await self.judge_q.get()
+            print(f"🤖 AI Judging {signal}...")
+            metrics = build_ai_metrics(contract)
+            if self.spec: judge = await asyncio.to_thread(METRICS.timed, "ai", self.spec.resolve, signal, contract["reason"], metrics)
+            else: judge = await asyncio.to_thread(METRICS.timed, "ai", ask_ai_judge, signal, contract["reason"], metrics, self.cache)
+            if judge.get("cached"): print(f"🧠 Verdict cache hit {self.cache.stats()}")
+            if judge.get("speculative"): print(f"🔮 Speculative verdict reused {self.spec.stats}")
+            # Journal fsync di thread; notif balik ke loop lewat notify_threadsafe
+            await asyncio.to_thread(apply_verdict, self.book, self.symbol, signal, setup, judge, current_ts,
+                                    self.notify_threadsafe, self.db)
+
+    # --- 4. NOTIFICATION ---
+    async def notifier(self):
+        while True:
+            msg = await self.notify_q.get()
+            await asyncio.to_thread(self.notify_fn, msg)
+
+    async def supervise(self, name, task_fn):
+        """Task crash gak boleh matiin engine: log, kabarin, restart 10 detik kemudian."""
+        while True:
+            try:
+                await task_fn()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                err_msg = f"❌ <b>TASK CRASHED</b> ({name})\nError: {str(e)}"
+                print(err_msg)
+                self.notify(err_msg)
+                await asyncio.sleep(10)
+
+    async def run(self):
+        self.loop = asyncio.get_running_loop()
+        tasks = {"ingest": self.ingest, "evaluate": self.evaluate, "judge": self.judge,
+                 "notify": self.notifier}
+        await asyncio.gather(*(self.supervise(name, fn) for name, fn in tasks.items()))
@@ -0,0 +1,246 @@
+"""
+Backtest vectorized rule calculate_rules di semua bar M5 history (NumPy, tanpa loop per bar).
+
+Mirror rule live:
+- Session gate (jam UTC bar), spread gate, warmup M15 (220 bar)
+- Trend M15 = EMA50 vs EMA200 di bar M15 yang lagi jalan (close = close M5 saat itu)
+- OB retest (touched/held/rejected/near_ob) + sizing SL/TP (TARGET_SL_*, RR_RATIO, MAX_TP_USD)
+- Resolusi TP/SL sama kayak state_manager.evaluate_state: TP dicek duluan, expiry SIGNAL_TTL_SEC
+- 1 posisi aktif sekaligus (signal baru diabaikan selama masih ada yang open)
+
+Perbedaan yang disengaja:
+- Bar dievaluasi pas close (bar penuh), entry BUY = close + spread, SELL = close (bar = harga bid)
+- ATR buat deteksi OB pakai ATR global (RMA konvergen), bukan ATR lokal 100 bar -> bisa beda
+  tipis di awal window; ob_mode="exact" pakai find_quality_ob_arrays per bar (lambat, buat parity)
+- Weak M15 Structure gate & AI judge gak dimodelkan (semua signal rule dianggap approve)
+"""
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from src import indicators
+from src.indicators import _rma_atr, find_quality_ob_arrays
+from src.state_manager import SIGNAL_TTL_SEC
+
+M15_WARMUP = 220
+DEFAULT_SPREAD_USD = 0.25
+
+def default_params():
+    """Parameter strategi default = konstanta live di src/indicators.py."""
+    return indicators.rule_params()
+
+def _ema(close, length):
+    """EMA kayak ta.ema (seed SMA, lalu ewm adjust=False)."""
+    out = np.full(len(close), np.nan)
+    if len(close) < length: return out
+    seeded = close.astype(np.float64).copy()
+    seeded[:length - 1] = np.nan
+    seeded[length - 1] = close[:length].mean()
+    out[length - 1:] = pd.Series(seeded[length - 1:]).ewm(span=length, adjust=False).mean().to_numpy()
+    return out
+
+def _last_true_index(flags):
+    """Untuk tiap k: index terakhir <= k yang flag-nya True (-1 kalau belum ada)."""
+    idx = np.where(flags, np.arange(len(flags)), -1)
+    return np.maximum.accumulate(idx)
+
+def _epoch_seconds(index):
+    """DatetimeIndex (UTC, unit apa aja: ns/us) -> epoch detik int64."""
+    return index.values.astype("datetime64[s]").astype(np.int64)
+
+def prepare_arrays(m5, m15, spread_usd=DEFAULT_SPREAD_USD, point=0.01):
+    """
+    DataFrame M5/M15 (index UTC kayak process_df) -> dict array NumPy yang gak tergantung parameter.
+    Dipisah biar sweep parameter cukup hitung sekali (dan bisa di-share antar proses).
+    """
+    times = _epoch_seconds(m5.index)
+    o, h, l, c = (m5[k].to_numpy(dtype=np.float64) for k in ("Open", "High", "Low", "Close"))
+    if "spread" in m5.columns: spread = m5["spread"].to_numpy(dtype=np.float64) * point # MT5: spread dalam point
+    else: spread = np.full(len(m5), float(spread_usd))
+
+    # Trend M15: bar M15 yang memuat bar M5 ini masih jalan -> EMA = peek(EMA bar M15 sebelumnya, close M5)
+    m15_close = m15["Close"].to_numpy(dtype=np.float64)
+    m15_times = _epoch_seconds(m15.index)
+    pos = np.searchsorted(m15_times, times, side="right") - 1 # bar M15 yang lagi jalan
+    trend_bull = np.zeros(len(m5), dtype=bool)
+    m15_ok = pos + 1 >= M15_WARMUP
+    ema_vals = {}
+    for length in (50, 200):
+        ema = _ema(m15_close, length)
+        alpha = 2.0 / (length + 1)
+        prev = np.where(pos >= 1, ema[np.maximum(pos - 1, 0)], np.nan)
+        ema_vals[length] = (1.0 - alpha) * prev + alpha * c
+    m15_ok &= ~np.isnan(ema_vals[50]) & ~np.isnan(ema_vals[200])
+    trend_bull[m15_ok] = ema_vals[50][m15_ok] > ema_vals[200][m15_ok]
+
+    hours = ((times // 3600) % 24).astype(np.int64)
+    return {"time": times, "open": o, "high": h, "low": l, "close": c, "spread": spread,
+            "atr": _rma_atr(h, l, c), "trend_bull": trend_bull, "m15_ok": m15_ok, "hour": hours}
+
+def _order_blocks(arr, lookback, ob_mode="fast"):
+    """OB bull/bear aktif di tiap bar (window `lookback` bar terakhir, termasuk bar itu). NaN = gak ada."""
+    o, h, l, c = arr["open"], arr["high"], arr["low"], arr["close"]
+    n = len(c)
+    bull = np.full((n, 2), np.nan)
+    bear = np.full((n, 2), np.nan)
+    if ob_mode == "exact":
+        for t in range(lookback - 1, n):
+            s = slice(t - lookback + 1, t + 1)
+            ob_bull, ob_bear = find_quality_ob_arrays(o[s], h[s], l[s], c[s], lookback)
+            if ob_bull: bull[t] = ob_bull
+            if ob_bear: bear[t] = ob_bear
+        return bull, bear
+
+    # Candle impulse j (body > 0.8 ATR), OB = candle j-1 warna kebalikan.
+    # Window bar t = [t-lookback+1, t]; j valid di [t-lookback+15, t-2] (ATR lokal butuh 14 TR, 2 bar terakhir di-skip)
+    body = c - o
+    atr = arr["atr"]
+    impulse = (atr > 0) & (np.abs(body) > atr * 0.8)
+    prev_body = np.concatenate(([0.0], body[:-1]))
+    last_bull = _last_true_index(impulse & (body > 0) & (prev_body < 0))
+    last_bear = _last_true_index(impulse & (body < 0) & (prev_body > 0))
+
+    t = np.arange(lookback - 1, n)
+    lo_bound = t - lookback + 15
+    for last, out in ((last_bull, bull), (last_bear, bear)):
+        j = last[t - 2]
+        ok = j >= lo_bound
+        i = j[ok] - 1
+        out[t[ok], 0] = l[i]
+        out[t[ok], 1] = h[i]
+    return bull, bear
+
+def find_signals(arr, params=None, ob_mode="fast"):
+    """Semua bar yang lolos rule -> dict array (index bar, arah, entry, sl, tp, jarak SL/TP)."""
+    p = {**default_params(), **(params or {})}
+    c, h, l, atr, spread = arr["close"], arr["high"], arr["low"], arr["atr"], arr["spread"]
+    bull, bear = _order_blocks(arr, int(p["OB_LOOKBACK"]), ob_mode)
+
+    base = arr["m15_ok"] & (arr["hour"] >= p["SESSION_START_UTC"]) & (arr["hour"] < p["SESSION_END_UTC"])
+    base &= (spread <= p["MAX_SPREAD_USD"]) & (atr > 0)
+    sweep = 0.2 * atr
+
+    with np.errstate(invalid="ignore"):
+        buy = base & arr["trend_bull"] & ~np.isnan(bull[:, 0])
+        buy &= (l <= bull[:, 1]) & (l >= bull[:, 0] - sweep) & (c > bull[:, 1]) & (c <= bull[:, 1] + atr * 0.2)
+        sell = base & ~arr["trend_bull"] & ~np.isnan(bear[:, 0])
+        sell &= (h >= bear[:, 0]) & (h <= bear[:, 1] + sweep) & (c < bear[:, 0]) & (c >= bear[:, 0] - atr * 0.2)
+
+    # Sizing SL/TP (sama kayak calculate_rules)
+    entry = np.where(buy, c + spread, c)
+    raw_sl = np.where(buy, entry - (bull[:, 0] - sweep), (bear[:, 1] + sweep) - entry)
+    with np.errstate(invalid="ignore"):
+        ok = (buy | sell) & (raw_sl > 0) & (raw_sl <= p["TARGET_SL_MAX_USD"])
+        sl_dist = np.maximum(p["TARGET_SL_MIN_USD"], raw_sl)
+        ok &= ~(spread > sl_dist * 0.15)
+    tp_dist = np.minimum(sl_dist * p["RR_RATIO"], p["MAX_TP_USD"])
+
+    idx = np.flatnonzero(ok)
+    is_buy = buy[idx]
+    e, sd, td = entry[idx], sl_dist[idx], tp_dist[idx]
+    return {"idx": idx, "is_buy": is_buy, "entry": e, "sl_dist": sd, "tp_dist": td,
+            "sl": np.where(is_buy, e - sd, e + sd), "tp": np.where(is_buy, e + td, e - td)}
+
+def resolve_outcomes(arr, sig, expiry_bars):
+    """
+    Resolusi TP/SL tiap signal di `expiry_bars` bar setelah bar signal (vectorized via sliding window).
+    Per bar: TP dicek duluan baru SL (kayak evaluate_state). Gak kena dua-duanya -> EXPIRED di close bar terakhir.
+    """
+    n = len(arr["close"])
+    pad = np.full(expiry_bars, np.nan)
+    win_h = sliding_window_view(np.concatenate((arr["high"], pad)), expiry_bars)
+    win_l = sliding_window_view(np.concatenate((arr["low"], pad)), expiry_bars)
+    rows = sig["idx"] + 1
+    wh, wl = win_h[rows], win_l[rows]
+    is_buy = sig["is_buy"][:, None]
+    with np.errstate(invalid="ignore"):
+        tp_hit = np.where(is_buy, wh >= sig["tp"][:, None], wl <= sig["tp"][:, None])
+        sl_hit = np.where(is_buy, wl <= sig["sl"][:, None], wh >= sig["sl"][:, None])
+    big = expiry_bars + 1
+    first_tp = np.where(tp_hit.any(axis=1), tp_hit.argmax(axis=1), big)
+    first_sl = np.where(sl_hit.any(axis=1), sl_hit.argmax(axis=1), big)
+
+    outcome = np.where(first_tp <= first_sl, "TP_HIT", "SL_HIT") # Bar yang sama: TP menang
+    outcome = np.where((first_tp == big) & (first_sl == big), "EXPIRED", outcome)
+    held = np.minimum(np.minimum(first_tp, first_sl), expiry_bars - 1) + 1
+    exit_idx = np.minimum(sig["idx"] + held, n - 1)
+
+    last_close = arr["close"][exit_idx]
+    mtm = np.where(sig["is_buy"], last_close - sig["entry"], sig["entry"] - (last_close + arr["spread"][exit_idx]))
+    pnl = np.where(outcome == "TP_HIT", sig["tp_dist"], np.where(outcome == "SL_HIT", -sig["sl_dist"], mtm))
+    # Data habis sebelum expiry = masih open, gak dihitung
+    complete = (outcome != "EXPIRED") | (sig["idx"] + expiry_bars < n)
+    return outcome, exit_idx, pnl, complete
+
+def _single_position(idx, exit_idx):
+    """Signal baru cuma diambil kalau posisi sebelumnya udah selesai (bar signal > bar exit)."""
+    keep = np.zeros(len(idx), dtype=bool)
+    busy_until = -1
+    for k in range(len(idx)):
+        if idx[k] > busy_until:
+            keep[k] = True
+            busy_until = exit_idx[k]
+    return keep
+
+def summarize(trades):
+    if trades.empty:
+        return {"trades": 0, "win_rate": 0.0, "net_usd": 0.0, "profit_factor": 0.0,
+                "expectancy_usd": 0.0, "max_drawdown_usd": 0.0, "expired": 0}
+    pnl = trades["pnl_usd"].to_numpy()
+    equity = np.cumsum(pnl)
+    gross_win, gross_loss = pnl[pnl > 0].sum(), -pnl[pnl < 0].sum()
+    return {
+        "trades": int(len(pnl)),
+        "win_rate": round(float((trades["outcome"] == "TP_HIT").mean()), 4),
+        "net_usd": round(float(pnl.sum()), 2),
+        "profit_factor": round(float(gross_win / gross_loss), 3) if gross_loss > 0 else float("inf"),
+        "expectancy_usd": round(float(pnl.mean()), 3),
+        "max_drawdown_usd": round(float((np.maximum.accumulate(np.maximum(equity, 0)) - equity).max()), 2),
+        "expired": int((trades["outcome"] == "EXPIRED").sum()),
+    }
+
+def run_arrays(arr, params=None, ob_mode="fast", ttl_sec=SIGNAL_TTL_SEC, bar_sec=300):
+    """Backtest di atas array hasil prepare_arrays. Return (DataFrame trades, dict summary)."""
+    sig = find_signals(arr, params, ob_mode)
+    if not len(sig["idx"]):
+        trades = pd.DataFrame(columns=["time", "signal", "entry", "sl", "tp", "outcome", "exit_time", "bars_held", "pnl_usd"])
+        return trades, summarize(trades)
+    outcome, exit_idx, pnl, complete = resolve_outcomes(arr, sig, max(1, int(ttl_sec // bar_sec)))
+    keep = _single_position(sig["idx"], exit_idx) & complete
+
+    times = pd.to_datetime(arr["time"], unit="s", utc=True)
+    idx = sig["idx"][keep]
+    trades = pd.DataFrame({
+        "time": times[idx],
+        "signal": np.where(sig["is_buy"][keep], "BUY", "SELL"),
+        "entry": sig["entry"][keep],
+        "sl": sig["sl"][keep],
+        "tp": sig["tp"][keep],
+        "outcome": outcome[keep],
+        "exit_time": times[exit_idx[keep]],
+        "bars_held": exit_idx[keep] - idx,
+        "pnl_usd": pnl[keep],
+    })
+    return trades, summarize(trades)
+
+def load_ohlc_csv(path):
+    """CSV history (kolom time + open/high/low/close, opsional spread) -> DataFrame index UTC kayak process_df."""
+    df = pd.read_csv(path)
+    df.columns = [col.strip() for col in df.columns]
+    rename = {col: col.capitalize() for col in df.columns if col.lower() in ("open", "high", "low", "close", "volume")}
+    df = df.rename(columns=rename)
+    time_col = next(col for col in df.columns if col.lower() in ("time", "datetime", "date"))
+    t = df[time_col]
+    df["time"] = pd.to_datetime(t, unit="s", utc=True) if pd.api.types.is_numeric_dtype(t) else pd.to_datetime(t, utc=True)
+    if time_col != "time": df = df.drop(columns=[time_col])
+    return df.set_index("time").sort_index()
+
+def resample_m15(m5):
+    """M5 -> M15 (bar label kiri, sama kayak candle M15 broker)."""
+    return m5.resample("15min", label="left", closed="left").agg(
+        {"Open": "first", "High": "max", "Low": "min", "Close": "last"}).dropna()
+
+def run_backtest(m5, m15=None, params=None, spread_usd=DEFAULT_SPREAD_USD, ob_mode="fast"):
+    """Entry point: DataFrame M5 (+ M15, kalau None di-resample dari M5) -> (trades, summary)."""
+    if m15 is None: m15 = resample_m15(m5)
+    return run_arrays(prepare_arrays(m5, m15, spread_usd), params, ob_mode)
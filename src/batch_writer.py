@@ -0,0 +1,90 @@
+"""
+Writer batch di background (dipakai TradeLogger & SignalDB): put() cuma append ke list in-memory,
+thread daemon manggil write_fn(items) tiap batch_size item / flush_sec detik, plus flush pas exit (atexit)
+atau close(). write_fn gagal -> item balik ke depan antrian, dicoba lagi flush berikutnya
+(antrian dibatasi max_pending, paling lama dibuang & dihitung dropped).
+Partial success: write_fn boleh hapus item yang udah ketulis dari list yang dikasih (in-place) sebelum raise,
+jadi yang di-requeue cuma sisanya (gak dobel).
+"""
+import atexit
+import threading
+import time
+
+from src.metrics import METRICS
+
+class BatchWriter:
+    def __init__(self, write_fn, name, batch_size, flush_sec, max_pending, stage, label, errors=(Exception,)):
+        self.write_fn = write_fn
+        self.name = name       # Nama thread
+        self.batch_size = batch_size
+        self.flush_sec = flush_sec
+        self.max_pending = max_pending
+        self.stage = stage     # Nama stage METRICS
+        self.label = label     # Prefix pesan error
+        self.errors = errors   # Exception yang dianggap gagal nulis (item di-requeue)
+        self.cond = threading.Condition()
+        self.write_lock = threading.Lock() # Thread background vs flush() manual/atexit
+        self.batch = []
+        self.thread = None
+        self.closed = False
+        self.stats = {"queued": 0, "written": 0, "flushes": 0, "dropped": 0, "errors": 0}
+        atexit.register(self.flush)
+
+    def put(self, item):
+        with self.cond:
+            self.batch.append(item)
+            self.stats["queued"] += 1
+            if len(self.batch) > self.max_pending:
+                del self.batch[0]
+                self.stats["dropped"] += 1
+            self._ensure_thread()
+            if len(self.batch) >= self.batch_size: self.cond.notify()
+
+    def _ensure_thread(self):
+        if not self.closed and (self.thread is None or not self.thread.is_alive()):
+            self.thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self.thread.start()
+
+    def _run(self):
+        while not self.closed:
+            with self.cond:
+                deadline = time.time() + self.flush_sec
+                while len(self.batch) < self.batch_size and not self.closed:
+                    remaining = deadline - time.time()
+                    if remaining <= 0: break
+                    self.cond.wait(timeout=remaining)
+            self.flush()
+
+    def flush(self):
+        """Tulis semua item yang numpuk (thread background, atexit, atau manual). Return True kalau beres."""
+        with self.write_lock:
+            with self.cond:
+                items, self.batch = self.batch, []
+            if not items: return True
+            total = len(items)
+            try:
+                with METRICS.stage(self.stage): self.write_fn(items)
+            except self.errors as e:
+                print(f"❌ {self.label}: {e}")
+                self.stats["errors"] += 1
+                self.stats["written"] += total - len(items)
+                with self.cond: # Sisa yang belum ketulis balik ke depan antrian
+                    self.batch[:0] = items
+                    over = len(self.batch) - self.max_pending
+                    if over > 0:
+                        del self.batch[:over]
+                        self.stats["dropped"] += over
+                return False
+            self.stats["written"] += total
+            self.stats["flushes"] += 1
+            return True
+
+    def close(self, timeout=5.0):
+        """Flush terakhir + stop thread + lepas hook atexit. Return hasil flush."""
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+        if self.thread is not None: self.thread.join(timeout)
+        ok = self.flush()
+        atexit.unregister(self.flush)
+        return ok
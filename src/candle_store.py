@@ -0,0 +1,131 @@
+import numpy as np
+import pandas as pd
+
+COLUMNS = ("Open", "High", "Low", "Close", "Volume")
+
+class CandleStore:
+    """
+    Candle store kolumnar kapasitas tetap (ring buffer NumPy) per simbol/timeframe.
+    Tiap row ditulis dobel (slot i & i+capacity), jadi window N bar terakhir selalu
+    contiguous -> bisa dikasih sebagai view tanpa copy (view()).
+    frame() = snapshot immutable (1 copy per perubahan isi, dipakai bareng semua consumer):
+    frame yang udah dikasih gak pernah ikut berubah pas ring buffer ketimpa.
+    """
+    def __init__(self, capacity=1000):
+        self.capacity = int(capacity)
+        self.time = np.zeros(self.capacity * 2, dtype=np.int64)
+        self.cols = {c: np.zeros(self.capacity * 2, dtype=np.float64) for c in COLUMNS}
+        self.head = 0 # slot tulis berikutnya (0 .. capacity-1)
+        self.size = 0
+        self.appends = 0 # naik tiap ada bar baru (window geser)
+        self.version = 0 # naik tiap isi berubah (bar baru / update bar)
+        self._index = None
+        self._index_key = None
+        self._frame = None
+        self._frame_key = None
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def last_time(self):
+        if not self.size: return None
+        return int(self.time[(self.head - 1) % self.capacity])
+
+    def clear(self):
+        self.head = 0
+        self.size = 0
+        self.appends += 1
+        self.version += 1
+
+    def _write(self, slot, t, o, h, l, c, v):
+        for s in (slot, slot + self.capacity):
+            self.time[s] = t
+            self.cols["Open"][s] = o
+            self.cols["High"][s] = h
+            self.cols["Low"][s] = l
+            self.cols["Close"][s] = c
+            self.cols["Volume"][s] = v
+        self.version += 1
+
+    def upsert(self, bar):
+        """Append bar baru / update bar yang udah ada (in-place). Return False kalau bar terlalu lama (gak ada di buffer)."""
+        vol = bar.get("Volume", bar.get("tick_volume", 0)) or 0
+        return self.upsert_values(int(bar["time"]), bar["Open"], bar["High"], bar["Low"], bar["Close"], vol)
+
+    def upsert_values(self, t, o, h, l, c, v=0.0):
+        last = self.last_time
+        if last is None or t > last:
+            self._write(self.head, t, o, h, l, c, v)
+            self.head = (self.head + 1) % self.capacity
+            self.size = min(self.size + 1, self.capacity)
+            self.appends += 1
+            return True
+        if t == last:
+            self._write((self.head - 1) % self.capacity, t, o, h, l, c, v)
+            return True
+        # Update bar lama (jarang): cari di window
+        times = self.view("time")
+        k = int(np.searchsorted(times, t))
+        if k >= len(times) or times[k] != t: return False
+        self._write((self.head - self.size + k) % self.capacity, t, o, h, l, c, v)
+        return True
+
+    def upsert_many(self, bars):
+        """Bars = list of dict, atau dict kolom NumPy (dari wire biner)."""
+        if isinstance(bars, dict):
+            t, o, h, l, c = (bars[k] for k in ("time", "Open", "High", "Low", "Close"))
+            v = bars.get("Volume")
+            for i in range(len(t)):
+                if not self.upsert_values(int(t[i]), o[i], h[i], l[i], c[i], v[i] if v is not None else 0.0): return False
+            return True
+        for bar in bars:
+            if not self.upsert(bar): return False
+        return True
+
+    def load(self, bars):
+        """Reset isi store dari snapshot full (list bar ascending, atau dict kolom NumPy)."""
+        self.clear()
+        if isinstance(bars, dict):
+            n = min(len(bars["time"]), self.capacity)
+            if not n: return
+            self.time[:n] = bars["time"][-n:]
+            self.time[self.capacity:self.capacity + n] = self.time[:n]
+            for c in COLUMNS:
+                src = bars.get(c)
+                col = self.cols[c]
+                col[:n] = src[-n:] if src is not None else 0.0
+                col[self.capacity:self.capacity + n] = col[:n]
+            self.head = n % self.capacity
+            self.size = n
+            self.version += 1
+            return
+        for bar in bars[-self.capacity:]: self.upsert(bar)
+
+    def view(self, col):
+        """View zero-copy kolom (urut waktu, lama -> baru)."""
+        start = (self.head - self.size) % self.capacity
+        arr = self.time if col == "time" else self.cols[col]
+        return arr[start:start + self.size]
+
+    def _snapshot(self, col):
+        arr = self.view(col).copy()
+        arr.flags.writeable = False
+        return arr
+
+    def frame(self):
+        """
+        Snapshot DataFrame (index UTC kayak process_df), kolom = copy read-only window saat ini.
+        Di-cache sampai isi berubah; index cuma dibikin ulang pas window geser.
+        """
+        if self._frame is not None and self._frame_key == self.version: return self._frame
+        if not self.size:
+            self._frame = pd.DataFrame()
+        else:
+            index_key = (self.appends, self.size)
+            if self._index_key != index_key:
+                self._index = pd.DatetimeIndex(pd.to_datetime(self._snapshot("time"), unit="s", utc=True), name="time")
+                self._index_key = index_key
+            self._frame = pd.DataFrame({c: self._snapshot(c) for c in COLUMNS}, index=self._index, copy=False)
+        self._frame_key = self.version
+        return self._frame
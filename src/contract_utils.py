@@ -0,0 +1,63 @@
+import html
+import math
+
+def get_broker_timestamp(meta):
+    """Helper Konsisten untuk Ambil Jam Broker"""
+    tick_msc = int(meta.get("tick_time_msc") or 0)
+    tick_sec = int(meta.get("tick_time") or 0)
+    # Prioritas MSC karena lebih presisi
+    if tick_msc > 0: return tick_msc / 1000.0
+    if tick_sec > 0: return float(tick_sec)
+    return 0.0
+
+def bar_timestamp(bar):
+    """Epoch detik (UTC) dari bar (row DataFrame dengan index waktu)."""
+    ts = bar.name
+    if getattr(ts, "tzinfo", None) is None: ts = ts.tz_localize("UTC")
+    else: ts = ts.tz_convert("UTC")
+    return int(ts.timestamp())
+
+def get_digits(tick):
+    point = float(tick.get("point", 0.01) or 0.01)
+    if point <= 0: point = 0.01
+    raw_digits = tick.get("digits")
+    if raw_digits is not None: return int(raw_digits)
+    try: return max(0, int(round(-math.log10(point))))
+    except: return 2
+
+def make_fingerprint(candle_ts, signal, setup, digits):
+    """Fingerprint setup buat anti double-judge di candle yang sama."""
+    try:
+        e_r = round(float(setup.get('entry', 0) or 0), digits)
+        sl_r = round(float(setup.get('sl', 0) or 0), digits)
+        tp_r = round(float(setup.get('tp', 0) or 0), digits)
+    except:
+        e_r, sl_r, tp_r = "ERR", "ERR", "ERR"
+    return f"{candle_ts}_{signal}_{e_r}_{sl_r}_{tp_r}"
+
+def build_ai_metrics(contract):
+    """Flatten meta contract jadi metrics buat ask_ai_judge."""
+    meta = contract.get("meta", {})
+    return {
+        **meta.get("indicators", {}),
+        "warnings": meta.get("warnings", []),
+        "tick_lag_sec": meta.get("tick_lag_sec", 0),
+        "tick_lag_sec_raw": meta.get("tick_lag_sec_raw", 0),
+        "spread": meta.get("spread", 0),
+        "risk_audit": meta.get("risk_audit", {}),
+        "price": meta.get("candle", {}).get("close", 0)
+    }
+
+def format_approval(signal, setup, judge):
+    """Pesan Telegram (HTML) buat signal yang di-approve AI."""
+    icon = "🟢" if signal == "BUY" else "🔴"
+    ai_reason = html.escape(str(judge.get("reason", "No Reason")))
+    e_entry = html.escape(str(setup['entry']))
+    e_sl = html.escape(str(setup['sl']))
+    e_tp = html.escape(str(setup['tp']))
+
+    return (f"{icon} <b>SIGNAL {signal} APPROVED</b>\n\n"
+            f"Entry: <code>{e_entry}</code>\n"
+            f"SL: <code>{e_sl}</code>\n"
+            f"TP: <code>{e_tp}</code>\n\n"
+            f"⚖️ <b>AI Debate:</b> <i>{ai_reason}</i>")
@@ -3,6 +3,12 @@ import json
 import os
 import pandas as pd
 import subprocess
+import time
+
+from src.candle_store import CandleStore
+from src.wire import decode_response, bars_len, first_time
+from src.tape import TapeRecorder
+from src.metrics import METRICS
 
 ZMQ_SOCKET = None
 CONTEXT = zmq.Context()
@@ -18,6 +24,12 @@ def get_wsl_ip():
     except:
         return "127.0.0.1"
 
+def bridge_address():
+    """Alamat REQ bridge. BRIDGE_ADDRESS (mis. tcp://127.0.0.1:5600, buat simulator) override auto-detect WSL."""
+    override = os.getenv("BRIDGE_ADDRESS")
+    if override: return override
+    return f"tcp://{get_wsl_ip()}:{int(os.getenv('BRIDGE_PORT', 5555))}"
+
 def process_df(data_list):
     """Ubah list of dict menjadi DataFrame UTC-Aware (Fix iloc bug)"""
     if not data_list: return pd.DataFrame()
@@ -27,31 +39,203 @@ def process_df(data_list):
     df.sort_index(inplace=True)
     return df
 
-def get_market_data():
-    global ZMQ_SOCKET
-    host = get_wsl_ip()
-    address = f"tcp://{host}:5555"
+# --- DELTA SYNC ---
+# Client kirim time bar terakhir per timeframe, bridge cuma balikin bar baru/ke-update (+ tick).
+# Full resync kalau: cache kosong, bridge restart (epoch beda), bar bolong, atau tiap FULL_RESYNC_SEC.
+# Bar disimpan di CandleStore (ring buffer NumPy) -> gak ada rebuild DataFrame tiap poll.
+TIMEFRAMES = ("m5", "m15")
+FULL_RESYNC_SEC = 900
+DELTA_MAX_FAILS = 2 # GET_DELTA gagal (timeout/error) berturut-turut segini -> anggap bridge gak support
+STORES = {}
+SYNC_STATE = {"delta": os.getenv("DELTA_SYNC", "1") != "0", "epoch": None, "last_full": 0.0, "delta_fails": 0}
+# Encoding wire yang diminta ke bridge: "binary" (kolom NumPy multipart) atau "json". Bridge lama tetap bales JSON.
+WIRE_ENCODING = os.getenv("WIRE_ENCODING", "binary").lower()
+# TAPE_DIR di-set -> tiap response bridge (tick, bar, meta) direkam ke tape biner per hari (lihat src/tape.py)
+TAPE = TapeRecorder(os.getenv("TAPE_DIR")) if os.getenv("TAPE_DIR") else None
+
+def _tape(fn, *args):
+    """Rekam ke tape; error disk gak boleh ganggu loop trading."""
+    try: fn(*args)
+    except Exception as e: print(f"⚠️ Tape write failed: {e}")
+
+# Multi simbol (GET_MULTI): store + state sync sendiri per simbol -> {symbol: (stores, sync)}
+MULTI = {}
+MULTI_STATE = {"supported": True}
+
+def reset_sync(stores=STORES, sync=SYNC_STATE):
+    for store in stores.values(): store.clear()
+    sync["epoch"] = None
+    sync["last_full"] = 0.0
+
+def _since(stores=STORES, sync=SYNC_STATE):
+    """Time bar terakhir per tf buat GET_DELTA, atau None kalau harus full snapshot."""
+    full_due = time.time() - sync["last_full"] > FULL_RESYNC_SEC
+    if not SYNC_STATE["delta"] or full_due or any(not stores.get(tf) for tf in TIMEFRAMES): return None
+    return {tf: stores[tf].last_time for tf in TIMEFRAMES}
+
+def _build_request():
+    since = _since()
+    if since is None: return {"action": "GET_ALL_DATA"}
+    return {"action": "GET_DELTA", "since": since}
+
+def _merge_bars(store, delta):
+    """Gabung delta ke store (in-place). Return False kalau ada gap -> harus full resync."""
+    # Bridge minimal kirim ulang bar `since`; kalau bar pertama delta lebih baru, berarti ada yang bolong
+    if not bars_len(delta) or first_time(delta) > store.last_time: return False
+    return store.upsert_many(delta)
+
+def _apply_response(raw, stores=STORES, sync=SYNC_STATE):
+    """Update store dari response bridge. Return False kalau delta gak bisa dipakai."""
+    epoch = (raw.get("meta") or {}).get("epoch")
+    if raw.get("mode") == "delta":
+        if epoch != sync["epoch"]: return False # Bridge restart
+        for tf in TIMEFRAMES:
+            if not _merge_bars(stores[tf], raw.get(tf) or []): return False
+        return True
+
+    # Full snapshot (atau bridge lama yang gak kenal mode). Kapasitas store = panjang window bridge.
+    for tf in TIMEFRAMES:
+        bars = raw.get(tf) or []
+        store = stores.get(tf)
+        if store is None or store.capacity != max(bars_len(bars), 1):
+            store = stores[tf] = CandleStore(capacity=max(bars_len(bars), 1))
+        store.load(bars)
+    sync["epoch"] = epoch
+    sync["last_full"] = time.time()
+    return True
+
+def _request(req):
+    if WIRE_ENCODING == "binary":
+        req = {**req, "encoding": "binary"}
+        # History full bisa gede -> minta compress; delta kecil, kirim mentah aja
+        # (GET_MULTI: kolom kecil di bawah COMPRESS_MIN_BYTES tetap dikirim mentah sama bridge)
+        if req["action"] in ("GET_ALL_DATA", "GET_MULTI"): req["compress"] = "zlib"
+    with METRICS.stage("fetch"): # Round trip ZMQ + decode wire
+        ZMQ_SOCKET.send_json(req)
+        return decode_response(ZMQ_SOCKET.recv_multipart(copy=False))
 
+def _connect(timeout_ms=2000):
+    global ZMQ_SOCKET
     if ZMQ_SOCKET is None:
+        address = bridge_address()
         ZMQ_SOCKET = CONTEXT.socket(zmq.REQ)
         # Saran Pro: Tambah SNDTIMEO & LINGER
-        ZMQ_SOCKET.setsockopt(zmq.SNDTIMEO, 2000)
-        ZMQ_SOCKET.setsockopt(zmq.RCVTIMEO, 2000)
+        ZMQ_SOCKET.setsockopt(zmq.SNDTIMEO, timeout_ms)
+        ZMQ_SOCKET.setsockopt(zmq.RCVTIMEO, timeout_ms)
         ZMQ_SOCKET.setsockopt(zmq.LINGER, 0)
         ZMQ_SOCKET.connect(address)
         print(f"📡 Connected to MT5 Server at {address}")
 
+def _drop_socket():
+    global ZMQ_SOCKET
+    if ZMQ_SOCKET: ZMQ_SOCKET.close()
+    ZMQ_SOCKET = None
+
+def _disable_delta():
+    print("⚠️ Bridge doesn't support delta sync. Falling back to GET_ALL_DATA.")
+    SYNC_STATE["delta"] = False
+
+def get_market_data():
+    _connect()
+    req = None
     try:
-        ZMQ_SOCKET.send_json({"action": "GET_ALL_DATA"})
-        raw = ZMQ_SOCKET.recv_json()
-        
+        req = _build_request()
+        raw = _request(req)
+        applied = False
+        t_parse = time.perf_counter() # Stage parse = merge ke store + bikin frame (tanpa round trip ZMQ)
+
+        if req["action"] == "GET_DELTA":
+            if raw.get("status") != "OK":
+                # Bridge lama belum support GET_DELTA -> balik ke mode full
+                _disable_delta()
+                raw = _request({"action": "GET_ALL_DATA"})
+                t_parse = time.perf_counter()
+            elif _apply_response(raw):
+                SYNC_STATE["delta_fails"] = 0
+                applied = True
+            else:
+                SYNC_STATE["delta_fails"] = 0 # Delta dibales (cuma gap / bridge restart)
+                reset_sync()
+                raw = _request({"action": "GET_ALL_DATA"})
+                t_parse = time.perf_counter()
+
         if raw.get("status") == "OK":
-            # Process raw data jadi DataFrame di sini
-            raw['m5'] = process_df(raw.get('m5'))
-            raw['m15'] = process_df(raw.get('m15'))
+            if not applied: _apply_response(raw)
+            # Frame ringan dari store (view ke buffer NumPy, bukan rebuild dari list of dict)
+            frames = STORES['m5'].frame(), STORES['m15'].frame()
+            METRICS.observe("parse", time.perf_counter() - t_parse)
+            if TAPE:
+                with METRICS.stage("tape"): _tape(TAPE.record, raw)
+            raw['m5'], raw['m15'] = frames
             return raw
         return None
     except:
-        if ZMQ_SOCKET: ZMQ_SOCKET.close()
-        ZMQ_SOCKET = None
+        _drop_socket()
+        reset_sync()
+        # Bridge lama yang nge-ignore action gak dikenal -> timeout terus, bukan reply error.
+        # Tanpa ini: full, delta timeout, full, ... (tiap poll kedua None)
+        if req and req["action"] == "GET_DELTA":
+            SYNC_STATE["delta_fails"] += 1
+            if SYNC_STATE["delta_fails"] >= DELTA_MAX_FAILS: _disable_delta()
         return None
+
+def _multi_slot(symbol):
+    if symbol not in MULTI: MULTI[symbol] = ({}, {"epoch": None, "last_full": 0.0})
+    return MULTI[symbol]
+
+def _multi_request(symbols, full=False):
+    """1 request GET_MULTI buat banyak simbol (delta per simbol kalau store-nya udah keisi)."""
+    spec = {}
+    for sym in symbols:
+        since = None if full else _since(*_multi_slot(sym))
+        spec[sym] = {"since": since} if since else {}
+    return _request({"action": "GET_MULTI", "symbols": spec})
+
+def get_multi_market_data(symbols):
+    """
+    Snapshot banyak simbol dalam 1 round trip. Return {symbol: data} (format sama kayak get_market_data)
+    buat simbol yang OK; simbol yang delta-nya gak kepake di-resync full di request kedua (cuma simbol itu).
+    """
+    if not MULTI_STATE["supported"]: return {}
+    _connect(timeout_ms=5000) # Payload N simbol -> timeout lebih longgar
+    try:
+        raw = _multi_request(symbols)
+        if raw.get("status") != "OK":
+            print(f"⚠️ Bridge doesn't support GET_MULTI ({raw.get('error')}). Multi-symbol scan disabled.")
+            MULTI_STATE["supported"] = False
+            return {}
+        t_parse = time.perf_counter()
+        out, resync = {}, []
+        for sym, resp in (raw.get("symbols") or {}).items():
+            if resp.get("status") != "OK": continue
+            stores, sync = _multi_slot(sym)
+            if _apply_response(resp, stores, sync): out[sym] = resp
+            else:
+                reset_sync(stores, sync)
+                resync.append(sym)
+        if resync:
+            METRICS.observe("parse", time.perf_counter() - t_parse)
+            raw = _multi_request(resync, full=True)
+            t_parse = time.perf_counter()
+            for sym, resp in (raw.get("symbols") or {}).items():
+                if resp.get("status") == "OK" and _apply_response(resp, *_multi_slot(sym)): out[sym] = resp
+        for sym, resp in out.items():
+            stores = MULTI[sym][0]
+            resp["m5"], resp["m15"] = stores["m5"].frame(), stores["m15"].frame()
+        METRICS.observe("parse", time.perf_counter() - t_parse)
+        return out
+    except:
+        _drop_socket()
+        for stores, sync in MULTI.values(): reset_sync(stores, sync)
+        return {}
+
+def apply_tick(data, tick_event):
+    """Tempel tick dari PUB feed ke snapshot terakhir (bid/ask + jam broker), tanpa round trip REQ."""
+    tick = data.setdefault("tick", {})
+    meta = data.setdefault("meta", {})
+    for k in ("bid", "ask"):
+        if k in tick_event: tick[k] = tick_event[k]
+    for k in ("tick_time", "tick_time_msc"):
+        if k in tick_event: meta[k] = tick_event[k]
+    if TAPE: _tape(TAPE.record_tick, tick_event, tick_event)
+    return data
@@ -1,74 +1,283 @@
-import yfinance as yf
+"""
+Konteks big picture (PDH/PDL, PWH/PWL, PMH/PML + trend EMA50 daily/weekly) dari cache lokal,
+bukan download 2 tahun data tiap call.
+
+- Cache di disk per sumber: CACHE_DIR/{sumber}_{d1,w1,mn1}.csv. D1 cuma di-append hari yang udah close;
+  W1/MN1 cuma periode yang kena hari baru yang dihitung ulang. EMA50 D1 streaming (EmaState).
+- Sumber level: feed broker (bar M5 bridge / tape -> D1 per hari trading UTC, sesi weekend masuk Senin)
+  kalau semua hari trading periodenya ada di cache (kalender dari yfinance, fallback Sen-Jum), else
+  yfinance (GC=F). Hari yang bolong boleh nyusul (append_days ngisi hole). Field "source" nyebut sumber per tf.
+- yfinance cuma di-refresh di thread background (incremental dari hari terakhir di cache), gak pernah
+  nahan jalur trading. Cache kosong -> return None dulu, call berikutnya kebagian hasilnya.
+- Hasil di-memo sampai daily close berikutnya (00:00 UTC) atau ada hari baru masuk cache -> call = lookup dict.
+"""
+import os
+import threading
+import time
+
 import pandas as pd
-import pandas_ta as ta
 
-def get_big_picture(symbol="GC=F"):
-    print("⏳ Sedang menganalisa sejarah market (Daily, Weekly, Monthly)...")
-    
-    try:
-        # Ambil data jangka panjang (1 Tahun ke belakang)
-        # Kita ambil interval 1 Hari (1d) cukup mewakili hari, minggu, bulan
-        df = yf.download(symbol, period="2y", interval="1d", progress=False)
-        
-        if len(df) < 200: return None
+from src.indicator_engine import EmaState
+from src.symbols import _slug
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_DIR = os.getenv("HISTORY_CACHE_DIR", os.path.join(BASE_DIR, "cache", "history"))
+YF_SYMBOL = "GC=F"
+BROKER_SYMBOL = "XAUUSD"
+MIN_DAYS = 200          # History yfinance minimal biar EMA50 weekly masuk akal (sama kayak dulu)
+EMA_LEN = 50
+REFRESH_RETRY_SEC = 3600 # Refresh yfinance gagal / gak ada hari baru -> coba lagi paling cepat segini
+DAY_SEC = 86400
+OHLC = ["Open", "High", "Low", "Close"]
+LOGIC = {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last'}
+RULES = {"w1": "W", "mn1": "ME"} # Label resample: W = Minggu akhir pekan, ME = tanggal akhir bulan
+
+def _utc_index(index):
+    index = pd.DatetimeIndex(index)
+    return index.tz_localize("UTC") if index.tz is None else index.tz_convert("UTC")
+
+def _period_start(day, tf):
+    """Hari pertama periode tf yang berisi `day` (00:00 UTC)."""
+    if tf == "w1": return day - pd.Timedelta(days=day.weekday()) # Senin
+    if tf == "mn1": return day.replace(day=1)
+    return day
+
+def _empty():
+    return pd.DataFrame(columns=OHLC + ["EMA_50"], index=pd.DatetimeIndex([], tz="UTC", name="time"), dtype=float)
+
+def _with_ema(frame, st=None):
+    st = st or EmaState(EMA_LEN)
+    frame = frame.copy()
+    frame["EMA_50"] = [st.push(float(c)) for c in frame["Close"]]
+    return frame
+
+def _trading_day(index):
+    """Hari trading tiap bar: hari UTC, tapi Sabtu/Minggu (open sesi Minggu malam) digabung ke Senin."""
+    days = index.normalize()
+    shift = pd.to_timedelta((7 - days.weekday).where(days.weekday >= 5, 0), unit="D")
+    return days + shift
+
+def daily_from_intraday(bars):
+    """Bar intraday (M5/M15) -> D1 per hari trading, cuma hari yang udah close. Hari pertama yang kepotong dibuang."""
+    if bars is None or bars.empty: return _empty()[OHLC]
+    df = bars[OHLC].astype(float)
+    df.index = _utc_index(df.index)
+    days = _trading_day(df.index)
+    keep = days < days[-1] # Hari bar terakhir masih jalan
+    if df.index[0] != days[0] or days[0].weekday() == 0: # Lengkap cuma kalau mulai 00:00 Sel-Jum (Senin mulai Minggu)
+        keep &= days > days[0]
+    df, days = df[keep], days[keep]
+    if df.empty: return _empty()[OHLC]
+    return df.groupby(days.rename("time")).agg(LOGIC).dropna()
+
+def trading_calendar(yfc, start, end):
+    """Hari trading [start, end): kalender D1 yfinance selama cache-nya nyampe, sisanya Senin-Jumat."""
+    days = pd.bdate_range(start, end, inclusive="left")
+    if yfc is None or not len(yfc.frames["d1"]): return days
+    yd = yfc.frames["d1"].index
+    if yd[0] > start: return days
+    return yd[(yd >= start) & (yd < end)].append(days[days > yd[-1]])
+
+class HistoryCache:
+    """Frame D1/W1/MN1 1 sumber (in-memory + CSV). Baca lock-free (dict frames diganti utuh pas update)."""
+    def __init__(self, key, cache_dir=None):
+        self.key = key
+        self.cache_dir = cache_dir or CACHE_DIR
+        self.lock = threading.Lock()
+        self.version = 0
+        self.scanned_until = -1 # Nomor hari (epoch // 1 hari) bar terakhir feed yang udah diproses
+        self.frames = {tf: self._load(tf) for tf in ("d1", "w1", "mn1")}
+        self.d1_ema = EmaState(EMA_LEN)
+        for c in self.frames["d1"]["Close"]: self.d1_ema.push(float(c))
+
+    def _path(self, tf):
+        return os.path.join(self.cache_dir, f"{_slug(self.key)}_{tf}.csv")
+
+    def _load(self, tf):
+        path = self._path(tf)
+        if not os.path.exists(path): return _empty()
+        try:
+            df = pd.read_csv(path, index_col="time")
+            df.index = _utc_index(pd.to_datetime(df.index, utc=True)).rename("time")
+            return df[OHLC + ["EMA_50"]].astype(float)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"⚠️ History cache {os.path.basename(path)} unreadable ({e}), rebuilding")
+            return _empty()
+
+    def _write(self, tf, frame):
+        path = self._path(tf)
+        tmp = path + ".tmp"
+        frame.to_csv(tmp, index_label="time")
+        os.replace(tmp, path)
+
+    @property
+    def last_day(self):
+        d1 = self.frames["d1"]
+        return d1.index[-1] if len(d1) else None
 
+    def append_days(self, daily):
+        """Bar D1 (index hari UTC) -> hari yang belum ada di cache masuk. Return jumlah hari baru.
+        Normalnya cuma append setelah last_day; hari bolong di tengah (bot mati, feed putus) ikut diisi."""
+        with self.lock:
+            new = daily[OHLC].dropna().astype(float)
+            new.index = _utc_index(new.index).normalize().rename("time")
+            new = new[~new.index.duplicated(keep="last")].sort_index()
+            old_d1 = self.frames["d1"]
+            new = new[~new.index.isin(old_d1.index)]
+            if new.empty: return 0
+
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = self._path("d1")
+            last = self.last_day
+            if last is None or new.index[0] > last:
+                new["EMA_50"] = [self.d1_ema.push(c) for c in new["Close"]]
+                new.to_csv(path, mode="a", header=not os.path.exists(path), index_label="time") # D1 append-only
+                d1 = pd.concat([old_d1, new]) if len(old_d1) else new
+            else:
+                # Isi hole: EMA dihitung ulang dari awal + D1 ditulis ulang (jarang)
+                self.d1_ema = EmaState(EMA_LEN)
+                d1 = _with_ema(pd.concat([old_d1[OHLC], new[OHLC]]).sort_index(), self.d1_ema)
+                self._write("d1", d1)
+            frames = {"d1": d1}
+            for tf, rule in RULES.items():
+                # Periode yang kena hari baru doang yang dihitung ulang
+                src = d1[d1.index >= _period_start(new.index[0], tf)]
+                tail = src[OHLC].resample(rule).agg(LOGIC).dropna()
+                old = self.frames[tf]
+                frames[tf] = _with_ema(pd.concat([old[old.index < tail.index[0]][OHLC], tail]))
+                self._write(tf, frames[tf])
+            self.frames = frames
+            self.version += 1
+            return len(new)
+
+    def ingest_bars(self, bars):
+        """Bar intraday feed -> hari yang baru close. O(1) kalau hari bar terakhir belum ganti."""
+        if bars is None or bars.empty: return 0
+        last_bar_day = bars.index[-1].value // (DAY_SEC * 10**9) # Timestamp.value selalu ns UTC
+        if last_bar_day <= self.scanned_until: return 0
+        self.scanned_until = last_bar_day
+        return self.append_days(daily_from_intraday(bars))
+
+    def closed_row(self, tf, today, calendar=None):
+        """Row periode tf terakhir yang udah close sebelum `today`.
+        calendar (hari trading sebelum today): row cuma dipakai kalau itu periode trading terakhir &
+        semua hari trading-nya ada di D1 cache (gak ada hole)."""
+        frame = self.frames[tf]
+        i = frame.index.searchsorted(_period_start(today, tf)) - 1
+        if i < 0: return None
+        row = frame.iloc[i]
+        if calendar is None: return row
+        ref = calendar[calendar < _period_start(today, tf)]
+        if not len(ref): return None
+        target = _period_start(ref[-1], tf)
+        if _period_start(row.name, tf) != target: return None # Periode terakhir bolong total
+        if not ref[ref >= target].isin(self.frames["d1"].index).all(): return None
+        return row
+
+_CACHES = {}
+_CACHES_LOCK = threading.Lock()
+_REFRESH = {} # symbol yfinance -> ts refresh terakhir dimulai
+_MEMO = {}    # (symbol, broker_symbol) -> (context, valid_until, versi cache)
+
+def _cache(key):
+    with _CACHES_LOCK:
+        cache = _CACHES.get(key)
+        if cache is None: cache = _CACHES[key] = HistoryCache(key)
+        return cache
+
+def ingest_feed(data, broker_symbol=BROKER_SYMBOL):
+    """Market data bridge (dict m5/m15) -> cache D1 broker. Murah dipanggil tiap poll."""
+    if not data or "m5" not in data: return 0
+    return _cache(f"broker_{broker_symbol}").ingest_bars(data["m5"])
+
+def backfill_tape(root, broker_symbol=BROKER_SYMBOL, start=None, end=None):
+    """Isi cache broker dari tape (src/tape.py). Jalanin sebelum feed live biar hari lama gak ke-skip."""
+    from src.tape import TapeReader
+    return _cache(f"broker_{broker_symbol}").append_days(daily_from_intraday(TapeReader(root).frame("m5", start, end)))
+
+def refresh_history(symbol=YF_SYMBOL):
+    """Download yfinance (incremental dari hari terakhir cache) -> cache. Blocking, ada network: jangan di jalur trading."""
+    import yfinance as yf
+
+    cache = _cache(f"yf_{symbol}")
+    last = cache.last_day
+    print(f"⏳ Update history {symbol} (Daily) dari {'2y' if last is None else last.date()}...")
+    try:
+        if last is None: df = yf.download(symbol, period="2y", interval="1d", progress=False)
+        else: df = yf.download(symbol, start=(last + pd.Timedelta(days=1)).date().isoformat(), interval="1d", progress=False)
+        if df is None or df.empty: return 0
         # Fix MultiIndex
         if isinstance(df.columns, pd.MultiIndex):
             df.columns = df.columns.get_level_values(0)
+        df.index = _utc_index(df.index).normalize()
+        today = pd.Timestamp.now(tz="UTC").normalize()
+        added = cache.append_days(df[df.index < today]) # Candle hari ini belum close
+        print(f"✅ History {symbol}: +{added} hari ({len(cache.frames['d1'])} total)")
+        return added
+    except Exception as e:
+        print(f"❌ Gagal update history {symbol}: {e}")
+        return 0
 
-        # --- 1. ANALISA HARIAN (YESTERDAY) ---
-        # Kita ambil candle index -2 (Kemarin Full Day yang udah close)
-        yesterday = df.iloc[-2] 
-        
-        pdh = yesterday['High'] # Previous Day High
-        pdl = yesterday['Low']  # Previous Day Low
-        pdc = yesterday['Close'] # Previous Day Close
-        
-        # Trend Harian (EMA 50)
-        df['EMA_50'] = df.ta.ema(length=50)
-        daily_trend = "BULLISH" if pdc > df['EMA_50'].iloc[-2] else "BEARISH"
-
-        # --- 2. ANALISA MINGGUAN (WEEKLY) ---
-        # Resample data harian jadi mingguan
-        logic = {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last'}
-        df_weekly = df.resample('W').apply(logic)
-        
-        last_week = df_weekly.iloc[-2] # Minggu lalu full
-        pwh = last_week['High'] # Previous Week High
-        pwl = last_week['Low']  # Previous Week Low
-        
-        # Trend Mingguan (EMA 50 Weekly)
-        df_weekly['EMA_50'] = df_weekly.ta.ema(length=50)
-        weekly_trend = "BULLISH" if last_week['Close'] > df_weekly['EMA_50'].iloc[-2] else "BEARISH"
-
-        # --- 3. ANALISA BULANAN (MONTHLY) ---
-        df_monthly = df.resample('M').apply(logic)
-        last_month = df_monthly.iloc[-2]
-        
-        pmh = last_month['High']
-        pml = last_month['Low']
-        
-        # --- RANGKUMAN INTELEJEN ---
-        context = {
-            "daily": {
-                "trend": daily_trend,
-                "pdh": round(pdh, 2), # Resistance Kuat
-                "pdl": round(pdl, 2), # Support Kuat
-            },
-            "weekly": {
-                "trend": weekly_trend,
-                "range_high": round(pwh, 2),
-                "range_low": round(pwl, 2)
-            },
-            "monthly": {
-                "range_high": round(pmh, 2),
-                "range_low": round(pml, 2)
-            }
-        }
-        
-        print("✅ Analisa Sejarah Selesai!")
-        return context
+def _refresh_async(symbol, now):
+    if now - _REFRESH.get(symbol, 0) < REFRESH_RETRY_SEC: return
+    _REFRESH[symbol] = now
+    threading.Thread(target=refresh_history, args=(symbol,), name="history-refresh", daemon=True).start()
 
-    except Exception as e:
-        print(f"❌ Gagal Analisa Sejarah: {e}")
-        return None
+def _trend(row):
+    if row is None or pd.isna(row["EMA_50"]): return None
+    return "BULLISH" if row["Close"] > row["EMA_50"] else "BEARISH"
+
+def build_context(broker, yfc, now):
+    """Level per timeframe: broker kalau periodenya lengkap, else yfinance. None kalau gak ada sumber sama sekali."""
+    today = pd.Timestamp(int(now), unit="s", tz="UTC").normalize()
+    calendar = None
+    if broker and len(broker.frames["d1"]):
+        # Dari awal bulan lalu = periode closed paling awal yang dicek (MN1)
+        calendar = trading_calendar(yfc, _period_start(_period_start(today, "mn1") - pd.Timedelta(days=1), "mn1"), today)
+    picked, source = {}, {}
+    for tf in ("d1", "w1", "mn1"):
+        b = broker.closed_row(tf, today, calendar) if calendar is not None else None
+        y = yfc.closed_row(tf, today) if yfc and len(yfc.frames["d1"]) >= MIN_DAYS else None
+        row = b if b is not None else y
+        if row is None: return None
+        picked[tf] = (row, _trend(b) or _trend(y))
+        source[tf] = "broker" if b is not None else "yfinance"
+    (d, d_trend), (w, w_trend), (m, _) = picked["d1"], picked["w1"], picked["mn1"]
+    return {
+        "daily": {
+            "trend": d_trend,
+            "pdh": round(float(d["High"]), 2), # Resistance Kuat
+            "pdl": round(float(d["Low"]), 2),  # Support Kuat
+        },
+        "weekly": {
+            "trend": w_trend,
+            "range_high": round(float(w["High"]), 2),
+            "range_low": round(float(w["Low"]), 2)
+        },
+        "monthly": {
+            "range_high": round(float(m["High"]), 2),
+            "range_low": round(float(m["Low"]), 2)
+        },
+        "source": {"daily": source["d1"], "weekly": source["w1"], "monthly": source["mn1"]},
+    }
+
+def get_big_picture(symbol=YF_SYMBOL, data=None, broker_symbol=BROKER_SYMBOL, refresh=True, now=None):
+    """
+    PDH/PDL, PWH/PWL, PMH/PML + trend EMA50 daily/weekly. data = market data bridge (opsional, masuk cache broker).
+    Non-blocking: cache yfinance yang ketinggalan di-refresh di background (refresh=False buat matiin).
+    """
+    now = time.time() if now is None else now
+    if data is not None: ingest_feed(data, broker_symbol)
+    broker = _cache(f"broker_{broker_symbol}") if broker_symbol else None
+    yfc = _cache(f"yf_{symbol}")
+    versions = (broker.version if broker else -1, yfc.version)
+    key = (symbol, broker_symbol)
+    memo = _MEMO.get(key)
+    if memo and now < memo[1] and memo[2] == versions: return memo[0]
+
+    if refresh:
+        last = yfc.last_day
+        if last is None or last.timestamp() < now - 2 * DAY_SEC: _refresh_async(symbol, now)
+    context = build_context(broker, yfc, now)
+    _MEMO[key] = (context, (int(now) // DAY_SEC + 1) * DAY_SEC, versions) # Sampai daily close berikutnya
+    return context
@@ -0,0 +1,134 @@
+import math
+
+from src.pivot_tracker import PivotTracker
+
+NAN = float("nan")
+
+class EmaState:
+    """EMA versi streaming, rumus sama kayak ta.ema (seed SMA, lalu ewm adjust=False)."""
+    def __init__(self, length):
+        self.length = length
+        self.alpha = 2.0 / (length + 1)
+        self.count = 0
+        self.seed_sum = 0.0
+        self.value = NAN
+
+    def peek(self, x):
+        n = self.count + 1
+        if n < self.length: return NAN
+        if n == self.length: return (self.seed_sum + x) / self.length
+        return (1.0 - self.alpha) * self.value + self.alpha * x
+
+    def push(self, x):
+        v = self.peek(x)
+        self.count += 1
+        if self.count <= self.length: self.seed_sum += x
+        self.value = v
+        return v
+
+class AtrState:
+    """ATR versi streaming, sama kayak ta.atr mode RMA (ewm alpha=1/n, adjust=True, min_periods=n)."""
+    def __init__(self, length=14):
+        self.length = length
+        self.decay = 1.0 - 1.0 / length
+        self.prev_close = NAN
+        self.count = 0 # jumlah TR valid (TR bar pertama = NaN)
+        self.avg = NAN
+        self.old_wt = 0.0
+
+    def _step(self, high, low, close):
+        if math.isnan(self.prev_close): return None
+        pc = self.prev_close
+        tr = max(high - low, abs(high - pc), abs(pc - low))
+        if self.count == 0: return tr, 1.0
+        old_wt = self.old_wt * self.decay
+        avg = (old_wt * self.avg + tr) / (old_wt + 1.0)
+        return avg, old_wt + 1.0
+
+    def peek(self, high, low, close):
+        step = self._step(high, low, close)
+        if step is None or self.count + 1 < self.length: return NAN
+        return step[0]
+
+    def push(self, high, low, close):
+        step = self._step(high, low, close)
+        if step is not None:
+            self.avg, self.old_wt = step
+            self.count += 1
+        self.prev_close = close
+        return self.avg if self.count >= self.length else NAN
+
+class TimeframeIndicators:
+    """
+    State EMA/ATR per timeframe. Bar terakhir di frame dianggap candle berjalan:
+    nilainya di-'peek' doang, baru di-commit pas bar berikutnya muncul (candle close).
+    """
+    def __init__(self, ema_lengths=(50, 200), atr_length=14):
+        self.ema_lengths = tuple(ema_lengths)
+        self.atr_length = atr_length
+        self.rebuilds = 0
+        self.reset()
+
+    def reset(self):
+        self.emas = {n: EmaState(n) for n in self.ema_lengths}
+        self.atr = AtrState(self.atr_length)
+        self.last_closed_ts = None
+
+    def _push(self, high, low, close):
+        for ema in self.emas.values(): ema.push(close)
+        self.atr.push(high, low, close)
+
+    def update(self, df):
+        """Sync state ke frame OHLC (index waktu ascending), return nilai untuk bar terakhir."""
+        n = len(df)
+        if n == 0: return {}
+        idx = df.index
+        start = 0
+        if self.last_closed_ts is not None:
+            pos = idx.searchsorted(self.last_closed_ts, side="right")
+            # Gap / history ke-rewrite (reconnect, restart bridge) -> rebuild full dari frame ini
+            if pos == 0 or pos > n - 1 or idx[pos - 1] != self.last_closed_ts:
+                self.reset()
+                self.rebuilds += 1
+                pos = 0
+            start = pos
+        else:
+            self.rebuilds += 1
+
+        high = df["High"].to_numpy()
+        low = df["Low"].to_numpy()
+        close = df["Close"].to_numpy()
+
+        # Commit semua bar yang udah close (biasanya cuma 0 atau 1 bar per poll)
+        for i in range(start, n - 1):
+            self._push(float(high[i]), float(low[i]), float(close[i]))
+        if n > 1: self.last_closed_ts = idx[n - 2]
+
+        h, l, c = float(high[-1]), float(low[-1]), float(close[-1])
+        snap = {f"ema_{k}": ema.peek(c) for k, ema in self.emas.items()}
+        snap["atr"] = self.atr.peek(h, l, c)
+        return snap
+
+class IndicatorEngine:
+    """
+    Kumpulan state indikator per timeframe (m5, m15, ...). Update O(1) per candle close.
+    `track_structure=True` -> struktur pivot M15 juga incremental (PivotTracker), cuma pakai bar yang udah close.
+    """
+    def __init__(self, ema_lengths=(50, 200), atr_length=14, track_structure=False):
+        self.ema_lengths = ema_lengths
+        self.atr_length = atr_length
+        self.track_structure = track_structure
+        self.frames = {}
+        self.trackers = {}
+
+    def update(self, tf, df):
+        if tf not in self.frames:
+            self.frames[tf] = TimeframeIndicators(self.ema_lengths, self.atr_length)
+        return self.frames[tf].update(df)
+
+    def structure(self, tf, df, point=0.01, atr_val=1.0, window=5):
+        """Struktur pivot incremental, output sama kayak get_market_structure."""
+        tracker = self.trackers.get(tf)
+        if tracker is None or tracker.eps != point or tracker.window != window:
+            tracker = self.trackers[tf] = PivotTracker(point=point, atr_val=atr_val, window=window)
+        return tracker.sync(df, atr_val=atr_val)
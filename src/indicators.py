@@ -1,6 +1,7 @@
 import pandas as pd
 import pandas_ta as ta
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 import time
 from datetime import datetime, time as dt_time, timezone
 
@@ -14,139 +15,160 @@ MAX_TP_USD        = 8.0
 SESSION_START_UTC = 7
 SESSION_END_UTC   = 20 
 
-def find_quality_ob(df):
-    if len(df) < 100: return None, None
-    subset = df.tail(100).copy()
-    atr = ta.atr(subset['High'], subset['Low'], subset['Close'], length=14)
-    subset['ATR'] = atr
-    
-    ob_bull = None
-    ob_bear = None
-    
-    for i in range(len(subset)-4, 0, -1):
-        atr_next = subset['ATR'].iloc[i+1]
-        if pd.isna(atr_next) or atr_next <= 0: continue
-        if subset['Close'].iloc[i] < subset['Open'].iloc[i]: 
-            body_next = abs(subset['Close'].iloc[i+1] - subset['Open'].iloc[i+1])
-            if subset['Close'].iloc[i+1] > subset['Open'].iloc[i+1] and body_next > (atr_next * 0.8):
-                ob_bull = (subset['Low'].iloc[i], subset['High'].iloc[i]) 
-                break 
-
-    for i in range(len(subset)-4, 0, -1):
-        atr_next = subset['ATR'].iloc[i+1]
-        if pd.isna(atr_next) or atr_next <= 0: continue
-        if subset['Close'].iloc[i] > subset['Open'].iloc[i]:
-            body_next = abs(subset['Close'].iloc[i+1] - subset['Open'].iloc[i+1])
-            if subset['Close'].iloc[i+1] < subset['Open'].iloc[i+1] and body_next > (atr_next * 0.8):
-                ob_bear = (subset['Low'].iloc[i], subset['High'].iloc[i])
-                break
+OB_LOOKBACK       = 100 # Jumlah bar M5 yang di-scan buat Order Block
 
-    return ob_bull, ob_bear
+def rule_params(overrides=None):
+    """Konstanta strategi (nilai modul) + override per simbol/sweep. Dibaca pas dipanggil."""
+    params = {
+        "TARGET_SL_MIN_USD": TARGET_SL_MIN_USD,
+        "TARGET_SL_MAX_USD": TARGET_SL_MAX_USD,
+        "MAX_SPREAD_USD": MAX_SPREAD_USD,
+        "RR_RATIO": RR_RATIO,
+        "MAX_TP_USD": MAX_TP_USD,
+        "SESSION_START_UTC": SESSION_START_UTC,
+        "SESSION_END_UTC": SESSION_END_UTC,
+        "OB_LOOKBACK": OB_LOOKBACK,
+    }
+    if overrides: params.update(overrides)
+    return params
 
-def get_market_structure(df, point=0.01, atr_val=1.0, window=5):
+def _rma_atr(high, low, close, length=14):
+    """ATR dari array numpy, rumus sama persis kayak ta.atr (True Range + RMA)."""
+    hl = high - low
+    if (hl == 0).any(): hl = hl + np.finfo(float).eps # sama kayak non_zero_range pandas_ta
+    prev_close = np.empty_like(close)
+    prev_close[0] = np.nan
+    prev_close[1:] = close[:-1]
+    tr = np.maximum(hl, np.maximum(np.abs(high - prev_close), np.abs(prev_close - low)))
+    tr[0] = np.nan
+    return pd.Series(tr).ewm(alpha=1.0 / length, min_periods=length).mean().to_numpy()
+
+def find_quality_ob_arrays(open_, high, low, close, lookback=OB_LOOKBACK):
     """
-    Ekstrak Struktur Pivot V17 (Clean Data):
-    - FIX: Filter Zero Legs (Biar AI gak baca momentum 0.0).
-    - FIX: Update Leg Size saat Outside Bar Compression.
+    Versi vectorized find_quality_ob di atas array float (tanpa .iloc per bar).
+    OB Bull = candle merah terakhir yang diikuti candle hijau dengan body > 0.8 ATR (OB Bear kebalikannya).
+    Bull & Bear dicari sekaligus dalam satu pass.
     """
-    if len(df) > 200: df = df.tail(200)
-    if len(df) < (window * 2 + 10): return [], "Insufficient Data", None, []
-    
+    if len(close) < lookback: return None, None
+    o = np.ascontiguousarray(open_[-lookback:], dtype=np.float64)
+    h = np.ascontiguousarray(high[-lookback:], dtype=np.float64)
+    l = np.ascontiguousarray(low[-lookback:], dtype=np.float64)
+    c = np.ascontiguousarray(close[-lookback:], dtype=np.float64)
+    atr = _rma_atr(h, l, c)
+
+    # Kandidat di posisi i (1 .. lookback-4), dicek terhadap candle i+1
+    body = c - o
+    body_i, body_next = body[:-3][1:], body[1:-2][1:]
+    atr_next = atr[1:-2][1:]
+    impulse = (atr_next > 0) & (np.abs(body_next) > atr_next * 0.8) # NaN otomatis False
+    bull_idx = np.flatnonzero(impulse & (body_i < 0) & (body_next > 0))
+    bear_idx = np.flatnonzero(impulse & (body_i > 0) & (body_next < 0))
+
+    ob_bull = ob_bear = None
+    if bull_idx.size:
+        i = bull_idx[-1] + 1
+        ob_bull = (l[i], h[i])
+    if bear_idx.size:
+        i = bear_idx[-1] + 1
+        ob_bear = (l[i], h[i])
+    return ob_bull, ob_bear
+
+def find_quality_ob(df, lookback=OB_LOOKBACK):
+    return find_quality_ob_arrays(
+        df['Open'].to_numpy(), df['High'].to_numpy(), df['Low'].to_numpy(), df['Close'].to_numpy(),
+        lookback=lookback
+    )
+
+def _raw_pivots(high, low, index, window, eps):
+    """Pivot mentah (vectorized): bar yang High/Low-nya ekstrem di window kiri-kanan (centered)."""
+    n = len(high)
+    if n < window * 2 + 1: return []
+    span = window * 2 + 1
+    win_high = sliding_window_view(high, span).max(axis=1)
+    win_low = sliding_window_view(low, span).min(axis=1)
+    hi_pos = np.flatnonzero(high[window:n - window] >= (win_high - eps)) + window
+    lo_pos = np.flatnonzero(low[window:n - window] <= (win_low + eps)) + window
+
+    # Urutan sama kayak sort lama: per posisi, Low dulu baru High
+    keys = np.sort(np.concatenate((lo_pos * 2, hi_pos * 2 + 1)))
     raw_pivots = []
-    eps = point * 1.0 
-    
-    for i in range(window, len(df) - window):
-        curr_high = df['High'].iloc[i]
-        curr_low = df['Low'].iloc[i]
-        win_high = df['High'].iloc[i-window:i+window+1].max()
-        win_low  = df['Low'].iloc[i-window:i+window+1].min()
-        
-        if curr_high >= (win_high - eps):
-            raw_pivots.append({"pos": i, "type": "High", "price": float(curr_high), "time": str(df.index[i])})
-        if curr_low <= (win_low + eps):
-            raw_pivots.append({"pos": i, "type": "Low", "price": float(curr_low), "time": str(df.index[i])})
-    
-    type_order = {"Low": 0, "High": 1}
-    raw_pivots.sort(key=lambda x: (x["pos"], type_order[x["type"]]))
+    for k in keys.tolist():
+        i = k >> 1
+        if k & 1: raw_pivots.append({"pos": i, "type": "High", "price": float(high[i]), "time": str(index[i])})
+        else: raw_pivots.append({"pos": i, "type": "Low", "price": float(low[i]), "time": str(index[i])})
+    return raw_pivots
+
+def _fold_pivot(clean_pivots, p, min_dev):
+    """Masukin 1 pivot mentah ke list clean (outside bar compression + alternating)."""
+    p['is_outside'] = False 
     
-    if pd.isna(atr_val) or atr_val <= 0: atr_val = 1.0
-    min_dev = max(1.0, atr_val * 0.3) 
+    if not clean_pivots:
+        p['leg_signed'] = 0.0 
+        clean_pivots.append(p)
+        return
     
-    clean_pivots = []
+    last_p = clean_pivots[-1]
     
-    for p in raw_pivots:
-        p['is_outside'] = False 
-        
-        if not clean_pivots:
-            p['leg_signed'] = 0.0 
-            clean_pivots.append(p)
-            continue
-        
-        last_p = clean_pivots[-1]
-        
-        # 1. OUTSIDE BAR COMPRESSION
-        if p['pos'] == last_p['pos']:
-            if len(clean_pivots) >= 2:
-                prev_prev = clean_pivots[-2]
-                updated = False
-                
-                if prev_prev['type'] == 'High' and p['type'] == 'Low':
-                    clean_pivots[-1] = p
-                    updated = True
-                elif prev_prev['type'] == 'Low' and p['type'] == 'High':
-                    clean_pivots[-1] = p
-                    updated = True
-                
-                if updated:
-                    diff = p['price'] - prev_prev['price']
-                    p['leg_signed'] = round(diff, 2)
-                    p['leg_size'] = round(abs(diff), 2)
-                    p['is_outside'] = True 
-                    clean_pivots[-1] = p
-            continue
-
-        # 2. ALTERNATING LOGIC
-        if p['type'] == last_p['type']:
+    # 1. OUTSIDE BAR COMPRESSION
+    if p['pos'] == last_p['pos']:
+        if len(clean_pivots) >= 2:
+            prev_prev = clean_pivots[-2]
             updated = False
-            if p['type'] == 'High' and p['price'] > last_p['price']: updated = True
-            elif p['type'] == 'Low' and p['price'] < last_p['price']: updated = True
+            
+            if prev_prev['type'] == 'High' and p['type'] == 'Low':
+                clean_pivots[-1] = p
+                updated = True
+            elif prev_prev['type'] == 'Low' and p['type'] == 'High':
+                clean_pivots[-1] = p
+                updated = True
             
             if updated:
-                if len(clean_pivots) >= 2:
-                    prev_pivot = clean_pivots[-2]
-                    diff = p['price'] - prev_pivot['price']
-                    p['leg_signed'] = round(diff, 2)
-                    p['leg_size'] = round(abs(diff), 2)
+                diff = p['price'] - prev_prev['price']
+                p['leg_signed'] = round(diff, 2)
+                p['leg_size'] = round(abs(diff), 2)
+                p['is_outside'] = True 
                 clean_pivots[-1] = p
-        else:
-            dist = abs(p['price'] - last_p['price'])
-            if dist >= min_dev:
-                diff = p['price'] - last_p['price']
+        return
+
+    # 2. ALTERNATING LOGIC
+    if p['type'] == last_p['type']:
+        updated = False
+        if p['type'] == 'High' and p['price'] > last_p['price']: updated = True
+        elif p['type'] == 'Low' and p['price'] < last_p['price']: updated = True
+        
+        if updated:
+            if len(clean_pivots) >= 2:
+                prev_pivot = clean_pivots[-2]
+                diff = p['price'] - prev_pivot['price']
                 p['leg_signed'] = round(diff, 2)
                 p['leg_size'] = round(abs(diff), 2)
-                clean_pivots.append(p)
+            clean_pivots[-1] = p
+    else:
+        dist = abs(p['price'] - last_p['price'])
+        if dist >= min_dev:
+            diff = p['price'] - last_p['price']
+            p['leg_signed'] = round(diff, 2)
+            p['leg_size'] = round(abs(diff), 2)
+            clean_pivots.append(p)
 
-    highs = [p for p in clean_pivots if p['type'] == 'High']
-    lows = [p for p in clean_pivots if p['type'] == 'Low']
-    
-    for i in range(len(highs)):
+def _label_pivot(p, prev_same):
+    """Label HH/LH/EqH atau HL/LL/EqL relatif ke pivot sejenis sebelumnya."""
+    if p['type'] == 'High':
         label = "H"
-        if i > 0:
-            if highs[i]['price'] > highs[i-1]['price']: label = "HH"
-            elif highs[i]['price'] < highs[i-1]['price']: label = "LH"
+        if prev_same is not None:
+            if p['price'] > prev_same['price']: label = "HH"
+            elif p['price'] < prev_same['price']: label = "LH"
             else: label = "EqH"
-        highs[i]['label'] = label
-        
-    for i in range(len(lows)):
+    else:
         label = "L"
-        if i > 0:
-            if lows[i]['price'] > lows[i-1]['price']: label = "HL"
-            elif lows[i]['price'] < lows[i-1]['price']: label = "LL"
+        if prev_same is not None:
+            if p['price'] > prev_same['price']: label = "HL"
+            elif p['price'] < prev_same['price']: label = "LL"
             else: label = "EqL"
-        lows[i]['label'] = label
+    p['label'] = label
 
-    all_pivots = sorted(highs + lows, key=lambda x: x['pos'])
-    
+def _summarize_structure(all_pivots):
+    """Ringkas pivot berlabel jadi (recent_pivots, sequence_str, last_pivot, last_3_legs)."""
     if len(all_pivots) < 3:
         return all_pivots, "Weak Structure", None, []
 
@@ -162,11 +184,45 @@ def get_market_structure(df, point=0.01, atr_val=1.0, window=5):
     
     return recent_pivots, sequence_str, last_pivot_data, last_3_legs
 
-def calculate_rules(data):
+def get_market_structure(df, point=0.01, atr_val=1.0, window=5, max_bars=200):
+    """
+    Ekstrak Struktur Pivot V17 (Clean Data):
+    - FIX: Filter Zero Legs (Biar AI gak baca momentum 0.0).
+    - FIX: Update Leg Size saat Outside Bar Compression.
+    - Pivot mentah dihitung vectorized; `max_bars=None` buat scan full history (H1/H4).
+    """
+    if max_bars and len(df) > max_bars: df = df.tail(max_bars)
+    if len(df) < (window * 2 + 10): return [], "Insufficient Data", None, []
+    
+    eps = point * 1.0 
+    raw_pivots = _raw_pivots(df['High'].to_numpy(dtype=np.float64), df['Low'].to_numpy(dtype=np.float64),
+                             df.index, window, eps)
+    
+    if pd.isna(atr_val) or atr_val <= 0: atr_val = 1.0
+    min_dev = max(1.0, atr_val * 0.3) 
+    
+    clean_pivots = []
+    for p in raw_pivots: _fold_pivot(clean_pivots, p, min_dev)
+
+    last_same = {}
+    for p in clean_pivots:
+        _label_pivot(p, last_same.get(p['type']))
+        last_same[p['type']] = p
+
+    all_pivots = sorted(clean_pivots, key=lambda x: x['pos'])
+    return _summarize_structure(all_pivots)
+
+def calculate_rules(data, engine=None, params=None):
+    """
+    Evaluasi rule di bar terakhir. Kalau `engine` (IndicatorEngine) dikasih,
+    EMA/ATR diambil dari state streaming (O(1) per candle) bukan recompute full frame.
+    `params` = override konstanta strategi per simbol (lihat rule_params).
+    """
+    p = rule_params(params)
     if 'm5' not in data or data['m5'].empty:
         return {"signal": "WAIT", "reason": "Data Empty", "setup": {}, "timestamp": None}
 
-    df_m5 = data['m5'].copy()
+    df_m5 = data['m5'] # Read-only (frame dari CandleStore = view ke buffer)
     tick = data.get('tick', {})
     meta = data.get('meta', {})
     
@@ -181,7 +237,7 @@ def calculate_rules(data):
 
     if bid <= 0 or ask <= 0: return {"signal": "WAIT", "reason": "Invalid Tick", "setup": {}, "timestamp": timestamp}
     candle_hour = timestamp.hour
-    if candle_hour < SESSION_START_UTC or candle_hour >= SESSION_END_UTC:
+    if candle_hour < p["SESSION_START_UTC"] or candle_hour >= p["SESSION_END_UTC"]:
          return {"signal": "WAIT", "reason": f"Outside Session ({candle_hour}h UTC)", "setup": {}, "timestamp": timestamp}
 
     tick_msc = int(meta.get("tick_time_msc") or 0)
@@ -214,7 +270,7 @@ def calculate_rules(data):
     else: return {"signal": "WAIT", "reason": "No Broker TS", "setup": {}, "timestamp": timestamp}
 
     real_spread_usd = abs(ask - bid)
-    if real_spread_usd > MAX_SPREAD_USD: return {"signal": "WAIT", "reason": f"High Spread: ${real_spread_usd:.2f}", "setup": {}, "timestamp": timestamp}
+    if real_spread_usd > p["MAX_SPREAD_USD"]: return {"signal": "WAIT", "reason": f"High Spread: ${real_spread_usd:.2f}", "setup": {}, "timestamp": timestamp}
     stop_usd = (int(tick.get("stop_level", 0) or 0)) * point
     if stop_usd > 2.0: return {"signal": "WAIT", "reason": "High Stop Level", "setup": {}, "timestamp": timestamp}
 
@@ -231,13 +287,21 @@ def calculate_rules(data):
     if 'm15' in data and not data['m15'].empty:
         df_m15 = data['m15']
         if len(df_m15) < 220: return {"signal": "WAIT", "reason": "M15 Warmup", "setup": {}, "timestamp": timestamp}
-        ema_50 = ta.ema(df_m15['Close'], length=50).iloc[-1]
-        ema_200 = ta.ema(df_m15['Close'], length=200).iloc[-1]
+        if engine is not None:
+            ind_m15 = engine.update("m15", df_m15)
+            ema_50, ema_200, atr_m15 = ind_m15["ema_50"], ind_m15["ema_200"], ind_m15["atr"]
+        else:
+            ema_50 = ta.ema(df_m15['Close'], length=50).iloc[-1]
+            ema_200 = ta.ema(df_m15['Close'], length=200).iloc[-1]
+            atr_m15 = None
         if pd.isna(ema_50): return {"signal": "WAIT", "reason": "EMA NaN", "setup": {}, "timestamp": timestamp}
         trend = "BULLISH" if ema_50 > ema_200 else "BEARISH"
         
-        atr_m15 = ta.atr(df_m15['High'], df_m15['Low'], df_m15['Close'], length=14).iloc[-1]
-        m15_pivots, m15_sequence, last_pivot_data, leg_sizes_signed = get_market_structure(df_m15, point=point, atr_val=atr_m15)
+        if atr_m15 is None: atr_m15 = ta.atr(df_m15['High'], df_m15['Low'], df_m15['Close'], length=14).iloc[-1]
+        if engine is not None and engine.track_structure:
+            m15_pivots, m15_sequence, last_pivot_data, leg_sizes_signed = engine.structure("m15", df_m15, point=point, atr_val=atr_m15)
+        else:
+            m15_pivots, m15_sequence, last_pivot_data, leg_sizes_signed = get_market_structure(df_m15, point=point, atr_val=atr_m15)
         
         if m15_sequence == "Weak Structure":
              return {"signal": "WAIT", "reason": "Weak M15 Structure (Chop)", "setup": {}, "timestamp": timestamp}
@@ -254,20 +318,23 @@ def calculate_rules(data):
     else:
         return {"signal": "WAIT", "reason": "M15 Missing", "setup": {}, "timestamp": timestamp}
 
-    atr_val = ta.atr(df_m5['High'], df_m5['Low'], df_m5['Close'], length=14).iloc[-1]
+    if engine is not None: atr_val = engine.update("m5", df_m5)["atr"]
+    else: atr_val = ta.atr(df_m5['High'], df_m5['Low'], df_m5['Close'], length=14).iloc[-1]
     if pd.isna(atr_val) or atr_val <= 0: return {"signal": "WAIT", "reason": "ATR NaN", "setup": {}, "timestamp": timestamp}
     sweep_buffer = 0.2 * atr_val 
 
-    ob_bull, ob_bear = find_quality_ob(df_m5)
+    ob_bull, ob_bear = find_quality_ob(df_m5, lookback=p["OB_LOOKBACK"])
     
     signal = "WAIT"
     reason = "Scanning..."
     ob_used = None 
+    ob_touch = False # Bar (boleh yang masih forming) udah nyentuh OB searah trend -> kandidat speculative judge
     
     if trend == "BULLISH" and ob_bull:
         ob_low, ob_high = ob_bull
         touched = last['Low'] <= ob_high
         held = last['Low'] >= (ob_low - sweep_buffer)
+        ob_touch = bool(touched and held)
         rejected = last['Close'] > ob_high
         near_ob = last['Close'] <= (ob_high + atr_val * 0.2) 
         if touched and held and rejected and near_ob:
@@ -279,6 +346,7 @@ def calculate_rules(data):
         ob_low, ob_high = ob_bear
         touched = last['High'] >= ob_low
         held = last['High'] <= (ob_high + sweep_buffer)
+        ob_touch = bool(touched and held)
         rejected = last['Close'] < ob_low
         near_ob = last['Close'] >= (ob_low - atr_val * 0.2)
         if touched and held and rejected and near_ob:
@@ -302,14 +370,14 @@ def calculate_rules(data):
             raw_sl_dist = structural_sl - entry_price
         
         if raw_sl_dist <= 0: return {"signal": "WAIT", "reason": "Invalid SL Dist", "setup": {}, "timestamp": timestamp}
-        if raw_sl_dist > TARGET_SL_MAX_USD: return {"signal": "WAIT", "reason": f"Structure Too Wide (${raw_sl_dist:.2f})", "setup": {}, "timestamp": timestamp}
+        if raw_sl_dist > p["TARGET_SL_MAX_USD"]: return {"signal": "WAIT", "reason": f"Structure Too Wide (${raw_sl_dist:.2f})", "setup": {}, "timestamp": timestamp}
 
-        final_sl_dist = max(TARGET_SL_MIN_USD, raw_sl_dist)
+        final_sl_dist = max(p["TARGET_SL_MIN_USD"], raw_sl_dist)
         sl_usd_dist = final_sl_dist
         if real_spread_usd > (final_sl_dist * 0.15): return {"signal": "WAIT", "reason": "Spread too expensive", "setup": {}, "timestamp": timestamp}
         
-        raw_tp_dist = final_sl_dist * RR_RATIO
-        final_tp_dist = min(raw_tp_dist, MAX_TP_USD)
+        raw_tp_dist = final_sl_dist * p["RR_RATIO"]
+        final_tp_dist = min(raw_tp_dist, p["MAX_TP_USD"])
         tp_usd_dist = final_tp_dist
         
         if signal == "BUY":
@@ -325,6 +393,7 @@ def calculate_rules(data):
             "trend_m15": trend,
             "atr_m5": atr_val,
             "ob_status": "Active" if (ob_bull or ob_bear) else "None",
+            "ob_touch": ob_touch,
             "m15_structure": {
                 "sequence": m15_sequence, 
                 "pivots": m15_pivots,
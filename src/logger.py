@@ -1,10 +1,30 @@
+"""
+Trade log per hari. log_contract cuma bikin row + masuk batch in-memory (nol file I/O di jalur trading);
+thread background nulis batch tiap LOG_BATCH_SIZE row / LOG_FLUSH_SEC detik, plus flush pas exit (atexit)
+atau close() (wajib kalau log_dir bakal dihapus duluan, mis. temp dir).
+
+Format (env LOG_FORMAT):
+  csv      logs/{prefix}_YYYY-MM-DD.csv (default, sama kayak dulu)
+  parquet  logs/{prefix}/date=YYYY-MM-DD/{prefix}.parquet, partisi per hari (butuh pyarrow;
+           gak ada -> fallback CSV). File hari itu ditulis ulang atomic tiap flush (~288 row/hari/simbol).
+"""
 import csv
+import importlib.util
 import os
 import time
 from datetime import datetime
 
+from src.batch_writer import BatchWriter
+
+LOG_FORMAT = os.getenv("LOG_FORMAT", "csv").lower()
+LOG_BATCH_SIZE = int(os.getenv("LOG_BATCH_SIZE", "50")) # Row numpuk segini -> flush langsung
+LOG_FLUSH_SEC = float(os.getenv("LOG_FLUSH_SEC", "5"))  # Flush paling telat tiap segini
+MAX_PENDING_ROWS = 10000 # Disk mati lama -> row paling lama dibuang (dihitung dropped)
+NUMERIC_FIELDS = ("price_close_m5", "spread", "rsi", "adx", "safe_dist_pts", "actual_dist_pts", "safe_dist_price",
+                  "actual_dist_price", "stop_level", "freeze_level", "tick_lag_sec")
+
 class TradeLogger:
-    def __init__(self, filename_prefix="trade_log"):
+    def __init__(self, filename_prefix="trade_log", fmt=None, batch_size=LOG_BATCH_SIZE, flush_sec=LOG_FLUSH_SEC):
         # Absolute path setup
         base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
         self.log_dir = os.path.join(base_dir, "logs")
@@ -20,17 +40,26 @@ class TradeLogger:
             "stop_level", "freeze_level", "tick_lag_sec", "warnings"
         ]
 
-    def _get_file_path(self):
-        today = datetime.now().strftime("%Y-%m-%d")
-        return os.path.join(self.log_dir, f"{self.filename_prefix}_{today}.csv")
+        self.fmt = (fmt or LOG_FORMAT).lower()
+        if self.fmt == "parquet" and importlib.util.find_spec("pyarrow") is None:
+            print("⚠️ LOG_FORMAT=parquet butuh pyarrow (pip install pyarrow), fallback ke CSV")
+            self.fmt = "csv"
+        self.parquet_day = None # (path, DataFrame) hari terakhir yang ditulis, biar gak baca ulang tiap flush
+        self.writer = BatchWriter(self._write_batch, f"log-{filename_prefix}", batch_size, flush_sec,
+                                  MAX_PENDING_ROWS, "log_flush", "Logger Error") # item = (hari, row)
+        self.stats = self.writer.stats
+
+    def _get_file_path(self, day=None):
+        day = day or datetime.now().strftime("%Y-%m-%d")
+        if self.fmt == "parquet":
+            return os.path.join(self.log_dir, self.filename_prefix, f"date={day}", f"{self.filename_prefix}.parquet")
+        return os.path.join(self.log_dir, f"{self.filename_prefix}_{day}.csv")
 
     def log_contract(self, contract):
+        """Contract -> row di batch. Non-blocking; file ditulis thread background."""
         if not contract or contract.get("reason") in ["Initializing...", "Data Empty"]:
             return
 
-        file_path = self._get_file_path()
-        file_exists = os.path.isfile(file_path)
-
         meta = contract.get("meta", {})
         tick = contract.get("tick", {})
         inds = meta.get("indicators", {}) 
@@ -81,10 +110,59 @@ class TradeLogger:
             "warnings": "; ".join(meta.get("warnings", []))
         }
 
-        try:
-            with open(file_path, mode='a', newline='', encoding='utf-8') as f:
+        self.writer.put((datetime.now().strftime("%Y-%m-%d"), row))
+
+    def flush(self):
+        """Tulis semua row yang numpuk sekarang. Return True kalau beres."""
+        return self.writer.flush()
+
+    def close(self, timeout=5.0):
+        """Flush terakhir + stop thread writer + lepas hook atexit. Return hasil flush."""
+        return self.writer.close(timeout)
+
+    def _write_batch(self, rows):
+        """Tulis per hari; hari yang beres dibuang dari rows (in-place), jadi yang di-requeue cuma hari yang gagal."""
+        by_day = {}
+        for day, row in rows: by_day.setdefault(day, []).append(row)
+        failed, error = set(), None
+        for day, day_rows in by_day.items():
+            try:
+                if self.fmt == "parquet": self._write_parquet(day, day_rows)
+                else: self._write_csv(day, day_rows)
+            except Exception as e:
+                failed.add(day)
+                error = error or e
+        rows[:] = [item for item in rows if item[0] in failed]
+        if error is not None: raise error
+
+    def _write_csv(self, day, rows):
+        file_path = self._get_file_path(day)
+        file_exists = os.path.isfile(file_path) and os.path.getsize(file_path) > 0
+        with open(file_path, mode='a', newline='', encoding='utf-8') as f:
+            start = f.tell()
+            try:
                 writer = csv.DictWriter(f, fieldnames=self.fields)
                 if not file_exists: writer.writeheader()
-                writer.writerow(row)
-        except Exception as e:
-            print(f"❌ Logger Error: {e}")
+                writer.writerows(rows)
+                f.flush()
+            except Exception:
+                try: f.truncate(start) # Buang row setengah ketulis, biar retry gak dobel
+                except Exception: pass
+                raise
+
+    def _write_parquet(self, day, rows):
+        import pandas as pd
+
+        file_path = self._get_file_path(day)
+        df = pd.DataFrame(rows, columns=self.fields)
+        for col in NUMERIC_FIELDS: df[col] = pd.to_numeric(df[col], errors="coerce").astype("float64") # "N/A" -> NaN
+        for col in set(self.fields) - set(NUMERIC_FIELDS): df[col] = df[col].astype("string")
+        if self.parquet_day and self.parquet_day[0] == file_path: prev = self.parquet_day[1]
+        elif os.path.exists(file_path): prev = pd.read_parquet(file_path) # Restart di tengah hari
+        else: prev = None
+        if prev is not None: df = pd.concat([prev, df], ignore_index=True)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        tmp = file_path + ".tmp"
+        df.to_parquet(tmp, index=False)
+        os.replace(tmp, file_path)
+        self.parquet_day = (file_path, df)
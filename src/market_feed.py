@@ -0,0 +1,50 @@
+import json
+import os
+
+import zmq
+
+class MarketFeed:
+    """
+    Subscriber (ZMQ SUB) ke PUB bridge: topic "tick" & "bar" (candle close).
+    Channel REQ tetap dipakai buat snapshot / resync, feed ini cuma buat reaksi cepat.
+    """
+    def __init__(self, host_ip, port=None, topics=(b"tick", b"bar")):
+        port = port or int(os.getenv("BRIDGE_PUB_PORT", 5556))
+        self.address = f"tcp://{host_ip}:{port}"
+        self.context = zmq.Context.instance()
+        self.topics = topics
+        self.socket = None
+        self.poller = zmq.Poller()
+        self.received = 0
+        self.connect()
+
+    def connect(self):
+        if self.socket:
+            self.poller.unregister(self.socket)
+            self.socket.close()
+        self.socket = self.context.socket(zmq.SUB)
+        self.socket.setsockopt(zmq.LINGER, 0)
+        self.socket.setsockopt(zmq.RCVHWM, 1000) # Kalau ketinggalan jauh, mending buang tick lama
+        for t in self.topics: self.socket.setsockopt(zmq.SUBSCRIBE, t)
+        self.socket.connect(self.address)
+        self.poller.register(self.socket, zmq.POLLIN)
+        print(f"📡 Subscribed to bridge feed at {self.address}")
+
+    def poll(self, timeout_ms=2000):
+        """Tunggu event sampai `timeout_ms`, lalu ambil semua yang pending. Return list (topic, payload)."""
+        events = []
+        if not self.poller.poll(timeout_ms): return events
+        while True:
+            try:
+                frames = self.socket.recv_multipart(zmq.NOBLOCK)
+            except zmq.error.Again:
+                break
+            if len(frames) != 2: continue
+            try: events.append((frames[0].decode(), json.loads(frames[1])))
+            except ValueError: continue
+        self.received += len(events)
+        return events
+
+    def close(self):
+        if self.socket: self.socket.close()
+        self.socket = None
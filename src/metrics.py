@@ -0,0 +1,219 @@
+"""
+Metrics ringan buat main loop: timer per stage (fetch, parse, rules, ai, telegram, state_fsync, ...),
+histogram rolling (percentile dari N sampel terakhir + bucket kumulatif ala Prometheus),
+counter (iterasi skipped/late) + rate iterasi per detik.
+
+Export (opsional, via env):
+  METRICS_FILE=path      snapshot JSON ditulis ulang tiap METRICS_INTERVAL_SEC (atomic replace)
+  METRICS_PORT=9108      HTTP lokal 127.0.0.1: /metrics (format teks Prometheus), /metrics.json
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0) # detik
+WINDOW = 512        # Sampel terakhir per stage buat percentile
+RATE_WINDOW_SEC = 60 # Window hitung iterasi/detik
+METRICS_INTERVAL_SEC = float(os.getenv("METRICS_INTERVAL_SEC", "10"))
+
+class RollingHistogram:
+    def __init__(self, window=WINDOW, buckets=BUCKETS):
+        self.samples = np.zeros(window)
+        self.filled = 0
+        self.pos = 0
+        self.buckets = buckets
+        self.bucket_counts = [0] * (len(buckets) + 1) # Kumulatif seumur proses (+Inf di akhir)
+        self.count = 0
+        self.sum = 0.0
+        self.last = 0.0
+
+    def observe(self, sec):
+        self.samples[self.pos] = sec
+        self.pos = (self.pos + 1) % len(self.samples)
+        self.filled = min(self.filled + 1, len(self.samples))
+        i = 0
+        while i < len(self.buckets) and sec > self.buckets[i]: i += 1
+        self.bucket_counts[i] += 1
+        self.count += 1
+        self.sum += sec
+        self.last = sec
+
+    def snapshot(self):
+        if not self.filled: return {"count": 0}
+        window = self.samples[:self.filled]
+        p50, p90, p99 = np.percentile(window, (50, 90, 99))
+        return {"count": self.count, "sum": round(self.sum, 6), "last": self.last,
+                "p50": float(p50), "p90": float(p90), "p99": float(p99), "max": float(window.max()),
+                "window": int(self.filled)}
+
+class _Stage:
+    __slots__ = ("metrics", "name", "t0")
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.name, time.perf_counter() - self.t0)
+        return False
+
+class Metrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.hists = {}
+        self.counters = {}
+        self.gauges = {}
+        self.collectors = {} # prefix -> fn() dict angka (mis. stats outbox / cache), dibaca pas export
+        self.iter_ts = deque()
+        self.started = time.time()
+
+    def stage(self, name):
+        """`with METRICS.stage("rules"): ...` -> durasi masuk histogram `name`."""
+        return _Stage(self, name)
+
+    def observe(self, name, sec):
+        with self.lock:
+            hist = self.hists.get(name)
+            if hist is None: hist = self.hists[name] = RollingHistogram()
+            hist.observe(sec)
+
+    def inc(self, name, n=1):
+        with self.lock: self.counters[name] = self.counters.get(name, 0) + n
+
+    def gauge(self, name, value):
+        with self.lock: self.gauges[name] = value
+
+    def register(self, prefix, fn):
+        self.collectors[prefix] = fn
+
+    def iteration(self, work_sec, budget_sec=None, skipped=None):
+        """
+        1 iterasi main loop selesai. work_sec = waktu kerja (tanpa sleep); > budget -> dihitung late.
+        skipped = alasan iterasi keluar lebih awal (data kosong, freeze, ...), dihitung per alasan.
+        """
+        now = time.time()
+        self.observe("iteration", work_sec)
+        with self.lock:
+            self.iter_ts.append(now)
+            while self.iter_ts and now - self.iter_ts[0] > RATE_WINDOW_SEC: self.iter_ts.popleft()
+            keys = ["iterations"]
+            if budget_sec is not None and work_sec > budget_sec: keys.append("late")
+            if skipped: keys += ["skipped", f"skipped.{skipped}"]
+            for k in keys: self.counters[k] = self.counters.get(k, 0) + 1
+
+    def timed(self, name, fn, *args):
+        """fn(*args) dalam stage `name` (buat asyncio.to_thread / executor)."""
+        with self.stage(name): return fn(*args)
+
+    def rate(self):
+        now = time.time()
+        with self.lock:
+            recent = [t for t in self.iter_ts if now - t <= RATE_WINDOW_SEC]
+        span = min(RATE_WINDOW_SEC, now - self.started)
+        return len(recent) / span if span > 0 else 0.0
+
+    def snapshot(self):
+        with self.lock:
+            hists = {k: h.snapshot() for k, h in self.hists.items()}
+            counters = dict(self.counters)
+            gauges = dict(self.gauges)
+        for prefix, fn in list(self.collectors.items()):
+            try:
+                for k, v in (fn() or {}).items():
+                    if isinstance(v, (int, float)): gauges[f"{prefix}.{k}"] = v
+            except Exception as e:
+                gauges[f"{prefix}.error"] = str(e)
+        return {"ts": time.time(), "uptime_sec": round(time.time() - self.started, 1),
+                "iterations_per_sec": round(self.rate(), 4), "counters": counters, "gauges": gauges,
+                "stages": hists}
+
+    def render_prometheus(self, prefix="xau_bot"):
+        """Snapshot -> format teks Prometheus (histogram kumulatif + summary quantile window)."""
+        snap = self.snapshot()
+        lines = [f"{prefix}_uptime_seconds {snap['uptime_sec']}",
+                 f"{prefix}_iterations_per_second {snap['iterations_per_sec']}"]
+        counters = snap["counters"]
+        for k, v in sorted(counters.items()):
+            name, _, label = k.partition(".")
+            if not label and any(c.startswith(name + ".") for c in counters): continue # Total = sum label
+            tag = f'{{reason="{label}"}}' if label else ""
+            lines.append(f"{prefix}_{name}_total{tag} {v}")
+        for k, v in sorted(snap["gauges"].items()):
+            if isinstance(v, (int, float)): lines.append(f"{prefix}_{k.replace('.', '_')} {v}")
+        with self.lock:
+            hists = {k: (list(h.bucket_counts), h.count, h.sum) for k, h in self.hists.items()}
+        for stage, (counts, count, total) in sorted(hists.items()):
+            metric = f"{prefix}_stage_seconds"
+            cum = 0
+            for bound, c in zip(BUCKETS + ("+Inf",), counts):
+                cum += c
+                lines.append(f'{metric}_bucket{{stage="{stage}",le="{bound}"}} {cum}')
+            lines.append(f'{metric}_sum{{stage="{stage}"}} {total:.6f}')
+            lines.append(f'{metric}_count{{stage="{stage}"}} {count}')
+            s = snap["stages"][stage]
+            for q in ("p50", "p90", "p99"):
+                if q in s: lines.append(f'{prefix}_stage_window_seconds{{stage="{stage}",quantile="0.{q[1:]}"}} {s[q]:.6f}')
+        return "\n".join(lines) + "\n"
+
+    def write_file(self, path):
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f: json.dump(self.snapshot(), f, indent=2)
+        os.replace(tmp, path)
+
+    def start_file_exporter(self, path, interval=METRICS_INTERVAL_SEC):
+        def loop():
+            while True:
+                time.sleep(interval)
+                try: self.write_file(path)
+                except Exception as e: print(f"⚠️ Metrics write failed: {e}")
+        threading.Thread(target=loop, name="metrics-file", daemon=True).start()
+
+    def serve(self, port, host="127.0.0.1"):
+        """Endpoint scrape lokal di thread daemon. Return server (port 0 -> port random, cek server.server_port)."""
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.startswith("/metrics.json"):
+                    body, ctype = json.dumps(metrics.snapshot()).encode(), "application/json"
+                elif self.path.startswith("/metrics"):
+                    body, ctype = metrics.render_prometheus().encode(), "text/plain; version=0.0.4"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", ctype)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args): pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+        return server
+
+METRICS = Metrics()
+
+def start_exporters():
+    """Nyalain export sesuai env (METRICS_FILE / METRICS_PORT). Return list yang aktif buat log."""
+    active = []
+    path = os.getenv("METRICS_FILE")
+    if path:
+        METRICS.start_file_exporter(path)
+        active.append(f"file {path} (/{METRICS_INTERVAL_SEC:g}s)")
+    port = os.getenv("METRICS_PORT")
+    if port:
+        server = METRICS.serve(int(port))
+        active.append(f"http://127.0.0.1:{server.server_port}/metrics")
+    return active
@@ -0,0 +1,94 @@
+from collections import deque
+
+import pandas as pd
+
+from src.indicators import _fold_pivot, _label_pivot, _summarize_structure
+
+class PivotTracker:
+    """
+    Versi incremental get_market_structure (ZigZag M15).
+    Makan bar yang udah close satu per satu, pivot di-confirm setelah `window` bar lewat,
+    terus di-fold pakai logic yang sama (outside bar compression + alternating).
+    Replay history yang sama (atr_val konstan, max_bars=None) -> hasil identik sama versi batch.
+    """
+    def __init__(self, point=0.01, atr_val=1.0, window=5, max_pivots=64):
+        self.window = window
+        self.max_pivots = max_pivots
+        self.eps = point * 1.0
+        self.set_atr(atr_val)
+        self.reset()
+
+    def reset(self):
+        self.bars = deque(maxlen=self.window * 2 + 1) # (high, low, time_str)
+        self.count = 0
+        self.clean_pivots = []
+        self.last_ts = None
+
+    def set_atr(self, atr_val):
+        """Update min_dev (berlaku buat pivot yang masuk setelah ini)."""
+        if pd.isna(atr_val) or atr_val <= 0: atr_val = 1.0
+        self.min_dev = max(1.0, atr_val * 0.3)
+
+    def push(self, ts, high, low):
+        """Tambah 1 bar close. Return True kalau list pivot berubah."""
+        self.bars.append((float(high), float(low), str(ts)))
+        self.count += 1
+        self.last_ts = ts
+        if len(self.bars) < self.bars.maxlen: return False
+
+        w = self.window
+        c_high, c_low, c_time = self.bars[w]
+        pos = self.count - 1 - w
+        win_high = max(b[0] for b in self.bars)
+        win_low = min(b[1] for b in self.bars)
+
+        changed = False
+        # Urutan sama kayak batch: Low dulu baru High di posisi yang sama
+        if c_low <= (win_low + self.eps):
+            changed |= self._fold({"pos": pos, "type": "Low", "price": c_low, "time": c_time})
+        if c_high >= (win_high - self.eps):
+            changed |= self._fold({"pos": pos, "type": "High", "price": c_high, "time": c_time})
+        return changed
+
+    def _fold(self, p):
+        clean = self.clean_pivots
+        n_before, last_before = len(clean), (clean[-1] if clean else None)
+        _fold_pivot(clean, p, self.min_dev)
+        if len(clean) == n_before and clean[-1] is last_before: return False
+
+        # Cuma elemen terakhir yang bisa berubah, jadi label cukup dihitung ulang buat dia
+        last = clean[-1]
+        prev_same = None
+        for q in reversed(clean[:-1]):
+            if q['type'] == last['type']:
+                prev_same = q
+                break
+        _label_pivot(last, prev_same)
+
+        if len(clean) > self.max_pivots: del clean[:-self.max_pivots]
+        return True
+
+    def sync(self, df, atr_val=None):
+        """
+        Sync ke frame OHLC (bar terakhir = candle berjalan, gak ikut di-push).
+        Kalau history bolong / ke-rewrite, state di-reset dan frame di-replay dari awal.
+        """
+        if atr_val is not None: self.set_atr(atr_val)
+        n = len(df)
+        if n < 2: return self.structure()
+        idx = df.index
+        start = 0
+        if self.last_ts is not None:
+            pos = idx.searchsorted(self.last_ts, side="right")
+            if pos == 0 or pos > n - 1 or idx[pos - 1] != self.last_ts: self.reset()
+            else: start = pos
+
+        high = df['High'].to_numpy()
+        low = df['Low'].to_numpy()
+        for i in range(start, n - 1): self.push(idx[i], high[i], low[i])
+        return self.structure()
+
+    def structure(self):
+        """Output sama kayak get_market_structure: (recent_pivots, sequence_str, last_pivot, last_3_legs)."""
+        if self.count < (self.window * 2 + 10): return [], "Insufficient Data", None, []
+        return _summarize_structure(self.clean_pivots[-5:] if len(self.clean_pivots) >= 3 else list(self.clean_pivots))
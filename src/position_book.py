@@ -0,0 +1,217 @@
+"""
+Position book in-memory + write-ahead journal (pengganti baca/tulis signal_state.json tiap poll).
+
+- Sumber kebenaran = dict in-memory (per simbol). Cek TP/SL/expiry lewat TriggerIndex per simbol
+  (O(log n + k) level yang kelewat), nol I/O.
+- Tiap perubahan (open/close) di-append ke journal JSONL (write + fsync) SEBELUM dianggap sukses.
+- Tiap COMPACT_EVERY record: snapshot atomic (tmp + fsync + replace) + journal dikosongin.
+  Record punya seq; replay skip seq <= seq snapshot, jadi crash di tengah compaction aman.
+- Startup: snapshot + replay journal. Baris terakhir setengah ketulis (crash pas append) dibuang;
+  baris korup di tengah -> book di-lock (fail-safe, sama kayak state korup dulu: gak buka signal baru).
+- Migrasi: signal_state*.json lama yang masih aktif di-import sekali (file di-rename .migrated).
+- db (SignalDB, opsional): open/close yang sukses dicatat juga ke tabel outcomes (non-blocking).
+"""
+import json
+import os
+import threading
+import time
+
+from src.metrics import METRICS
+from src.state_manager import BASE_DIR, build_state, load_state
+from src.trigger_index import TriggerIndex
+
+JOURNAL_PATH = os.path.join(BASE_DIR, "positions.journal")
+SNAPSHOT_PATH = os.path.join(BASE_DIR, "positions.snapshot.json")
+COMPACT_EVERY = 200 # Record journal sebelum compaction
+MAX_OPEN_PER_SYMBOL = int(os.getenv("MAX_OPEN_PER_SYMBOL", "1")) # 1 = perilaku lama (1 signal aktif)
+
+class PositionBook:
+    def __init__(self, journal_path=JOURNAL_PATH, snapshot_path=SNAPSHOT_PATH, compact_every=COMPACT_EVERY,
+                 max_open_per_symbol=MAX_OPEN_PER_SYMBOL, fsync=True, db=None):
+        self.journal_path = journal_path
+        self.snapshot_path = snapshot_path
+        self.compact_every = compact_every
+        self.max_open_per_symbol = max_open_per_symbol
+        self.fsync = fsync
+        self.db = db
+        self.lock = threading.RLock()
+        self.positions = {} # symbol -> {id: posisi}
+        self.triggers = {}  # symbol -> TriggerIndex
+        self.seq = 0
+        self.journal_records = 0
+        self.corrupt = False
+        self.fh = None
+        self.stats = {"opened": 0, "closed": 0, "compactions": 0, "replayed": 0, "write_errors": 0}
+        self.recover()
+
+    # --- RECOVERY ---
+    def recover(self):
+        with self.lock:
+            self.positions = {}
+            self.triggers = {}
+            snap_seq = 0
+            if os.path.exists(self.snapshot_path):
+                try:
+                    with open(self.snapshot_path) as f: snap = json.load(f)
+                    snap_seq = self.seq = int(snap["seq"])
+                    for pos in snap["positions"]: self._add(pos)
+                except (OSError, ValueError, KeyError, TypeError) as e:
+                    self._lock_corrupt(f"snapshot unreadable: {e}")
+            self._replay(snap_seq)
+            self.fh = open(self.journal_path, "a", encoding="utf-8")
+
+    def _replay(self, snap_seq):
+        if not os.path.exists(self.journal_path): return
+        with open(self.journal_path, "rb") as f: raw = f.read()
+        lines = raw.split(b"\n")
+        if lines[-1]:
+            # Ekor tanpa newline = append yang crash sebelum selesai (belum pernah di-ack) -> buang
+            print(f"⚠️ Journal: torn tail ({len(lines[-1])} bytes) dropped")
+            with open(self.journal_path, "r+b") as f: f.truncate(len(raw) - len(lines[-1]))
+        for i, line in enumerate(lines[:-1]):
+            if not line.strip(): continue
+            try: rec = json.loads(line)
+            except ValueError:
+                self._lock_corrupt(f"bad journal line {i + 1}")
+                return
+            self.journal_records += 1
+            if rec.get("seq", 0) <= snap_seq: continue
+            self._apply(rec)
+            self.stats["replayed"] += 1
+
+    def _lock_corrupt(self, why):
+        self.corrupt = True
+        print(f"🚨 POSITION BOOK CORRUPT ({why}). New signals locked until files are fixed.")
+
+    def import_legacy(self, symbol, path):
+        """signal_state*.json lama -> posisi di book (sekali). Return True kalau ada yang di-import."""
+        state = load_state(path)
+        if state is None: return False
+        if state.get("corrupt"):
+            self._lock_corrupt(f"legacy state {os.path.basename(path)} corrupt")
+            return False
+        imported = already = False
+        if state.get("active") and state.get("type") in ("BUY", "SELL"):
+            with self.lock:
+                # Crash antara journal open & rename -> posisinya udah ada di book, jangan di-import 2x
+                already = any(p.get("type") == state["type"] and
+                              p.get("opened_at_candle_ts") == state.get("opened_at_candle_ts")
+                              for p in self.positions.get(symbol, {}).values())
+                if not already:
+                    imported = self._write({"op": "open", "pos": {**state, "symbol": symbol}}) is not None
+        if imported or already or not state.get("active"):
+            try: os.rename(path, path + ".migrated")
+            except OSError: pass
+        return imported
+
+    # --- JOURNAL ---
+    def _apply(self, rec):
+        self.seq = max(self.seq, int(rec.get("seq", 0)))
+        if rec["op"] == "open": self._add(rec["pos"])
+        elif rec["op"] == "close":
+            if self.positions.get(rec["symbol"], {}).pop(rec["id"], None) is not None:
+                self.triggers[rec["symbol"]].remove(rec["id"])
+
+    def _add(self, pos):
+        self.positions.setdefault(pos["symbol"], {})[pos["id"]] = pos
+        self.triggers.setdefault(pos["symbol"], TriggerIndex()).add(pos["id"], pos)
+
+    def _write(self, rec):
+        """Append record ke journal (fsync) lalu apply ke memory. Return record, atau None kalau gagal nulis."""
+        rec = {**rec, "seq": self.seq + 1}
+        if rec["op"] == "open" and "id" not in rec["pos"]:
+            rec["pos"] = {**rec["pos"], "id": f"{rec['pos']['symbol']}-{rec['seq']}"}
+        start = self.fh.tell()
+        try:
+            with METRICS.stage("state_fsync"):
+                self.fh.write(json.dumps(rec, separators=(",", ":")) + "\n")
+                self.fh.flush()
+                if self.fsync: os.fsync(self.fh.fileno())
+        except Exception as e:
+            self.stats["write_errors"] += 1
+            print(f"🚨 JOURNAL WRITE FAILED: {e}")
+            try: self.fh.truncate(start) # Jangan ninggalin baris setengah jadi di tengah journal
+            except Exception: pass
+            return None
+        self._apply(rec)
+        self.journal_records += 1
+        if self.journal_records >= self.compact_every: self.compact()
+        return rec
+
+    def compact(self):
+        """Snapshot posisi aktif (atomic) + kosongin journal."""
+        with self.lock:
+            snap = {"seq": self.seq, "positions": [p for by_id in self.positions.values() for p in by_id.values()]}
+            tmp = self.snapshot_path + ".tmp"
+            try:
+                with open(tmp, "w") as f:
+                    json.dump(snap, f)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp, self.snapshot_path)
+                self.fh.close()
+                self.fh = open(self.journal_path, "w", encoding="utf-8") # Record lama udah ketutup snapshot
+                self.journal_records = 0
+                self.stats["compactions"] += 1
+            except Exception as e:
+                print(f"⚠️ Journal compaction failed: {e}")
+
+    # --- API ---
+    def open(self, symbol, sig_type, sl, tp, entry, reason="", candle_ts=0):
+        """Buka posisi (durable sebelum return). Return posisi, atau None kalau gagal/locked."""
+        with self.lock:
+            if not self.can_open(symbol): return None
+            pos = {**build_state(True, sig_type, sl, tp, entry, reason, candle_ts), "symbol": symbol}
+            rec = self._write({"op": "open", "pos": pos})
+            if rec is None: return None
+            self.stats["opened"] += 1
+            if self.db: self.db.record_open(rec["pos"])
+            return rec["pos"]
+
+    def close(self, pos, status):
+        with self.lock:
+            if pos["id"] not in self.positions.get(pos["symbol"], {}): return False
+            rec = self._write({"op": "close", "symbol": pos["symbol"], "id": pos["id"], "status": status,
+                               "closed_at_wall_ts": int(time.time())})
+            if rec is None: return False
+            self.stats["closed"] += 1
+            if self.db: self.db.record_close(pos, status, rec["closed_at_wall_ts"])
+            return True
+
+    def active(self, symbol=None):
+        with self.lock:
+            if symbol is not None: return list(self.positions.get(symbol, {}).values())
+            return [p for by_id in self.positions.values() for p in by_id.values()]
+
+    def can_open(self, symbol):
+        return not self.corrupt and len(self.positions.get(symbol, {})) < self.max_open_per_symbol
+
+    def open_block_reason(self, symbol):
+        """Kenapa open() bakal ditolak sebelum nulis journal: "BOOK LOCKED" / "BOOK FULL", None kalau boleh."""
+        if self.corrupt: return "BOOK LOCKED (corrupt)"
+        if not self.can_open(symbol): return f"BOOK FULL ({self.max_open_per_symbol} open)"
+        return None
+
+    def evaluate(self, symbol, high, low, bid=0, ask=0):
+        """Posisi simbol yang kena TP/SL/expiry -> list (posisi, status). In-memory doang, belum di-close."""
+        with self.lock:
+            index = self.triggers.get(symbol)
+            if not index: return []
+            by_id = self.positions[symbol]
+            return [(by_id[pid], status) for pid, status in index.query(high, low, bid, ask).items()]
+
+    def resolve(self, symbol, high, low, bid=0, ask=0):
+        """evaluate + close yang kena. Return list (posisi, status) yang baru ditutup."""
+        closed = []
+        for pos, status in self.evaluate(symbol, high, low, bid, ask):
+            if self.close(pos, status): closed.append((pos, status))
+        return closed
+
+    def gate_status(self, symbol):
+        """Status gaya lama buat gate AI: "NONE" = boleh buka signal baru, "STILL_OPEN" = penuh / locked."""
+        return "NONE" if self.can_open(symbol) else "STILL_OPEN"
+
+    def close_file(self):
+        with self.lock:
+            if self.fh: self.fh.close()
+            self.fh = None
@@ -0,0 +1,87 @@
+"""
+Runner pre-flight check berbasis dependency graph.
+Check independen (data feed, API key, AI ping) jalan paralel di thread pool,
+check turunan jalan begitu dependensinya lolos. Semua dibatasi 1 deadline total.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+class Check:
+    """fn(ctx) -> (ok, detail, value). ctx = {nama_check: value} dari dependensi yang udah lolos."""
+    def __init__(self, name, label, fn, deps=()):
+        self.name = name
+        self.label = label
+        self.fn = fn
+        self.deps = tuple(deps)
+
+def _run_one(check, ctx):
+    t0 = time.perf_counter()
+    try:
+        ok, detail, value = check.fn(ctx)
+    except Exception as e:
+        ok, detail, value = False, f"Error: {e}", None
+    return ok, detail, value, time.perf_counter() - t0
+
+def _cycle_members(pending, by_name):
+    """Check pending yang nyampe ke dirinya sendiri lewat deps (bagian dari cycle)."""
+    members = []
+    for name in pending:
+        stack, seen = [d for d in by_name[name].deps if d in pending], set()
+        while stack:
+            d = stack.pop()
+            if d == name:
+                members.append(name)
+                break
+            if d in seen: continue
+            seen.add(d)
+            stack.extend(x for x in by_name[d].deps if x in pending)
+    return members
+
+def run_checks(checks, deadline_sec=30.0, max_workers=4):
+    """
+    Return (all_ok, results, ctx).
+    results = {nama: {"status": OK|FAILED|SKIPPED|TIMEOUT, "detail", "elapsed"}} (urut sesuai `checks`).
+    """
+    by_name = {c.name: c for c in checks}
+    results, ctx, running = {}, {}, {}
+    deadline = time.perf_counter() + deadline_sec
+    for c in checks:
+        unknown = [d for d in c.deps if d not in by_name]
+        if unknown: results[c.name] = {"status": "FAILED", "detail": f"unknown dependency {', '.join(unknown)}", "elapsed": 0.0}
+    pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="preflight")
+    try:
+        while len(results) < len(checks):
+            # Submit check yang semua dependensinya udah selesai
+            for c in checks:
+                if c.name in results or c.name in running: continue
+                failed_dep = next((d for d in c.deps if d in results and results[d]["status"] != "OK"), None)
+                if failed_dep:
+                    results[c.name] = {"status": "SKIPPED", "detail": f"needs {by_name[failed_dep].label}", "elapsed": 0.0}
+                elif all(d in results for d in c.deps):
+                    running[c.name] = pool.submit(_run_one, c, {d: ctx.get(d) for d in c.deps})
+            if not running:
+                # Gak ada yang jalan & gak ada yang bisa di-submit -> sisa pending nunggu cycle
+                pending = {c.name for c in checks if c.name not in results}
+                for name in _cycle_members(pending, by_name):
+                    results[name] = {"status": "FAILED", "detail": "dependency cycle", "elapsed": 0.0}
+                continue
+
+            remaining = deadline - time.perf_counter()
+            done, _ = wait(running.values(), timeout=max(0.0, remaining), return_when=FIRST_COMPLETED)
+            if not done:
+                for c in checks:
+                    if c.name not in results:
+                        results[c.name] = {"status": "TIMEOUT", "detail": f"deadline {deadline_sec:g}s",
+                                           "elapsed": deadline_sec if c.name in running else 0.0}
+                break
+            for name, fut in list(running.items()):
+                if fut not in done: continue
+                ok, detail, value, elapsed = fut.result()
+                results[name] = {"status": "OK" if ok else "FAILED", "detail": detail, "elapsed": elapsed}
+                if ok: ctx[name] = value
+                del running[name]
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True) # Check yang nge-hang (timeout) gak ditunggu
+
+    ordered = {c.name: results[c.name] for c in checks}
+    return all(r["status"] == "OK" for r in ordered.values()), ordered, ctx
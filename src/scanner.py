@@ -0,0 +1,178 @@
+"""
+Scanner multi simbol: 1 request GET_MULTI per poll buat semua simbol di registry, cek TP/SL per simbol,
+calculate_rules di thread pool (cuma simbol yang candle-nya baru close), AI judge di worker (verdict
+diterapin poll berikutnya) + notif per simbol. Alur per signal bareng run_bot/async (src/signal_flow.py).
+
+Biaya per simbol dibatasin:
+- IndicatorEngine sendiri per simbol (EMA/ATR streaming O(1) per candle)
+- Evaluasi cuma di candle gate; max 1 evaluasi in-flight per simbol
+- Poll nunggu hasil maksimal SCAN_DEADLINE_SEC; yang belum selesai diambil poll berikutnya (dihitung late)
+- AI judge gak pernah ditunggu di loop scan; max 1 judge in-flight per simbol
+"""
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime
+
+from src.data_loader import get_multi_market_data
+from src.indicators import calculate_rules
+from src.indicator_engine import IndicatorEngine
+from src.logger import TradeLogger
+from src.ai_engine import ask_ai_judge
+from src.metrics import METRICS
+from src.contract_utils import get_broker_timestamp, bar_timestamp, build_ai_metrics
+from src.signal_flow import announce_closed, judge_candidate, apply_verdict
+
+SCAN_WORKERS = int(os.getenv("SCAN_WORKERS", "0")) # 0 = min(8, jumlah simbol)
+SCAN_DEADLINE_SEC = 1.5 # Budget tunggu evaluasi per poll (poll 2 detik)
+
+class SymbolState:
+    def __init__(self, spec, track_structure=False):
+        self.spec = spec
+        self.engine = IndicatorEngine(track_structure=track_structure)
+        self.logger = TradeLogger(filename_prefix=spec.log_prefix)
+        self.last_candle_ts = None
+        self.last_logged_ts = None
+        self.last_ai_fingerprint = None
+        self.last_alert_ts = 0
+        self.price_checked = False
+        self.future = None # (future, current_ts, tick) evaluasi yang lagi jalan
+        self.judging = None # (future, signal, setup, current_ts) AI judge yang lagi jalan
+
+class SymbolScanner:
+    def __init__(self, registry, notify, book, cache=None, workers=None, deadline_sec=SCAN_DEADLINE_SEC,
+                 max_candle_age_sec=480, track_structure=False, db=None):
+        self.registry = registry
+        self.notify = notify
+        self.book = book # PositionBook bareng (posisi per simbol)
+        self.cache = cache
+        self.db = db # SignalDB (opsional): contract + verdict per simbol
+        self.deadline_sec = deadline_sec
+        self.max_candle_age_sec = max_candle_age_sec
+        self.states = {spec.name: SymbolState(spec, track_structure) for spec in registry}
+        workers = workers or SCAN_WORKERS or min(8, len(registry))
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="scan")
+        self.judge_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="scan-judge")
+        self.stats = {"polls": 0, "evaluated": 0, "late": 0, "stale": 0, "missing": 0, "judged": 0, "judge_busy": 0}
+
+    def _alert(self, st, msg, every_sec=600):
+        now = time.time()
+        if now - st.last_alert_ts > every_sec:
+            print(msg)
+            self.notify(msg)
+            st.last_alert_ts = now
+
+    def _evaluate(self, st, data):
+        with METRICS.stage(f"rules:{st.spec.name}"):
+            return calculate_rules(data, engine=st.engine, params=st.spec.rule_overrides())
+
+    def poll(self):
+        """1 putaran scan. Return jumlah simbol yang dapet data."""
+        self.stats["polls"] += 1
+        self._apply_verdicts()
+        batch = get_multi_market_data(self.registry.names())
+        self.stats["missing"] += len(self.registry) - len(batch)
+        for sym, data in batch.items():
+            st = self.states.get(sym)
+            if st is None or data['m5'].empty: continue
+            self._ingest(st, data)
+        self._collect()
+        return len(batch)
+
+    def _ingest(self, st, data):
+        name = st.spec.name
+        last_bar = data['m5'].iloc[-1]
+        current_ts = bar_timestamp(last_bar)
+        if not st.price_checked:
+            st.price_checked = True
+            if not st.spec.price_ok(float(last_bar['Close'])):
+                print(f"⚠️ {name}: price {last_bar['Close']} outside {st.spec.price_range}, cek simbol/params")
+
+        broker_ts = get_broker_timestamp(data.get('meta', {}))
+        candle_age = broker_ts - current_ts
+        if broker_ts <= 0 or abs(candle_age) > self.max_candle_age_sec:
+            self.stats["stale"] += 1
+            self._alert(st, f"⚠️ <b>{name} DATA FREEZE</b>\nCandle gap {candle_age:.0f}s. Symbol paused.")
+            return
+
+        tick = data.get("tick", {})
+        bid = float(tick.get("bid", 0) or 0)
+        ask = float(tick.get("ask", 0) or 0)
+        with METRICS.stage("status"): closed = self.book.resolve(name, last_bar['High'], last_bar['Low'], bid, ask)
+        announce_closed(closed, self.notify, name)
+
+        if current_ts != st.last_candle_ts and st.future is None:
+            # Frame dari CandleStore udah snapshot immutable -> aman dioper ke worker tanpa copy
+            st.future = (self.pool.submit(self._evaluate, st, dict(data)), current_ts, tick)
+            st.last_candle_ts = current_ts
+
+    def _collect(self):
+        pending = {st.future[0]: st for st in self.states.values() if st.future}
+        if not pending: return
+        done, not_done = wait(pending, timeout=self.deadline_sec)
+        self.stats["late"] += len(not_done)
+        if not_done: METRICS.inc("scan_late", len(not_done))
+        for fut in done:
+            st = pending[fut]
+            _, current_ts, tick = st.future
+            st.future = None
+            try: contract = fut.result()
+            except Exception as e:
+                print(f"❌ {st.spec.name} rules error: {e}")
+                continue
+            self.stats["evaluated"] += 1
+            self._handle(st, contract, current_ts, tick)
+
+    def _handle(self, st, contract, current_ts, tick):
+        name = st.spec.name
+        if "Critical Lag" in contract["reason"] or "Severe Clock Drift" in contract["reason"]:
+            self._alert(st, f"⚠️ <b>{name} CONNECTION UNSTABLE</b>\nReason: {contract['reason']}", every_sec=300)
+        obs_status = "Wait" if contract["signal"] == "WAIT" else f"SIGNAL {contract['signal']}"
+        candle = contract.get("meta", {}).get("candle", {})
+        print(f"[{datetime.now().strftime('%H:%M:%S')}] {name} P:{candle.get('close', '-')} | {obs_status} | {contract['reason']}")
+
+        if current_ts != st.last_logged_ts:
+            with METRICS.stage("log"): st.logger.log_contract(contract)
+            if self.db: self.db.record_contract(name, contract)
+            st.last_logged_ts = current_ts
+
+        if not self.book.can_open(name): return
+        cand = judge_candidate(contract, current_ts, tick, st.last_ai_fingerprint, name)
+        if cand is None: return
+        if st.judging is not None: # Judge sebelumnya belum balik -> kandidat ini dilewat
+            self.stats["judge_busy"] += 1
+            return
+        signal, setup, st.last_ai_fingerprint = cand
+        print(f"🤖 {name} AI Judging {signal}...")
+        metrics = {**build_ai_metrics(contract), "symbol": name}
+        fut = self.judge_pool.submit(METRICS.timed, "ai", ask_ai_judge, signal, contract["reason"], metrics, self.cache)
+        st.judging = (fut, signal, setup, current_ts)
+
+    def _apply_verdicts(self):
+        """Verdict AI yang udah balik -> notif + open (non-blocking, dipanggil tiap poll)."""
+        for st in self.states.values():
+            if st.judging is None or not st.judging[0].done(): continue
+            fut, signal, setup, current_ts = st.judging
+            st.judging = None
+            try: judge = fut.result()
+            except Exception as e:
+                print(f"❌ {st.spec.name} AI judge error: {e}")
+                continue
+            self.stats["judged"] += 1
+            apply_verdict(self.book, st.spec.name, signal, setup, judge, current_ts, self.notify, self.db, st.spec.name)
+
+    def run(self, poll_sec=2.0):
+        print(f"🛰️ Scanning {len(self.registry)} symbols: {', '.join(self.registry.names())}")
+        while True:
+            t_iter = time.perf_counter()
+            try:
+                got = self.poll()
+                METRICS.iteration(time.perf_counter() - t_iter, poll_sec, None if got else "no_data")
+                time.sleep(poll_sec if got else 5)
+            except KeyboardInterrupt: raise
+            except Exception as e:
+                METRICS.inc("errors")
+                err_msg = f"❌ <b>SCANNER CRASHED</b>\nError: {str(e)}"
+                print(err_msg)
+                self.notify(err_msg)
+                time.sleep(10)
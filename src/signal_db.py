@@ -0,0 +1,233 @@
+"""
+Database signal (SQLite WAL): contract per candle, verdict AI, dan outcome posisi (TP/SL/EXPIRED) di 1 file,
+ke-index per waktu / simbol / signal / reason. Buat pertanyaan kayak "win rate BUY dengan pivot OBS
+sesi London bulan lalu" tanpa grep CSV (lihat query_signals.py).
+
+Tabel:
+  signals   1 row per (symbol, candle ts): signal, reason, harga, setup, struktur M15, jam UTC
+  verdicts  tiap AI judge (decision + reason, cached/speculative)
+  outcomes  1 row per posisi (id PositionBook): OPEN -> TP_HIT/SL_HIT/EXPIRED, join ke signals via (symbol, ts)
+
+Tulis non-blocking: record_* cuma bikin tuple + masuk batch, thread background commit per batch
+(DB_FLUSH_SEC / DB_BATCH_SIZE), flush pas exit. Query pakai koneksi read-only terpisah (WAL: gak ganggu writer).
+"""
+import csv
+import os
+import sqlite3
+import time
+from datetime import datetime, timezone
+
+from src.batch_writer import BatchWriter
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_PATH = os.getenv("SIGNAL_DB", os.path.join(BASE_DIR, "signals.db")) # "" = matiin
+DB_FLUSH_SEC = 2.0
+DB_BATCH_SIZE = 200
+MAX_PENDING = 20000
+SESSIONS = {"asia": (0, 7), "london": (7, 16), "newyork": (12, 21), "overlap": (12, 16)} # Jam UTC [start, end)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS signals (
+    id INTEGER PRIMARY KEY,
+    ts INTEGER NOT NULL,            -- candle M5 (epoch UTC)
+    symbol TEXT NOT NULL,
+    signal TEXT NOT NULL,
+    reason TEXT,
+    hour_utc INTEGER,
+    price REAL, spread REAL, tick_lag_sec REAL,
+    entry REAL, sl REAL, tp REAL,
+    trend_m15 TEXT, ob_status TEXT,
+    last_pivot_type TEXT, last_pivot_is_obs INTEGER,
+    warnings TEXT,
+    source TEXT DEFAULT 'live',
+    UNIQUE (symbol, ts)
+);
+CREATE INDEX IF NOT EXISTS ix_signals_ts ON signals (ts);
+CREATE INDEX IF NOT EXISTS ix_signals_signal_ts ON signals (signal, ts);
+CREATE INDEX IF NOT EXISTS ix_signals_reason_ts ON signals (reason, ts);
+
+CREATE TABLE IF NOT EXISTS verdicts (
+    id INTEGER PRIMARY KEY,
+    ts INTEGER NOT NULL,            -- candle yang di-judge
+    symbol TEXT NOT NULL,
+    signal TEXT NOT NULL,
+    decision TEXT NOT NULL,
+    reason TEXT,
+    cached INTEGER DEFAULT 0,
+    speculative INTEGER DEFAULT 0,
+    wall_ts INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_verdicts_symbol_ts ON verdicts (symbol, ts);
+CREATE INDEX IF NOT EXISTS ix_verdicts_decision_ts ON verdicts (decision, ts);
+
+CREATE TABLE IF NOT EXISTS outcomes (
+    position_id TEXT PRIMARY KEY,
+    symbol TEXT NOT NULL,
+    signal TEXT NOT NULL,
+    ts INTEGER NOT NULL,            -- candle pas dibuka (= signals.ts)
+    entry REAL, sl REAL, tp REAL,
+    reason TEXT,                    -- alasan AI
+    status TEXT NOT NULL DEFAULT 'OPEN',
+    opened_wall_ts INTEGER,
+    closed_wall_ts INTEGER
+);
+CREATE INDEX IF NOT EXISTS ix_outcomes_symbol_ts ON outcomes (symbol, ts);
+CREATE INDEX IF NOT EXISTS ix_outcomes_status_ts ON outcomes (status, ts);
+"""
+
+SIGNAL_COLS = ("ts", "symbol", "signal", "reason", "hour_utc", "price", "spread", "tick_lag_sec", "entry", "sl", "tp",
+               "trend_m15", "ob_status", "last_pivot_type", "last_pivot_is_obs", "warnings", "source")
+UPSERT_SIGNAL = (f"INSERT INTO signals ({', '.join(SIGNAL_COLS)}) VALUES ({', '.join('?' * len(SIGNAL_COLS))}) "
+                 f"ON CONFLICT (symbol, ts) DO UPDATE SET "
+                 + ", ".join(f"{c} = excluded.{c}" for c in SIGNAL_COLS[2:]))
+INSERT_SIGNAL_IGNORE = UPSERT_SIGNAL.split(" ON CONFLICT")[0].replace("INSERT", "INSERT OR IGNORE", 1)
+INSERT_VERDICT = ("INSERT INTO verdicts (ts, symbol, signal, decision, reason, cached, speculative, wall_ts) "
+                  "VALUES (?, ?, ?, ?, ?, ?, ?, ?)")
+INSERT_OPEN = ("INSERT OR REPLACE INTO outcomes (position_id, symbol, signal, ts, entry, sl, tp, reason, opened_wall_ts) "
+               "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)")
+UPDATE_CLOSE = "UPDATE outcomes SET status = ?, closed_wall_ts = ? WHERE position_id = ?"
+
+def connect(path=DB_PATH, readonly=False):
+    if readonly: conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    else:
+        conn = sqlite3.connect(path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL") # WAL: commit gak fsync, checkpoint yang fsync
+        conn.executescript(SCHEMA)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+def _num(v):
+    try: return float(v)
+    except (TypeError, ValueError): return None
+
+def contract_row(symbol, contract, source="live"):
+    """Contract calculate_rules -> tuple kolom SIGNAL_COLS. None kalau contract gak layak disimpan."""
+    ts_obj = contract.get("timestamp")
+    if ts_obj is None or contract.get("reason") in ("Initializing...", "Data Empty"): return None
+    meta = contract.get("meta", {})
+    inds = meta.get("indicators", {})
+    structure = inds.get("m15_structure", {})
+    setup = contract.get("setup") or {}
+    is_obs = structure.get("last_pivot_is_obs")
+    return (int(ts_obj.timestamp()), symbol, contract.get("signal"), contract.get("reason"), ts_obj.hour,
+            _num(meta.get("candle", {}).get("close")), _num(meta.get("spread")), _num(meta.get("tick_lag_sec")),
+            _num(setup.get("entry")), _num(setup.get("sl")), _num(setup.get("tp")),
+            inds.get("trend_m15"), inds.get("ob_status"), structure.get("last_pivot_type"),
+            None if is_obs is None else int(bool(is_obs)), "; ".join(meta.get("warnings", [])), source)
+
+class SignalDB:
+    def __init__(self, path=DB_PATH, flush_sec=DB_FLUSH_SEC, batch_size=DB_BATCH_SIZE):
+        self.path = path
+        self.conn = connect(path)
+        self.writer = BatchWriter(self._commit, "signal-db", batch_size, flush_sec, MAX_PENDING, "signal_db",
+                                  "Signal DB Error", errors=(sqlite3.Error,)) # item = (sql, params)
+        self.stats = self.writer.stats
+
+    # --- RECORD (non-blocking) ---
+    def _put(self, sql, params):
+        self.writer.put((sql, params))
+
+    def record_contract(self, symbol, contract):
+        row = contract_row(symbol, contract)
+        if row: self._put(UPSERT_SIGNAL, row)
+
+    def record_verdict(self, symbol, signal, candle_ts, judge):
+        self._put(INSERT_VERDICT, (int(candle_ts), symbol, signal, str(judge.get("decision", "REJECT")).strip().upper(),
+                                   judge.get("reason"), int(bool(judge.get("cached"))),
+                                   int(bool(judge.get("speculative"))), int(time.time())))
+
+    def record_open(self, pos):
+        self._put(INSERT_OPEN, (pos["id"], pos["symbol"], pos["type"], int(pos.get("opened_at_candle_ts", 0)),
+                                pos.get("entry"), pos.get("sl"), pos.get("tp"), pos.get("reason"),
+                                int(pos.get("opened_at_wall_ts", 0))))
+
+    def record_close(self, pos, status, wall_ts=None):
+        self._put(UPDATE_CLOSE, (status, int(wall_ts or time.time()), pos["id"]))
+
+    # --- WRITER ---
+    def _commit(self, items):
+        """Semua item batch dalam 1 transaksi."""
+        with self.conn:
+            for sql, params in items: self.conn.execute(sql, params)
+
+    def flush(self):
+        """Commit semua yang numpuk sekarang. Return True kalau beres."""
+        return self.writer.flush()
+
+    # --- BACKFILL ---
+    def backfill_csv(self, path, symbol):
+        """logs/trade_log_*.csv (TradeLogger) -> signals (source='csv'). Row live yang udah ada gak ditimpa."""
+        rows = []
+        with open(path, newline="", encoding="utf-8") as f:
+            for rec in csv.DictReader(f):
+                if rec.get("reason") in ("Initializing...", "Data Empty"): continue
+                try: ts = datetime.strptime(rec["timestamp_wib"], "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc)
+                except (KeyError, ValueError): continue # timestamp contract = candle UTC
+                rows.append((int(ts.timestamp()), symbol, rec.get("signal"), rec.get("reason"), ts.hour,
+                             _num(rec.get("price_close_m5")), _num(rec.get("spread")), _num(rec.get("tick_lag_sec")),
+                             None, None, None, None, None, None, None, rec.get("warnings") or "", "csv"))
+        self.flush()
+        with self.writer.write_lock, self.conn:
+            before = self.conn.total_changes
+            self.conn.executemany(INSERT_SIGNAL_IGNORE, rows)
+            return self.conn.total_changes - before
+
+    def close(self, timeout=5.0):
+        """Flush terakhir + stop thread writer + lepas hook atexit, lalu tutup koneksi."""
+        self.writer.close(timeout)
+        with self.writer.write_lock: self.conn.close()
+
+# --- QUERY ---
+def build_filters(symbol=None, signal=None, since=None, until=None, session=None, reason=None, obs=None,
+                  alias="s"):
+    """
+    Filter -> (klausa WHERE, params). reason: exact, 'prefix%' (range, tetap kena index reason),
+    atau pola '%' lain (LIKE, scan).
+    """
+    where, params = [], []
+    if since is not None: where.append(f"{alias}.ts >= ?"); params.append(int(since))
+    if until is not None: where.append(f"{alias}.ts < ?"); params.append(int(until))
+    if symbol: where.append(f"{alias}.symbol = ?"); params.append(symbol)
+    if signal: where.append(f"{alias}.signal = ?"); params.append(signal.upper())
+    if session:
+        start, end = SESSIONS[session]
+        where.append(f"{alias}.hour_utc >= ? AND {alias}.hour_utc < ?"); params += [start, end]
+    if reason:
+        prefix = reason[:-1]
+        if reason.endswith("%") and prefix and "%" not in prefix and "_" not in prefix:
+            where.append(f"{alias}.reason >= ? AND {alias}.reason < ?"); params += [prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)]
+        elif "%" in reason: where.append(f"{alias}.reason LIKE ?"); params.append(reason)
+        else: where.append(f"{alias}.reason = ?"); params.append(reason)
+    if obs is not None: where.append(f"{alias}.last_pivot_is_obs = ?"); params.append(int(obs))
+    return (" WHERE " + " AND ".join(where)) if where else "", params
+
+GROUPS = {"signal": "s.signal", "symbol": "s.symbol", "reason": "s.reason", "hour": "s.hour_utc",
+          "month": "strftime('%Y-%m', s.ts, 'unixepoch')", "day": "strftime('%Y-%m-%d', s.ts, 'unixepoch')"}
+
+def query_stats(conn, by=None, **filters):
+    """Jumlah signal, yang kebuka, TP/SL/EXPIRED, win rate (TP / (TP+SL)) per grup."""
+    where, params = build_filters(**filters)
+    key = GROUPS[by] if by else "'all'"
+    sql = (f"SELECT {key} AS grp, COUNT(*) AS signals, COUNT(o.position_id) AS opened, "
+           f"SUM(o.status = 'TP_HIT') AS tp, SUM(o.status = 'SL_HIT') AS sl, SUM(o.status = 'EXPIRED') AS expired, "
+           f"SUM(o.status = 'OPEN') AS still_open "
+           f"FROM signals s LEFT JOIN outcomes o ON o.symbol = s.symbol AND o.ts = s.ts{where} "
+           f"GROUP BY grp ORDER BY signals DESC")
+    out = []
+    for r in conn.execute(sql, params):
+        row = dict(r)
+        for k in ("tp", "sl", "expired", "still_open"): row[k] = row[k] or 0
+        closed = row["tp"] + row["sl"]
+        row["win_rate"] = row["tp"] / closed if closed else None
+        out.append(row)
+    return out
+
+def query_signals(conn, limit=50, **filters):
+    """Signal terbaru + verdict terakhir + outcome (kalau ada)."""
+    where, params = build_filters(**filters)
+    sql = (f"SELECT s.ts, s.symbol, s.signal, s.reason, s.price, s.last_pivot_is_obs, "
+           f"(SELECT v.decision FROM verdicts v WHERE v.symbol = s.symbol AND v.ts = s.ts ORDER BY v.id DESC LIMIT 1) "
+           f"AS decision, o.status FROM signals s LEFT JOIN outcomes o ON o.symbol = s.symbol AND o.ts = s.ts{where} "
+           f"ORDER BY s.ts DESC LIMIT ?")
+    return [dict(r) for r in conn.execute(sql, params + [int(limit)])]
@@ -0,0 +1,53 @@
+"""
+Alur per signal yang dipakai bareng run_bot (sync), AsyncEngine, dan SymbolScanner:
+posisi selesai -> alert, contract -> kandidat AI (setup lengkap + anti double-judge),
+verdict -> catat + alert + buka posisi. Kapan & di thread mana AI judge jalan diatur pemanggil.
+"""
+from src.contract_utils import get_digits, make_fingerprint, format_approval
+
+def _label(name):
+    return f"{name} " if name else ""
+
+def announce_closed(closed, notify, name=None):
+    """List (posisi, status) hasil PositionBook.resolve/close -> alert + log."""
+    for pos, finished in closed:
+        icon = "💰" if finished == "TP_HIT" else "💀"
+        notify(f"{icon} <b>{_label(name)}SIGNAL FINISHED:</b> {finished}")
+        print(f"✅ {_label(name)}State Cleared: {finished} ({pos['type']} @ {pos['entry']})")
+
+def judge_candidate(contract, current_ts, tick, last_fingerprint, name=None):
+    """Contract -> (signal, setup, fingerprint) yang perlu di-judge AI, None kalau bukan signal /
+    setup gak lengkap / udah pernah di-judge di candle yang sama."""
+    signal = contract["signal"]
+    if signal not in ("BUY", "SELL"): return None
+    setup = contract.get("setup", {})
+    if not setup or "entry" not in setup:
+        print(f"⚠️ {_label(name)}Setup incomplete, skipping...")
+        return None
+    fingerprint = make_fingerprint(current_ts, signal, setup, get_digits(tick))
+    if fingerprint == last_fingerprint: return None
+    return signal, setup, fingerprint
+
+def apply_verdict(book, symbol, signal, setup, judge, current_ts, notify, db=None, name=None):
+    """
+    Verdict AI -> db (opsional); APPROVE + slot book masih kosong -> alert + buka posisi (journal fsync).
+    Return posisi yang kebuka, atau None.
+    """
+    if db: db.record_verdict(symbol, signal, current_ts, judge)
+    decision = str(judge.get("decision", "REJECT")).strip().upper()
+    if decision != "APPROVE":
+        print(f"❌ {_label(name)}AI REJECTED: {judge.get('reason')}")
+        return None
+    blocked = book.open_block_reason(symbol)
+    if blocked:
+        print(f"⚠️ {_label(name)}{signal} approved but not opened: {blocked}")
+        return None
+    header = f"📈 <b>{name}</b>\n" if name else ""
+    notify(header + format_approval(signal, setup, judge))
+    pos = book.open(symbol, sig_type=signal, sl=setup['sl'], tp=setup['tp'], entry=setup['entry'],
+                    reason=judge.get("reason", ""), candle_ts=current_ts)
+    if pos: print(f"✅ {_label(name)}{signal} SENT & LOCKED")
+    else:
+        blocked = book.open_block_reason(symbol)
+        print(f"⚠️ {_label(name)}{signal} NOT LOCKED: {blocked}" if blocked else f"🚨 {_label(name)}WRITE FAIL!")
+    return pos
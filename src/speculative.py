@@ -0,0 +1,93 @@
+"""
+Speculative AI judge: begitu bar M5 yang masih jalan udah nyentuh OB aktif searah trend
+(meta indicators.ob_touch dari calculate_rules), verdict AI diminta duluan di background
+pakai metrics provisional. Pas candle gate, verdict itu dipakai kalau metrics final masih
+sama (dalam toleransi); kalau beda -> judge ulang. Verdict cuma di-reuse kalau input AI-nya
+praktis identik, jadi hasilnya sama kayak judge biasa, cuma latency Gemini-nya udah lewat.
+"""
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from src.ai_engine import ask_ai_judge
+from src.indicators import calculate_rules
+from src.contract_utils import build_ai_metrics
+
+DIST_TOL_USD = 0.5 # Toleransi jarak ke pivot (harga gerak dikit antara provisional & final)
+LEG_TOL_USD = 0.5
+MAX_AGE_SEC = 1800 # Verdict spekulatif yang gak kepakai segini lama dianggap basi
+REASONS = {"BUY": "SMC: Bullish OB Retest + M15 Trend", "SELL": "SMC: Bearish OB Retest + M15 Trend"}
+
+def _struct(metrics):
+    return metrics.get('m15_structure') or metrics.get('indicators', {}).get('m15_structure', {})
+
+def _warn_set(metrics):
+    return {re.sub(r"\s*-?\d+(\.\d+)?s?", "", str(w)).strip() for w in metrics.get('warnings', [])}
+
+def metrics_match(a, b, dist_tol=DIST_TOL_USD, leg_tol=LEG_TOL_USD):
+    """Metrics provisional vs final: field kategorikal harus sama, angka boleh beda dalam toleransi."""
+    sa, sb = _struct(a), _struct(b)
+    if a.get('trend_m15') != b.get('trend_m15'): return False
+    for k in ('sequence', 'last_pivot_is_obs', 'last_pivot_type'):
+        if sa.get(k) != sb.get(k): return False
+    if _warn_set(a) != _warn_set(b): return False
+    if abs(float(sa.get('dist_to_pivot', 0) or 0) - float(sb.get('dist_to_pivot', 0) or 0)) > dist_tol: return False
+    la, lb = sa.get('leg_sizes_signed', []), sb.get('leg_sizes_signed', [])
+    if len(la) != len(lb): return False
+    return all(abs(x - y) <= leg_tol for x, y in zip(la, lb))
+
+class SpeculativeJudge:
+    def __init__(self, engine=None, cache=None, params=None):
+        self.engine = engine # IndicatorEngine sendiri (state terpisah dari engine utama)
+        self.cache = cache
+        self.params = params # Override rule_params simbol (sama kayak calculate_rules di candle gate)
+        self.pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="spec-judge")
+        self.pending = None # {"bar_ts", "signal", "metrics", "future"}
+        self.lock = threading.Lock() # Mode async: observe & resolve bisa beda thread
+        self.stats = {"submitted": 0, "hits": 0, "wasted": 0, "rejudged": 0}
+
+    def observe(self, data, bar_ts):
+        """
+        Dipanggil tiap poll di antara candle gate. Evaluasi bar yang lagi jalan;
+        kalau udah nyentuh OB searah trend, submit judge (maks 1x per bar). Return True kalau submit.
+        """
+        with self.lock:
+            if self.pending and self.pending["bar_ts"] == bar_ts: return False
+        contract = calculate_rules(data, engine=self.engine, params=self.params)
+        indicators = contract.get("meta", {}).get("indicators", {})
+        if not indicators.get("ob_touch"): return False
+        signal = "BUY" if indicators.get("trend_m15") == "BULLISH" else "SELL"
+        metrics = build_ai_metrics(contract)
+        with self.lock:
+            # Harga masih nempel di OB yang sama -> verdict sebelumnya masih valid, gak usah call lagi
+            if self.pending and self.pending["signal"] == signal and metrics_match(self.pending["metrics"], metrics):
+                self.pending["bar_ts"] = bar_ts
+                return False
+            if self.pending: self.stats["wasted"] += 1 # Konteks berubah, spekulasi lama gak kepakai
+            self.pending = {"bar_ts": bar_ts, "signal": signal, "metrics": metrics,
+                            "future": self.pool.submit(ask_ai_judge, signal, REASONS[signal], metrics, self.cache)}
+            self.stats["submitted"] += 1
+        print(f"🔮 Speculative judge {signal} submitted (bar {bar_ts})")
+        return True
+
+    def resolve(self, signal, reason, metrics):
+        """Candle gate dapat signal: pakai verdict spekulatif kalau cocok, kalau nggak judge ulang (blocking)."""
+        with self.lock: spec, self.pending = self.pending, None
+        if spec and spec["signal"] == signal and metrics_match(spec["metrics"], metrics):
+            try:
+                judge = spec["future"].result()
+                self.stats["hits"] += 1
+                return {**judge, "speculative": True}
+            except Exception:
+                pass
+        if spec:
+            self.stats["wasted"] += 1
+            self.stats["rejudged"] += 1
+        return ask_ai_judge(signal, reason, metrics, cache=self.cache)
+
+    def expire(self, bar_ts):
+        """Candle gate tanpa signal: buang spekulasi yang udah basi (call AI kebuang)."""
+        with self.lock:
+            if self.pending and bar_ts - self.pending["bar_ts"] > MAX_AGE_SEC:
+                self.stats["wasted"] += 1
+                self.pending = None
@@ -3,13 +3,16 @@ import os
 import time
 from datetime import datetime, timezone
 
+from src.metrics import METRICS
+
 # --- CONFIG ---
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 FILE_PATH = os.path.join(BASE_DIR, "signal_state.json")
+SIGNAL_TTL_SEC = 14400 # Signal expired setelah 4 jam
 
-def save_state_atomic(active, sig_type=None, sl=0.0, tp=0.0, entry=0.0, reason="", candle_ts=0):
+def build_state(active, sig_type=None, sl=0.0, tp=0.0, entry=0.0, reason="", candle_ts=0):
     now_wall = int(time.time())
-    state = {
+    return {
         "active": bool(active),
         "type": sig_type if active else None,
         "entry": float(entry) if active else 0.0,
@@ -20,31 +23,41 @@ def save_state_atomic(active, sig_type=None, sl=0.0, tp=0.0, entry=0.0, reason="
         "opened_at_wall_ts": now_wall if active else 0,
         "updated_at": datetime.now(timezone.utc).isoformat()
     }
-    
-    temp_file = FILE_PATH + ".tmp"
+
+def write_state_atomic(state, path=None):
+    path = path or FILE_PATH # Per simbol: SymbolSpec.state_path
+    temp_file = path + ".tmp"
     try:
-        with open(temp_file, "w") as f:
+        with METRICS.stage("state_fsync"), open(temp_file, "w") as f:
             json.dump(state, f, indent=4)
             f.flush()
             os.fsync(f.fileno())
-        os.replace(temp_file, FILE_PATH)
+        os.replace(temp_file, path)
         return True
     except Exception as e:
         print(f"🚨 STATE WRITE FAILED: {e}")
         return False
 
-def check_signal_status(high, low, current_bid=0, current_ask=0):
-    if not os.path.exists(FILE_PATH): return "NONE"
-    
+def save_state_atomic(active, sig_type=None, sl=0.0, tp=0.0, entry=0.0, reason="", candle_ts=0, path=None):
+    return write_state_atomic(build_state(active, sig_type, sl, tp, entry, reason, candle_ts), path)
+
+def load_state(path=None):
+    """Baca state dari disk. None kalau gak ada; file korup di-rename dan return {"corrupt": True}."""
+    path = path or FILE_PATH
+    if not os.path.exists(path): return None
     try:
-        with open(FILE_PATH, "r") as f:
-            state = json.load(f)
+        with open(path, "r") as f:
+            return json.load(f)
     except:
-        # Fail-Safe Lock
         ts = int(time.time())
-        try: os.rename(FILE_PATH, f"{FILE_PATH}.corrupt.{ts}")
+        try: os.rename(path, f"{path}.corrupt.{ts}")
         except: pass
-        return "STILL_OPEN"
+        return {"corrupt": True}
+
+def evaluate_state(state, high, low, current_bid=0, current_ask=0):
+    """Cek TP/SL/Expiry state (in-memory, tanpa I/O)."""
+    if state is None: return "NONE"
+    if state.get("corrupt"): return "STILL_OPEN" # Fail-Safe Lock
 
     if not state.get("active"): return "NONE"
 
@@ -54,7 +67,7 @@ def check_signal_status(high, low, current_bid=0, current_ask=0):
         return "NONE" # Data korup/hantu, anggap kosong
 
     # --- EXPIRY CHECK ---
-    if int(time.time()) - state.get("opened_at_wall_ts", 0) > 14400:
+    if int(time.time()) - state.get("opened_at_wall_ts", 0) > SIGNAL_TTL_SEC:
         return "EXPIRED"
 
     sl = state.get("sl", 0)
@@ -80,3 +93,6 @@ def check_signal_status(high, low, current_bid=0, current_ask=0):
         if high >= sl: return "SL_HIT"
             
     return "STILL_OPEN"
+
+def check_signal_status(high, low, current_bid=0, current_ask=0, path=None):
+    return evaluate_state(load_state(path), high, low, current_bid, current_ask)
@@ -0,0 +1,77 @@
+"""
+Parameter sweep paralel di atas backtest vectorized.
+Array harga (hasil prepare_arrays) ditaruh sekali di shared memory; worker cuma attach
+(zero-copy), jadi task yang dikirim ke process pool isinya dict parameter doang.
+"""
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from src.backtest import run_arrays, default_params
+
+_ARR = None
+_SHM = []
+
+def expand_grid(grid):
+    """{"RR_RATIO": [1.0, 1.5], ...} -> list dict parameter (cartesian product)."""
+    keys = list(grid)
+    unknown = set(keys) - set(default_params())
+    if unknown: raise ValueError(f"Unknown sweep params: {sorted(unknown)}")
+    return [dict(zip(keys, combo)) for combo in itertools.product(*(grid[k] for k in keys))]
+
+def share_arrays(arr):
+    """Copy array ke SharedMemory. Return (list shm, layout buat worker)."""
+    blocks, layout = [], {}
+    for name, a in arr.items():
+        a = np.ascontiguousarray(a)
+        shm = shared_memory.SharedMemory(create=True, size=max(1, a.nbytes))
+        np.ndarray(a.shape, dtype=a.dtype, buffer=shm.buf)[...] = a
+        blocks.append(shm)
+        layout[name] = (shm.name, a.shape, a.dtype.str)
+    return blocks, layout
+
+def _attach(layout):
+    """Initializer worker: attach shared memory -> dict array read-only."""
+    global _ARR
+    _ARR = {}
+    for name, (shm_name, shape, dtype) in layout.items():
+        shm = shared_memory.SharedMemory(name=shm_name)
+        _SHM.append(shm) # Tahan referensi biar buffer gak ke-close
+        view = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+        view.flags.writeable = False
+        _ARR[name] = view
+
+def _run_one(params):
+    _, summary = run_arrays(_ARR, params)
+    return {**params, **summary}
+
+def run_sweep(arr, grid, workers=None, rank_by="net_usd"):
+    """Jalankan semua kombinasi grid di process pool. Return DataFrame hasil, urut `rank_by` (desc)."""
+    combos = expand_grid(grid)
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1:
+        _attach_local(arr)
+        rows = [_run_one(p) for p in combos]
+    else:
+        blocks, layout = share_arrays(arr)
+        try:
+            chunk = max(1, len(combos) // (workers * 4))
+            with ProcessPoolExecutor(max_workers=workers, initializer=_attach, initargs=(layout,)) as pool:
+                rows = list(pool.map(_run_one, combos, chunksize=chunk))
+        finally:
+            for shm in blocks:
+                shm.close()
+                shm.unlink()
+    df = pd.DataFrame(rows)
+    if df.empty: return df
+    df = df.sort_values([rank_by, "trades"], ascending=[False, False]).reset_index(drop=True)
+    df.insert(0, "rank", np.arange(1, len(df) + 1))
+    return df
+
+def _attach_local(arr):
+    global _ARR
+    _ARR = arr
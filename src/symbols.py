@@ -0,0 +1,83 @@
+"""
+Registry simbol buat scan multi-instrumen dari 1 proses.
+
+Sumber (urut prioritas):
+  SYMBOLS_FILE=symbols.json  {"XAUUSD": {"params": {"MAX_SPREAD_USD": 0.5}, "price_range": [100, 5000]}, ...}
+  SYMBOLS=XAUUSD,XAGUSD      nama doang, parameter default
+  (kosong)                   1 simbol (PRIMARY_SYMBOL) = mode single klasik
+Parameter per simbol override konstanta strategi di src/indicators.py (lihat rule_params).
+Simbol pertama = primary: pakai file state/log lama (signal_state.json, trade_log_*.csv).
+"""
+import json
+import os
+
+from src.indicators import rule_params
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PRIMARY_SYMBOL = os.getenv("PRIMARY_SYMBOL", "XAUUSD")
+DEFAULT_PRICE_RANGE = {"XAUUSD": (100.0, 5000.0)} # Sanity check harga (diagnostics)
+
+class SymbolSpec:
+    def __init__(self, name, params=None, price_range=None, primary=False):
+        self.name = name
+        unknown = set(params or {}) - set(rule_params())
+        if unknown: raise ValueError(f"{name}: unknown params {sorted(unknown)}")
+        self.params = dict(params or {}) # Override doang; None di calculate_rules kalau kosong (jalur lama)
+        self.price_range = tuple(price_range) if price_range else DEFAULT_PRICE_RANGE.get(name)
+        self.primary = primary
+        suffix = "" if primary else f"_{_slug(name)}"
+        self.state_path = os.path.join(BASE_DIR, f"signal_state{suffix}.json")
+        self.log_prefix = f"trade_log{suffix}"
+
+    def rule_overrides(self):
+        return self.params or None
+
+    def price_ok(self, price):
+        if not self.price_range: return True
+        lo, hi = self.price_range
+        return lo <= price <= hi
+
+    def __repr__(self):
+        return f"SymbolSpec({self.name!r}, params={self.params})"
+
+def _slug(name):
+    return "".join(c if c.isalnum() else "_" for c in name)
+
+class SymbolRegistry:
+    def __init__(self, specs):
+        if not specs: raise ValueError("Symbol registry kosong")
+        names = [s.name for s in specs]
+        if len(set(names)) != len(names): raise ValueError(f"Duplicate symbols: {names}")
+        self.specs = {s.name: s for s in specs}
+
+    @property
+    def primary(self):
+        return next(iter(self.specs.values()))
+
+    @property
+    def multi(self):
+        return len(self.specs) > 1
+
+    def names(self):
+        return list(self.specs)
+
+    def __getitem__(self, name):
+        return self.specs[name]
+
+    def __iter__(self):
+        return iter(self.specs.values())
+
+    def __len__(self):
+        return len(self.specs)
+
+def load_registry(path=None, names=None):
+    """Registry dari file JSON / list nama (env SYMBOLS_FILE / SYMBOLS kalau gak dikasih)."""
+    path = path or os.getenv("SYMBOLS_FILE")
+    if path:
+        with open(path) as f: raw = json.load(f)
+        entries = list(raw.items())
+    else:
+        names = names or [s.strip() for s in os.getenv("SYMBOLS", "").split(",") if s.strip()] or [PRIMARY_SYMBOL]
+        entries = [(n, {}) for n in names]
+    return SymbolRegistry([SymbolSpec(name, cfg.get("params"), cfg.get("price_range"), primary=(i == 0))
+                           for i, (name, cfg) in enumerate(entries)])
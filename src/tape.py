@@ -0,0 +1,265 @@
+"""
+Tape market append-only (biner kolumnar per hari) + replay memory-mapped.
+
+Layout per hari (UTC):
+  TAPE_DIR/YYYYMMDD/ticks.bin      record TICK_DTYPE (msc, bid, ask, recv_ms)
+  TAPE_DIR/YYYYMMDD/bars_m5.bin    record BAR_DTYPE (versi bar: bar forming ditulis ulang tiap berubah)
+  TAPE_DIR/YYYYMMDD/bars_m15.bin
+  TAPE_DIR/YYYYMMDD/meta.jsonl     meta/tick spec (epoch, point, digits, stop_level), cuma kalau berubah
+  TAPE_DIR/YYYYMMDD/index.json     jumlah record + waktu pertama/terakhir per file
+Record di tiap file urut waktu (non-decreasing) -> range query = np.searchsorted di atas np.memmap,
+jadi baca beberapa minggu gak perlu load semuanya ke RAM.
+record*() cuma filter duplikat (in-memory) + antri ke BatchWriter; append file + tulis ulang index.json
+dikerjain thread background tiap TAPE_BATCH_SIZE record / TAPE_FLUSH_SEC detik, jadi poll gak nunggu disk.
+"""
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.batch_writer import BatchWriter
+from src.wire import bars_to_columns
+
+TICK_DTYPE = np.dtype([("msc", "<i8"), ("bid", "<f8"), ("ask", "<f8"), ("recv_ms", "<i8")])
+BAR_DTYPE = np.dtype([("time", "<i8"), ("Open", "<f8"), ("High", "<f8"), ("Low", "<f8"), ("Close", "<f8"),
+                      ("Volume", "<f8"), ("recv_ms", "<i8")])
+TIMEFRAMES = ("m5", "m15")
+DTYPES = {"ticks.bin": TICK_DTYPE, **{f"bars_{tf}.bin": BAR_DTYPE for tf in TIMEFRAMES}}
+META_KEYS = ("epoch", "point", "digits", "stop_level", "freeze_level")
+TAPE_BATCH_SIZE = int(os.getenv("TAPE_BATCH_SIZE", "500")) # Record numpuk segini -> flush langsung
+TAPE_FLUSH_SEC = float(os.getenv("TAPE_FLUSH_SEC", "1"))   # Flush paling telat tiap segini
+MAX_PENDING = 100000 # Disk mati lama -> record paling lama dibuang (dihitung dropped)
+
+def _day(ts_sec):
+    return time.strftime("%Y%m%d", time.gmtime(ts_sec))
+
+class TapeRecorder:
+    def __init__(self, root, batch_size=TAPE_BATCH_SIZE, flush_sec=TAPE_FLUSH_SEC):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        # files / index / dirty / written cuma disentuh thread writer (di bawah writer.write_lock)
+        self.files = {} # (day, name) -> file handle "ab"
+        self.index = {} # day -> {name: {"count", "first", "last"}} (cuma hari yang file-nya lagi kebuka)
+        self.dirty = set() # Hari yang index.json-nya perlu ditulis ulang
+        self.last_tick_msc = 0
+        self.last_bar = {tf: None for tf in TIMEFRAMES} # tuple bar terakhir yang ditulis per tf
+        self.last_meta = None
+        self.written = 0
+        self._seed_last()
+        self.writer = BatchWriter(self._write_batch, "tape", batch_size, flush_sec, MAX_PENDING, "tape_flush",
+                                  "Tape Error", errors=(OSError,)) # item = (hari, file, record / bytes, t awal, t akhir)
+        self.stats = self.writer.stats
+
+    def _seed_last(self):
+        """Restart: ambil record terakhir yang udah ada di tape, biar window bridge yang sama gak di-append ulang
+        (file tetap urut waktu)."""
+        days = sorted((d for d in os.listdir(self.root) if len(d) == 8 and d.isdigit()), reverse=True)
+        for name, dtype in DTYPES.items():
+            for day in days:
+                path = self._path(day, name)
+                n = os.path.getsize(path) // dtype.itemsize if os.path.exists(path) else 0
+                if not n: continue
+                last = np.fromfile(path, dtype=dtype, count=1, offset=(n - 1) * dtype.itemsize)[0]
+                if name == "ticks.bin": self.last_tick_msc = int(last["msc"])
+                else:
+                    self.last_bar[name[5:-4]] = (int(last["time"]), float(last["Open"]), float(last["High"]),
+                                                 float(last["Low"]), float(last["Close"]), float(last["Volume"]))
+                break
+
+    def _path(self, day, name):
+        return os.path.join(self.root, day, name)
+
+    def _file(self, day, name):
+        fh = self.files.get((day, name))
+        if fh is None:
+            os.makedirs(os.path.join(self.root, day), exist_ok=True)
+            path = self._path(day, name)
+            dtype = DTYPES.get(name)
+            if dtype is not None and os.path.exists(path):
+                # Record setengah ketulis (crash pas append) dibuang, biar record baru tetap align
+                size = os.path.getsize(path)
+                if size % dtype.itemsize: os.truncate(path, size - size % dtype.itemsize)
+            fh = self.files[(day, name)] = open(path, "ab", buffering=0) # 1 write per file per batch
+            if day not in self.index: self.index[day] = self._load_index(day)
+        return fh
+
+    def _load_index(self, day):
+        try:
+            with open(self._path(day, "index.json")) as f: return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write(self, day, name, data):
+        fh = self._file(day, name)
+        start = fh.tell()
+        try:
+            if fh.write(data) != len(data): raise OSError(f"short write {self._path(day, name)}")
+        except Exception:
+            try: fh.truncate(start) # Buang record setengah ketulis, biar retry gak dobel
+            except Exception: pass
+            raise
+
+    def _append(self, day, name, records, t_first, t_last):
+        self._write(day, name, records.tobytes())
+        entry = self.index[day].setdefault(name, {"count": 0, "first": int(t_first), "last": int(t_last)})
+        entry["count"] += len(records)
+        entry["last"] = int(t_last)
+        self.dirty.add(day)
+        self.written += len(records)
+
+    def _write_batch(self, items):
+        """
+        Thread writer: gabung record per file (urutan tetap), append, lalu index.json hari yang berubah.
+        File yang beres dibuang dari items (in-place), jadi yang di-requeue cuma file yang gagal.
+        """
+        by_file = {}
+        for day, name, payload, t_first, t_last in items:
+            by_file.setdefault((day, name), []).append((payload, t_first, t_last))
+        failed, error = set(), None
+        for (day, name), parts in by_file.items():
+            try:
+                if name == "meta.jsonl":
+                    self._write(day, name, b"".join(p for p, _, _ in parts))
+                else:
+                    recs = np.concatenate([p for p, _, _ in parts]) if len(parts) > 1 else parts[0][0]
+                    self._append(day, name, recs, parts[0][1], parts[-1][2])
+            except OSError as e:
+                failed.add((day, name))
+                error = error or e
+        items[:] = [item for item in items if item[:2] in failed]
+        if error is not None: raise error
+        for day in self.dirty: # Cuma hari yang berubah sejak flush terakhir
+            tmp = self._path(day, "index.json.tmp")
+            with open(tmp, "w") as f: json.dump(self.index[day], f)
+            os.replace(tmp, self._path(day, "index.json"))
+        self.dirty.clear()
+        # Handle + index hari yang udah lewat ditutup / dibuang dari memory
+        today = _day(time.time())
+        for key in [k for k in self.files if k[0] < today]:
+            self.files.pop(key).close()
+        open_days = {day for day, _ in self.files}
+        for day in [d for d in self.index if d not in open_days]: del self.index[day]
+
+    def record_tick(self, tick, meta, recv_ts=None):
+        """1 tick (bid/ask + jam broker msc). Tick duplikat (msc sama / mundur) di-skip."""
+        msc = int(meta.get("tick_time_msc") or 0) or int(meta.get("tick_time") or 0) * 1000
+        if msc <= self.last_tick_msc: return
+        bid = float(tick.get("bid", 0) or 0)
+        ask = float(tick.get("ask", 0) or 0)
+        if bid <= 0 or ask <= 0: return
+        rec = np.array([(msc, bid, ask, int((recv_ts or time.time()) * 1000))], dtype=TICK_DTYPE)
+        self.writer.put((_day(msc / 1000.0), "ticks.bin", rec, msc, msc))
+        self.last_tick_msc = msc
+
+    def record_bars(self, tf, bars, recv_ts=None):
+        """Bar (list dict / dict kolom). Cuma versi baru yang ditulis: time >= bar terakhir & isi berubah."""
+        cols = bars if isinstance(bars, dict) else bars_to_columns(bars)
+        t = np.asarray(cols["time"], dtype=np.int64)
+        if not len(t): return
+        last = self.last_bar[tf]
+        start = 0 if last is None else int(np.searchsorted(t, last[0], side="left"))
+        recv_ms = int((recv_ts or time.time()) * 1000)
+        rows = []
+        for i in range(start, len(t)):
+            row = (int(t[i]), float(cols["Open"][i]), float(cols["High"][i]), float(cols["Low"][i]),
+                   float(cols["Close"][i]), float(cols["Volume"][i]) if "Volume" in cols else 0.0)
+            if last is not None and (row[0] < last[0] or row == last): continue
+            rows.append(row + (recv_ms,))
+            last = row
+        if not rows: return
+        self.last_bar[tf] = last
+        recs = np.array(rows, dtype=BAR_DTYPE)
+        # Split per hari (jarang: cuma pas lewat tengah malam UTC)
+        days = np.array([_day(x) for x in recs["time"]])
+        for day in dict.fromkeys(days.tolist()):
+            part = recs[days == day]
+            self.writer.put((day, f"bars_{tf}.bin", part, part["time"][0], part["time"][-1]))
+
+    def record_meta(self, tick, meta, recv_ts=None):
+        snap = {k: v for k, v in {**tick, **meta}.items() if k in META_KEYS}
+        if snap == self.last_meta: return
+        self.last_meta = snap
+        line = (json.dumps({"recv_ms": int((recv_ts or time.time()) * 1000), **snap}) + "\n").encode()
+        self.writer.put((_day(recv_ts or time.time()), "meta.jsonl", line, None, None))
+
+    def record(self, resp, recv_ts=None):
+        """Rekam 1 response bridge (full / delta, JSON / biner) sebelum diubah jadi DataFrame."""
+        recv_ts = recv_ts or time.time()
+        tick, meta = resp.get("tick") or {}, resp.get("meta") or {}
+        self.record_tick(tick, meta, recv_ts)
+        for tf in TIMEFRAMES:
+            if resp.get(tf) is not None: self.record_bars(tf, resp[tf], recv_ts)
+        self.record_meta(tick, meta, recv_ts)
+
+    def flush(self):
+        """Tulis semua record yang numpuk sekarang. Return True kalau beres."""
+        return self.writer.flush()
+
+    def close(self, timeout=5.0):
+        """Flush terakhir + stop thread writer, lalu tutup semua file. Return hasil flush."""
+        ok = self.writer.close(timeout)
+        with self.writer.write_lock:
+            for fh in self.files.values(): fh.close()
+            self.files.clear()
+        return ok
+
+class TapeReader:
+    def __init__(self, root):
+        self.root = root
+
+    def days(self, start=None, end=None):
+        """Hari yang ada di tape (opsional difilter range epoch detik)."""
+        if not os.path.isdir(self.root): return []
+        days = sorted(d for d in os.listdir(self.root) if len(d) == 8 and d.isdigit())
+        if start is not None: days = [d for d in days if d >= _day(start)]
+        if end is not None: days = [d for d in days if d <= _day(end)]
+        return days
+
+    def index(self, day):
+        try:
+            with open(os.path.join(self.root, day, "index.json")) as f: return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _map(self, day, name, dtype):
+        path = os.path.join(self.root, day, name)
+        if not os.path.exists(path): return None
+        n = os.path.getsize(path) // dtype.itemsize # Record terakhir yang setengah ketulis diabaikan
+        if not n: return None
+        return np.memmap(path, dtype=dtype, mode="r", shape=(n,))
+
+    def _iter(self, name, dtype, key, scale, start, end):
+        for day in self.days(start, end):
+            arr = self._map(day, name, dtype)
+            if arr is None: continue
+            lo = 0 if start is None else int(np.searchsorted(arr[key], int(start * scale), side="left"))
+            hi = len(arr) if end is None else int(np.searchsorted(arr[key], int(end * scale), side="right"))
+            if hi > lo: yield arr[lo:hi]
+
+    def iter_ticks(self, start=None, end=None):
+        """Stream tick per hari (slice memmap, zero-copy). start/end = epoch detik."""
+        return self._iter("ticks.bin", TICK_DTYPE, "msc", 1000, start, end)
+
+    def ticks(self, start=None, end=None):
+        parts = list(self.iter_ticks(start, end))
+        return np.concatenate(parts) if parts else np.empty(0, dtype=TICK_DTYPE)
+
+    def iter_bars(self, tf, start=None, end=None):
+        """Stream bar per hari (semua versi, termasuk update bar forming)."""
+        return self._iter(f"bars_{tf}.bin", BAR_DTYPE, "time", 1, start, end)
+
+    def bars(self, tf, start=None, end=None):
+        """Bar final per time (versi terakhir tiap bar)."""
+        parts = list(self.iter_bars(tf, start, end))
+        if not parts: return np.empty(0, dtype=BAR_DTYPE)
+        arr = np.concatenate(parts)
+        last_version = np.append(arr["time"][1:] != arr["time"][:-1], True)
+        return arr[last_version]
+
+    def frame(self, tf, start=None, end=None):
+        """DataFrame OHLCV index UTC (format process_df) buat backtest / simulator."""
+        arr = self.bars(tf, start, end)
+        index = pd.DatetimeIndex(pd.to_datetime(arr["time"], unit="s", utc=True), name="time")
+        return pd.DataFrame({c: arr[c] for c in ("Open", "High", "Low", "Close", "Volume")}, index=index)
@@ -1,7 +1,5 @@
-import telebot
-from src.config import TELEGRAM_TOKEN, CHAT_ID
-
-bot = telebot.TeleBot(TELEGRAM_TOKEN)
+import src.config # noqa: F401  (load .env sebelum outbox dibikin)
+from src.telegram_outbox import get_outbox
 
 def send_alert(ai_data, market_data):
     # Ambil variable biar gampang
@@ -54,8 +52,11 @@ TP    : {setup['tp']}
 💵 DXY Trend: {market_data['dxy_trend']}
 """
     
-    try:
-        bot.send_message(CHAT_ID, message, parse_mode="Markdown")
-        print(f"✅ Pesan Telegram Terkirim: {dec}")
-    except Exception as e:
-        print(f"❌ Gagal Kirim Telegram: {e}")
+    if get_outbox().send(message, parse_mode="Markdown"):
+        print(f"✅ Pesan Telegram Masuk Antrian: {dec}")
+    else:
+        print(f"❌ Gagal Kirim Telegram: config kosong / antrian penuh")
+
+def flush(timeout=5.0):
+    """Tunggu alert yang masih antri kekirim (panggil sebelum proses selesai)."""
+    return get_outbox().flush(timeout)
@@ -0,0 +1,163 @@
+import atexit
+import os
+import threading
+import time
+
+import requests
+
+from src.metrics import METRICS
+
+class TelegramOutbox:
+    """
+    Outbox Telegram bareng (run_bot, watchdog, telegram_bot):
+    - 1 requests.Session keep-alive, kirim dari thread background (send() langsung return)
+    - Handle rate limit 429 (retry_after) + backoff exponential buat error jaringan/5xx
+    - Coalescing: pesan identik yang numpuk pas burst digabung jadi 1 "(xN)"
+    """
+    def __init__(self, token=None, chat_id=None, api_base=None, coalesce_sec=30.0, min_interval=1.0,
+                 max_pending=200, max_retries=5, timeout=10):
+        self.token = token
+        self.chat_id = chat_id
+        self.api_base = (api_base or os.getenv("TELEGRAM_API_BASE") or "https://api.telegram.org").rstrip("/")
+        self.coalesce_sec = coalesce_sec
+        self.min_interval = min_interval # Telegram: ~1 pesan/detik per chat
+        self.max_pending = max_pending
+        self.max_retries = max_retries
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        self.cond = threading.Condition()
+        self.pending = {}   # key -> {"count", "not_before", "attempts"}
+        self.last_sent = {} # key -> ts kirim terakhir (buat coalescing)
+        self.last_chat_send = {}
+        self.inflight = 0
+        self.thread = None
+        self.stats = {"queued": 0, "coalesced": 0, "sent": 0, "retried": 0, "dropped": 0}
+
+    def send(self, text, parse_mode="HTML", chat_id=None):
+        """Masukin pesan ke antrian (non-blocking). Return False kalau gak dikirim (config kosong / antrian penuh)."""
+        chat_id = chat_id or self.chat_id
+        if not self.token or not chat_id: return False
+        key = (str(chat_id), parse_mode, text)
+        now = time.time()
+        with self.cond:
+            entry = self.pending.get(key)
+            if entry:
+                entry["count"] += 1
+                self.stats["coalesced"] += 1
+                return True
+            if len(self.pending) >= self.max_pending:
+                self.stats["dropped"] += 1
+                return False
+            # Baru aja kekirim -> tahan sampai window coalesce lewat, biar duplikat berikutnya kegabung
+            not_before = max(now, self.last_sent.get(key, 0) + self.coalesce_sec) if key in self.last_sent else now
+            self.pending[key] = {"count": 1, "not_before": not_before, "attempts": 0}
+            self.stats["queued"] += 1
+            self._ensure_thread()
+            self.cond.notify()
+        return True
+
+    def _ensure_thread(self):
+        if self.thread is None or not self.thread.is_alive():
+            self.thread = threading.Thread(target=self._run, name="telegram-outbox", daemon=True)
+            self.thread.start()
+
+    def _next_ready(self, now):
+        """Pilih pesan paling awal yang udah boleh dikirim. Return (key, wait_sec)."""
+        best, wait = None, None
+        for key, entry in self.pending.items():
+            ready_at = max(entry["not_before"], self.last_chat_send.get(key[0], 0) + self.min_interval)
+            if ready_at <= now and (best is None or entry["not_before"] < self.pending[best]["not_before"]):
+                best = key
+            elif ready_at > now:
+                wait = ready_at - now if wait is None else min(wait, ready_at - now)
+        return best, wait
+
+    def _run(self):
+        while True:
+            with self.cond:
+                key, wait = self._next_ready(time.time())
+                while key is None:
+                    self.cond.wait(timeout=wait)
+                    key, wait = self._next_ready(time.time())
+                entry = self.pending.pop(key)
+                self.inflight += 1
+            retry_after = None
+            entry["attempts"] += 1
+            try:
+                with METRICS.stage("telegram_http"): retry_after = self._post(key, entry)
+            except Exception as e:
+                # Error tak terduga gak boleh matiin thread sender: anggap retryable, habis jatah -> dropped
+                print(f"⚠️ Telegram send error: {e!r}")
+                retry_after = min(60.0, 2.0 ** (entry["attempts"] - 1))
+            finally:
+                with self.cond:
+                    self.inflight -= 1
+                    now = time.time()
+                    self.last_chat_send[key[0]] = now
+                    if retry_after is None:
+                        self.last_sent[key] = now
+                    elif entry["attempts"] < self.max_retries:
+                        # Requeue (gabung sama duplikat yang masuk selama ini)
+                        dup = self.pending.pop(key, None)
+                        if dup: entry["count"] += dup["count"]
+                        entry["not_before"] = now + retry_after
+                        self.pending[key] = entry
+                        self.stats["retried"] += 1
+                    else:
+                        self.stats["dropped"] += 1
+                        print(f"❌ Telegram drop after {entry['attempts']} attempts: {key[2][:40]!r}")
+                    self._prune_sent(now)
+                    self.cond.notify_all()
+
+    def _prune_sent(self, now):
+        if len(self.last_sent) > 500:
+            self.last_sent = {k: t for k, t in self.last_sent.items() if now - t < self.coalesce_sec}
+
+    def _post(self, key, entry):
+        """Kirim 1 pesan. Return None kalau beres/gak perlu retry, atau detik tunggu sebelum retry."""
+        chat_id, parse_mode, text = key
+        if entry["count"] > 1: text = f"{text}\n(x{entry['count']})"
+        payload = {"chat_id": chat_id, "text": text}
+        if parse_mode: payload["parse_mode"] = parse_mode
+        backoff = min(60.0, 2.0 ** (entry["attempts"] - 1))
+        try:
+            r = self.session.post(f"{self.api_base}/bot{self.token}/sendMessage", json=payload, timeout=self.timeout)
+        except requests.RequestException as e:
+            print(f"⚠️ Telegram network error: {e}")
+            return backoff
+        if r.status_code == 200:
+            self.stats["sent"] += 1
+            return None
+        if r.status_code == 429:
+            try: return float(r.json().get("parameters", {}).get("retry_after", backoff))
+            except (TypeError, ValueError, AttributeError): return backoff # retry_after null / body bukan dict
+        if r.status_code >= 500: return backoff
+        # 4xx lain (HTML invalid, chat salah) -> retry gak bakal nolong
+        self.stats["dropped"] += 1
+        print(f"❌ Telegram rejected ({r.status_code}): {r.text[:120]}")
+        return None
+
+    def flush(self, timeout=5.0):
+        """Tunggu antrian kosong (dipanggil pas shutdown). Return True kalau beres."""
+        deadline = time.time() + timeout
+        with self.cond:
+            while self.pending or self.inflight:
+                remaining = deadline - time.time()
+                if remaining <= 0: return False
+                self.cond.wait(timeout=remaining)
+        return True
+
+_OUTBOX = None
+_OUTBOX_LOCK = threading.Lock()
+
+def get_outbox():
+    """Outbox default (TELEGRAM_TOKEN / TELEGRAM_CHAT_ID dari env, fallback CHAT_ID lama), dibikin sekali per proses.
+    Di-flush otomatis pas exit (atexit)."""
+    global _OUTBOX
+    with _OUTBOX_LOCK:
+        if _OUTBOX is None:
+            chat_id = os.getenv("TELEGRAM_CHAT_ID") or os.getenv("CHAT_ID")
+            _OUTBOX = TelegramOutbox(token=os.getenv("TELEGRAM_TOKEN"), chat_id=chat_id)
+            atexit.register(_OUTBOX.flush)
+        return _OUTBOX
@@ -0,0 +1,102 @@
+"""
+Index level TP/SL per simbol: tiap tick cuma level yang kelewat yang diambil, O(log n + k)
+(bukan evaluate_state ke semua posisi, O(n)).
+
+Level disimpan sorted per sisi (bisect):
+  BUY  TP kena kalau harga >= tp  -> prefix keys <= harga     BUY  SL kena kalau harga <= sl -> suffix keys >= harga
+  SELL TP kena kalau harga <= tp  -> suffix keys >= harga     SELL SL kena kalau harga >= sl -> prefix keys <= harga
+Expiry: deadline (opened_at_wall_ts + SIGNAL_TTL_SEC) sorted juga, yang udah lewat = prefix.
+
+Prioritas per posisi sama persis kayak evaluate_state: EXPIRED, lalu tick (bid buat BUY, ask buat SELL;
+TP dulu baru SL), lalu candle high/low sebagai backup. Posisi dengan sl/tp 0 cuma ikut expiry.
+"""
+import time
+from bisect import bisect_left, bisect_right
+
+from src.state_manager import SIGNAL_TTL_SEC
+
+class SortedLevels:
+    """Level sorted + id paralel. Insert/remove O(log n) cari + memmove list."""
+    __slots__ = ("keys", "ids")
+
+    def __init__(self):
+        self.keys = []
+        self.ids = []
+
+    def add(self, key, pid):
+        i = bisect_right(self.keys, key)
+        self.keys.insert(i, key)
+        self.ids.insert(i, pid)
+
+    def remove(self, key, pid):
+        i = bisect_left(self.keys, key)
+        while i < len(self.keys) and self.keys[i] == key:
+            if self.ids[i] == pid:
+                del self.keys[i]
+                del self.ids[i]
+                return True
+            i += 1
+        return False
+
+    def upto(self, price):
+        """id dengan level <= price."""
+        return self.ids[:bisect_right(self.keys, price)]
+
+    def below(self, value):
+        """id dengan level < value (strict)."""
+        return self.ids[:bisect_left(self.keys, value)]
+
+    def atleast(self, price):
+        """id dengan level >= price."""
+        return self.ids[bisect_left(self.keys, price):]
+
+    def __len__(self):
+        return len(self.keys)
+
+class TriggerIndex:
+    def __init__(self, ttl_sec=SIGNAL_TTL_SEC):
+        self.ttl_sec = ttl_sec
+        self.buy_tp, self.buy_sl = SortedLevels(), SortedLevels()
+        self.sell_tp, self.sell_sl = SortedLevels(), SortedLevels()
+        self.expiry = SortedLevels()
+        self.entries = {} # id -> (type, sl, tp, deadline) buat remove
+
+    def add(self, pid, pos):
+        stype = pos.get("type")
+        if stype not in ("BUY", "SELL") or pid in self.entries: return False # Tipe hantu = NONE di evaluate_state
+        sl, tp = float(pos.get("sl", 0) or 0), float(pos.get("tp", 0) or 0)
+        deadline = int(pos.get("opened_at_wall_ts", 0)) + self.ttl_sec
+        self.expiry.add(deadline, pid)
+        if sl and tp:
+            tp_side, sl_side = (self.buy_tp, self.buy_sl) if stype == "BUY" else (self.sell_tp, self.sell_sl)
+            tp_side.add(tp, pid)
+            sl_side.add(sl, pid)
+        self.entries[pid] = (stype, sl, tp, deadline)
+        return True
+
+    def remove(self, pid):
+        entry = self.entries.pop(pid, None)
+        if entry is None: return False
+        stype, sl, tp, deadline = entry
+        self.expiry.remove(deadline, pid)
+        if sl and tp:
+            tp_side, sl_side = (self.buy_tp, self.buy_sl) if stype == "BUY" else (self.sell_tp, self.sell_sl)
+            tp_side.remove(tp, pid)
+            sl_side.remove(sl, pid)
+        return True
+
+    def query(self, high, low, bid=0, ask=0, now=None):
+        """Posisi yang kena -> {id: "TP_HIT"/"SL_HIT"/"EXPIRED"}. Read-only; remove() pas posisi beneran ditutup."""
+        now = int(time.time()) if now is None else now
+        hits = dict.fromkeys(self.expiry.below(now), "EXPIRED") # now - opened > TTL <=> deadline < now
+        stages = []
+        if bid > 0: stages += [(self.buy_tp.upto(bid), "TP_HIT"), (self.buy_sl.atleast(bid), "SL_HIT")]
+        if ask > 0: stages += [(self.sell_tp.atleast(ask), "TP_HIT"), (self.sell_sl.upto(ask), "SL_HIT")]
+        stages += [(self.buy_tp.upto(high), "TP_HIT"), (self.buy_sl.atleast(low), "SL_HIT"),
+                   (self.sell_tp.atleast(low), "TP_HIT"), (self.sell_sl.upto(high), "SL_HIT")]
+        for ids, status in stages:
+            for pid in ids: hits.setdefault(pid, status) # Status pertama menang = urutan evaluate_state
+        return hits
+
+    def __len__(self):
+        return len(self.entries)
@@ -0,0 +1,103 @@
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+# --- CONFIG ---
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_PATH = os.path.join(BASE_DIR, "verdict_cache.json")
+LEG_BUCKET_USD = 1.0   # Leg size dibulatkan per $1
+DIST_BUCKET_USD = 0.5  # Jarak ke pivot dibulatkan per $0.5
+MAX_LEGS = 4           # Cuma leg terakhir yang relevan buat verdict
+
+def _bucket(value, step):
+    try: return round(float(value) / step) * step
+    except (TypeError, ValueError): return 0.0
+
+def feature_key(signal_type, metrics):
+    """
+    Key verdict = vektor fitur yang dinormalisasi + dikuantisasi (sama persis dengan yang
+    dibaca prompt AI, minus angka mentah yang berubah tiap candle).
+    """
+    struct = metrics.get('m15_structure') or metrics.get('indicators', {}).get('m15_structure', {})
+    legs = [_bucket(x, LEG_BUCKET_USD) for x in struct.get('leg_sizes_signed', [])[-MAX_LEGS:]]
+    # "Clock Drift 3.2s" -> "Clock Drift": angka di warning gak ngubah makna
+    warnings = sorted({re.sub(r"\s*-?\d+(\.\d+)?s?", "", str(w)).strip() for w in metrics.get('warnings', [])})
+    features = [
+        signal_type,
+        metrics.get('trend_m15', 'NEUTRAL'),
+        struct.get('sequence', 'N/A'),
+        legs,
+        _bucket(struct.get('dist_to_pivot', 0.0), DIST_BUCKET_USD),
+        bool(struct.get('last_pivot_is_obs', False)),
+        struct.get('last_pivot_type', 'None'),
+        warnings,
+    ]
+    if metrics.get('symbol'): features.append(metrics['symbol']) # Scan multi simbol: verdict gak dibagi antar instrumen
+    return json.dumps(features, separators=(",", ":"))
+
+class VerdictCache:
+    """
+    Cache verdict AI: TTL + LRU (OrderedDict), persist ke JSON (atomic write) biar
+    tetap ada setelah restart watchdog. Verdict error gak pernah di-cache.
+    """
+    def __init__(self, path=CACHE_PATH, ttl_sec=3600, max_entries=256):
+        self.path = path
+        self.ttl_sec = ttl_sec
+        self.max_entries = max_entries
+        self.entries = OrderedDict() # key -> {"verdict": dict, "ts": float}
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path): return
+        try:
+            with open(self.path, "r") as f:
+                raw = json.load(f)
+        except Exception:
+            return # Cache korup = mulai kosong, gak fatal
+        now = time.time()
+        for key, entry in sorted(raw.items(), key=lambda kv: kv[1].get("ts", 0)):
+            if now - entry.get("ts", 0) < self.ttl_sec: self.entries[key] = entry
+
+    def _save(self):
+        if not self.path: return
+        temp_file = self.path + ".tmp"
+        try:
+            with open(temp_file, "w") as f:
+                json.dump(self.entries, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_file, self.path)
+        except Exception as e:
+            print(f"⚠️ Verdict cache write failed: {e}")
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry and time.time() - entry["ts"] < self.ttl_sec:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return dict(entry["verdict"])
+            if entry: del self.entries[key] # Expired
+            self.misses += 1
+            return None
+
+    def put(self, key, verdict):
+        # Cuma verdict valid yang di-cache: error / balasan AI aneh (decision kosong, "HOLD") gak boleh nempel se-TTL
+        if str(verdict.get("reason", "")) in ("AI Error", "AI Config Error"): return
+        if str(verdict.get("decision", "")).strip().upper() not in ("APPROVE", "REJECT"): return
+        with self.lock:
+            self.entries[key] = {"verdict": verdict, "ts": time.time()}
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries: self.entries.popitem(last=False)
+            self._save()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "size": len(self.entries),
+                "hit_rate": round(self.hits / total, 3) if total else 0.0}
@@ -0,0 +1,87 @@
+"""
+Format wire biner buat payload bridge (negotiated, JSON tetap jadi fallback).
+
+Request: tambah {"encoding": "binary", "compress": "zlib"|None}.
+Response biner = multipart ZMQ:
+  frame 0   : header JSON kecil (status, mode, tick, meta, layout kolom per timeframe)
+  frame 1.. : buffer kolom contiguous (int64 time, float64 OHLCV), urut sesuai header["frames"]
+Tanpa kompresi, kolom di-wrap np.frombuffer (zero-copy). Bridge lama yang gak kenal
+"encoding" tetap bales 1 frame JSON dan client otomatis pakai jalur JSON.
+GET_MULTI: response per simbol di header["symbols"], entry layout kolomnya diawali nama simbol
+([symbol, tf, kolom, dtype, codec]), semua kolom semua simbol di 1 multipart.
+"""
+import json
+import zlib
+
+import numpy as np
+
+WIRE_VERSION = 1
+BAR_COLUMNS = (("time", "<i8"), ("Open", "<f8"), ("High", "<f8"), ("Low", "<f8"), ("Close", "<f8"), ("Volume", "<f8"))
+COMPRESS_MIN_BYTES = 64 * 1024 # Kolom kecil (delta) gak usah di-compress
+
+def bars_to_columns(bars):
+    """List of dict bar -> dict kolom NumPy (buat sisi bridge/simulator)."""
+    cols = {}
+    for name, dtype in BAR_COLUMNS:
+        if name == "Volume":
+            vals = [b.get("Volume", b.get("tick_volume", 0)) or 0 for b in bars]
+        else:
+            vals = [b[name] for b in bars]
+        cols[name] = np.asarray(vals, dtype=dtype)
+    return cols
+
+def bars_len(bars):
+    if isinstance(bars, dict): return len(bars["time"])
+    return len(bars or [])
+
+def first_time(bars):
+    if isinstance(bars, dict): return int(bars["time"][0])
+    return bars[0]["time"]
+
+def encode_response(resp, timeframes=("m5", "m15"), compress=None):
+    """Response dict (bar = list of dict atau dict kolom, opsional per simbol) -> list frame bytes."""
+    header = {k: v for k, v in resp.items() if k not in timeframes and k != "symbols"}
+    header.update({"encoding": "binary", "wire_version": WIRE_VERSION, "compress": None, "frames": []})
+    frames = []
+
+    def add(prefix, sub):
+        for tf in timeframes:
+            if tf not in sub: continue
+            cols = sub[tf]
+            if not isinstance(cols, dict): cols = bars_to_columns(cols)
+            for name, dtype in BAR_COLUMNS:
+                buf = np.ascontiguousarray(cols[name], dtype=dtype).tobytes()
+                codec = None
+                if compress == "zlib" and len(buf) >= COMPRESS_MIN_BYTES:
+                    buf = zlib.compress(buf, 1)
+                    codec = "zlib"
+                header["frames"].append(prefix + [tf, name, dtype, codec])
+                frames.append(buf)
+
+    add([], resp)
+    if "symbols" in resp:
+        header["symbols"] = {}
+        for sym, sub in resp["symbols"].items():
+            header["symbols"][sym] = {k: v for k, v in sub.items() if k not in timeframes}
+            add([sym], sub)
+    if any(f[-1] for f in header["frames"]): header["compress"] = compress
+    return [json.dumps(header).encode()] + frames
+
+def decode_response(frames):
+    """
+    List frame (bytes / zmq.Frame) -> dict response.
+    1 frame = JSON biasa (fallback). Multipart = header + kolom -> dict kolom NumPy per timeframe.
+    """
+    first = frames[0]
+    raw = first.bytes if hasattr(first, "bytes") else first
+    resp = json.loads(raw)
+    if len(frames) == 1 or resp.get("encoding") != "binary": return resp
+
+    layout = resp.pop("frames")
+    for entry, frame in zip(layout, frames[1:]):
+        target = resp if len(entry) == 4 else resp["symbols"][entry[0]]
+        tf, name, dtype, codec = entry[-4:]
+        buf = frame.buffer if hasattr(frame, "buffer") else frame
+        if codec == "zlib": buf = zlib.decompress(buf)
+        target.setdefault(tf, {})[name] = np.frombuffer(buf, dtype=dtype)
+    return resp
@@ -1,9 +1,17 @@
 import zmq
 import json
+import os
+
+from src.wire import decode_response
 
 class ZMQClient:
-    def __init__(self, host_ip, port=5555):
-        self.address = f"tcp://{host_ip}:{port}"
+    def __init__(self, host_ip=None, port=None, encoding="json", address=None):
+        port = port or int(os.getenv("BRIDGE_PORT", 5555))
+        # Prioritas: address eksplisit > host_ip > BRIDGE_ADDRESS (simulator) > localhost
+        if address is None:
+            address = f"tcp://{host_ip}:{port}" if host_ip else os.getenv("BRIDGE_ADDRESS", f"tcp://127.0.0.1:{port}")
+        self.address = address
+        self.encoding = encoding # "binary" -> minta payload kolom NumPy (fallback JSON otomatis)
         self.context = zmq.Context()
         self.socket = None
         self.connect()
@@ -23,10 +31,11 @@ class ZMQClient:
     def request(self, action, payload=None):
         req = {"action": action}
         if payload: req.update(payload)
+        if self.encoding == "binary": req.setdefault("encoding", "binary")
 
         try:
             self.socket.send_json(req)
-            return self.socket.recv_json()
+            return decode_response(self.socket.recv_multipart(copy=False))
         except zmq.error.Again:
             print("⚠️ Timeout! Reconnecting...")
             self.connect() # Reconnect otomatis
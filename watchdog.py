@@ -1,9 +1,10 @@
 import time
 import os
+import signal
 import subprocess
-import requests
 import sys
 from dotenv import load_dotenv
+from src.telegram_outbox import get_outbox
 
 # --- CONFIG ---
 PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -11,18 +12,13 @@ LOG_DIR = os.path.join(PROJECT_DIR, "logs")
 os.makedirs(LOG_DIR, exist_ok=True)
 
 load_dotenv(os.path.join(PROJECT_DIR, ".env"))
-TELEGRAM_TOKEN = os.getenv("TELEGRAM_TOKEN")
-CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
+OUTBOX = get_outbox() # Outbox bareng (env TELEGRAM_TOKEN / TELEGRAM_CHAT_ID), flush pas exit
+
+# SIGTERM (systemd / kill) -> SystemExit biar finally + atexit flush jalan
+signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
 
 def alert(msg):
-    if not TELEGRAM_TOKEN or not CHAT_ID: return
-    try:
-        requests.post(
-            f"https://api.telegram.org/bot{TELEGRAM_TOKEN}/sendMessage",
-            json={"chat_id": CHAT_ID, "text": msg, "parse_mode": "HTML"},
-            timeout=10
-        )
-    except: pass
+    OUTBOX.send(msg, parse_mode="HTML") # Non-blocking, retry & rate limit diurus outbox
 
 def is_bot_running():
     try:
@@ -84,35 +80,40 @@ last_critical_ts = 0
 last_recovered_ts = 0
 ALERT_COOLDOWN = 300 
 
-while True:
-    if not is_bot_running():
-        error_count += 1
-        print(f"🚨 BOT DOWN! Attempt {error_count}/3")
+try:
+    while True:
+        if not is_bot_running():
+            error_count += 1
+            print(f"🚨 BOT DOWN! Attempt {error_count}/3")
         
-        if error_count <= 3:
-            alert(f"⚠️ <b>BOT CRASHED</b> (x{error_count})\nRestarting...")
+            if error_count <= 3:
+                alert(f"⚠️ <b>BOT CRASHED</b> (x{error_count})\nRestarting...")
             
-            if restart_bot():
-                # FIX: Quick Re-Check buat deteksi Crash-on-Boot
-                time.sleep(10)
-                if is_bot_running():
-                    alert("✅ <b>RESTART SUCCESS</b>\nEngine stable.")
+                if restart_bot():
+                    # FIX: Quick Re-Check buat deteksi Crash-on-Boot
+                    time.sleep(10)
+                    if is_bot_running():
+                        alert("✅ <b>RESTART SUCCESS</b>\nEngine stable.")
+                    else:
+                        alert("🚨 <b>BOOT FAILED</b>\nBot died immediately after restart.")
+                        # Biarkan error_count nambah di loop berikutnya
                 else:
-                    alert("🚨 <b>BOOT FAILED</b>\nBot died immediately after restart.")
-                    # Biarkan error_count nambah di loop berikutnya
+                    alert("❌ <b>RESTART STALLED</b>")
             else:
-                alert("❌ <b>RESTART STALLED</b>")
-        else:
-            if time.time() - last_critical_ts > 60:
-                alert(f"🚨 <b>CRITICAL FAILURE</b>\nAuto-restart failed 3 times.\nMANUAL INTERVENTION NEEDED!")
-                last_critical_ts = time.time()
-            time.sleep(60)
+                if time.time() - last_critical_ts > 60:
+                    alert(f"🚨 <b>CRITICAL FAILURE</b>\nAuto-restart failed 3 times.\nMANUAL INTERVENTION NEEDED!")
+                    last_critical_ts = time.time()
+                time.sleep(60)
             
-    else:
-        if error_count > 0:
-            if time.time() - last_recovered_ts > ALERT_COOLDOWN:
-                alert("✅ <b>BOT RECOVERED</b>\nRunning normally.")
-                last_recovered_ts = time.time()
-            error_count = 0 
+        else:
+            if error_count > 0:
+                if time.time() - last_recovered_ts > ALERT_COOLDOWN:
+                    alert("✅ <b>BOT RECOVERED</b>\nRunning normally.")
+                    last_recovered_ts = time.time()
+                error_count = 0 
             
-    time.sleep(60)
+        time.sleep(60)
+except KeyboardInterrupt:
+    print("🐕 WATCHDOG STOPPED")
+finally:
+    OUTBOX.flush()